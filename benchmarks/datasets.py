@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# quotes come doubled, as SQLWriter writes values as they are, but they still go through the whole SQL Injection check
+WORDS = ['Mercedes', 'Suzuki', 'BMW', 'SEAT', 'Ford', "O''Brien", 'Tab\tbed', 'New\nline', 'back\\slash', 'Ünïcødé']
+
+
+def numeric(n_rows, seed=0):
+    """
+    Dataframe of integers, floats and booleans without nulls.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(n_rows, dtype='int64'),
+        'quantity': rng.integers(-1000, 1000, n_rows),
+        'price': rng.normal(100, 25, n_rows).round(2),
+        'ratio': rng.random(n_rows),
+        'activated': rng.random(n_rows) < 0.5})
+
+
+def string(n_rows, seed=0):
+    """
+    Dataframe of short and long texts, some of them with quotes and characters escaped by COPY.
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    return pd.DataFrame({
+        'id': np.arange(n_rows, dtype='int64'),
+        'name': words[rng.integers(0, len(words), n_rows)],
+        'code': np.char.add('CODE-', rng.integers(0, 10 ** 6, n_rows).astype(str)).astype(object),
+        'description': np.char.multiply('lorem ipsum ', rng.integers(1, 10, n_rows)).astype(object)})
+
+
+def datetime(n_rows, seed=0):
+    """
+    Dataframe of dates, naive timestamps and timestamps with time zone.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 50 * 365 * 24 * 3600, n_rows)
+    timestamps = pd.Timestamp('1990-01-01') + pd.to_timedelta(seconds, unit='s')
+    return pd.DataFrame({
+        'id': np.arange(n_rows, dtype='int64'),
+        'date': timestamps.normalize(),
+        'created_at': timestamps,
+        'updated_at': timestamps.tz_localize('UTC')})
+
+
+def null_heavy(n_rows, seed=0, null_ratio=0.7):
+    """
+    Dataframe of numbers, texts and timestamps where most values are null.
+    """
+    rng = np.random.default_rng(seed)
+    df = numeric(n_rows, seed).drop(columns=['activated'])
+    df['name'] = string(n_rows, seed)['name']
+    df['created_at'] = datetime(n_rows, seed)['created_at']
+    for col in df.columns[1:]:
+        df[col] = df[col].where(rng.random(n_rows) >= null_ratio)
+    return df
+
+
+def wide(n_rows, seed=0, n_columns=50):
+    """
+    Dataframe with n_columns columns of integers, floats and texts.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {'id': np.arange(n_rows, dtype='int64')}
+    words = np.array(WORDS[:5], dtype=object)
+    for i in range(1, n_columns):
+        if i % 3 == 0:
+            columns['col_%d' % i] = words[rng.integers(0, len(words), n_rows)]
+        elif i % 3 == 1:
+            columns['col_%d' % i] = rng.integers(0, 10 ** 6, n_rows)
+        else:
+            columns['col_%d' % i] = rng.random(n_rows)
+    return pd.DataFrame(columns)
+
+
+GENERATORS = {'numeric': numeric, 'string': string, 'datetime': datetime, 'null_heavy': null_heavy, 'wide': wide}
+
+
+def create_table_statement(table_name, df):
+    """
+    Returns:
+        CREATE TABLE statement for a table with the columns of df, with id as primary key.
+    """
+    columns = []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            pg_type = 'boolean'
+        elif pd.api.types.is_integer_dtype(dtype):
+            pg_type = 'bigint'
+        elif pd.api.types.is_float_dtype(dtype):
+            pg_type = 'double precision'
+        elif isinstance(dtype, pd.DatetimeTZDtype):
+            pg_type = 'timestamptz'
+        elif pd.api.types.is_datetime64_dtype(dtype):
+            pg_type = 'timestamp'
+        else:
+            pg_type = 'text'
+        columns.append('%s %s%s' % (col, pg_type, ' PRIMARY KEY' if col == 'id' else ''))
+    return 'CREATE TABLE %s (%s)' % (table_name, ', '.join(columns))
@@ -0,0 +1,298 @@
+"""
+Benchmarks of the statement writers and, when a PostgreSQL database is available, of the methods of the connector.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 1000000 --output benchmark.json
+    python -m benchmarks.run --compare benchmark.json
+
+End-to-end benchmarks use the database given by the environment variables HOST, DATABASE_NAME, USER_NAME,
+USER_PASSWORD and PORT, or a .env file, as the tests do. They write on a schema created for them, which is dropped
+at the end. Use a throwaway database. With --memory they run against the in-process stand-in database of
+PostgresMemory instead, which measures the overhead of the client alone.
+
+Importing the package, and calling execute() right after, are timed on a new python process each time, as the cost
+paid by short-lived jobs.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import postgresql_interface
+from benchmarks import datasets
+from postgresql_interface.copy_writer import CopyWriter
+from postgresql_interface.parameterized_writer import ParameterizedWriter
+from postgresql_interface.postgresql_interface import PostgresMemory, postgres_sql_connector_factory
+from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.sql_writer import SQLWriter
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+SCHEMA = 'pgi_benchmark'
+
+# code timed by import_benchmarks() on a new process, and the script that times it and reports the heavy modules
+# that have been loaded
+IMPORT_OPERATIONS = {
+    'import': 'import postgresql_interface.postgresql_interface',
+    'execute': "from postgresql_interface.postgresql_interface import postgres_sql_connector_factory\n"
+               "postgres_sql_connector_factory(vendor='memory').execute('SELECT 1')"}
+_IMPORT_SCRIPT = """
+import json, time
+started_at = time.perf_counter()
+%s
+seconds = time.perf_counter() - started_at
+from postgresql_interface.lazy_import import is_loaded
+print(json.dumps([seconds, [name for name in ('pandas', 'numpy', 'psycopg2') if is_loaded(name)]]))
+"""
+
+
+def time_call(function, repeat=3, setup=None):
+    """
+    Calls function repeat times, calling setup before each call out of the time measured and giving its result to
+    function.
+
+    Returns:
+        dictionary with the minimum and median seconds of the calls.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        started_at = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started_at)
+    return {'seconds': min(timings), 'median_seconds': statistics.median(timings), 'repeat': repeat}
+
+
+def offline_benchmarks(name, df, repeat):
+    """
+    Times the statement writers and the SQL Injection check on a dataframe.
+
+    Returns:
+        list of results, one per operation.
+    """
+    table_name = '%s.%s' % (SCHEMA, name)
+    operations = {
+        'create_insert_table_statement': lambda frame: SQLWriter.create_insert_table_statement(table_name, frame),
+        'create_update_table_statement': lambda frame: SQLWriter.create_update_table_statement(
+            table_name, frame, ['id']),
+        'create_delete_from_table_statement': lambda frame: SQLWriter.create_delete_from_table_statement(
+            table_name, frame[['id']]),
+        'create_copy_buffer': lambda frame: CopyWriter.create_copy_buffer(frame).read(),
+        'create_parameters': lambda frame: ParameterizedWriter.create_parameters(frame)}
+
+    text_columns = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col].dtype)
+                    and not pd.api.types.is_datetime64_any_dtype(df[col].dtype)]
+    if text_columns:
+        operations['check_column_on_insert'] = lambda frame: [
+            SQLInjectionBodyguard.check_column_on_insert(frame[col].to_numpy(dtype=object), col)
+            for col in text_columns]
+
+    return [dict(operation=operation, method=None, **time_call(function, repeat, setup=lambda: df))
+            for operation, function in operations.items()]
+
+
+def import_benchmarks(repeat):
+    """
+    Times the operations of IMPORT_OPERATIONS, each time on a new python process.
+
+    Returns:
+        list of results, one per operation, with the heavy modules loaded by it.
+    """
+    # the process is started where the package is, so it imports the same code
+    root = os.path.dirname(os.path.dirname(os.path.abspath(postgresql_interface.__file__)))
+    results = []
+    for operation, code in IMPORT_OPERATIONS.items():
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT % code], cwd=root, capture_output=True,
+                                    text=True, check=True).stdout
+            seconds, modules = json.loads(output)
+            timings.append(seconds)
+        results.append({'operation': operation, 'method': None, 'seconds': min(timings),
+                        'median_seconds': statistics.median(timings), 'repeat': repeat, 'modules': modules})
+    return results
+
+
+def end_to_end_benchmarks(db_conn, name, df, repeat):
+    """
+    Times the methods of the connector that write and read a table with the content of df.
+
+    Returns:
+        list of results, one per operation and method.
+    """
+    table_name = '%s.%s' % (SCHEMA, name)
+    db_conn.execute('DROP TABLE IF EXISTS %s; %s' % (table_name, datasets.create_table_statement(table_name, df)))
+
+    def truncate():
+        db_conn.execute('TRUNCATE %s' % table_name)
+
+    def refill():
+        db_conn.insert_table(table_name, df, truncate=True, method='copy')
+
+    results = []
+    for method in ['statement', 'copy', 'binary', 'parameterized']:
+        results.append(dict(operation='insert_table', method=method, **time_call(
+            lambda _: db_conn.insert_table(table_name, df, method=method), repeat, setup=truncate)))
+
+    refill()
+    for method in ['statement', 'values', 'staging', 'prepared']:
+        results.append(dict(operation='update_table', method=method, **time_call(
+            lambda _: db_conn.update_table(table_name, df, ['id'], method=method), repeat)))
+
+    if isinstance(db_conn, PostgresMemory):
+        db_conn.database.add_result('SELECT * FROM %s' % table_name, df)
+    for method in ['read_sql', 'copy']:
+        results.append(dict(operation='query', method=method, **time_call(
+            lambda _: db_conn.query('SELECT * FROM %s' % table_name, method=method, use_cache=False), repeat)))
+
+    for method in ['statement', 'in', 'values', 'staging', 'prepared']:
+        results.append(dict(operation='delete_from_table', method=method, **time_call(
+            lambda _: db_conn.delete_from_table(table_name, df[['id']], method=method), repeat, setup=refill)))
+
+    db_conn.execute('DROP TABLE %s' % table_name)
+    return results
+
+
+def connect_from_environment():
+    """
+    Returns:
+        a connector to the database given by the environment variables, or None if they are not set.
+    """
+    try:
+        from dotenv import load_dotenv
+        if os.path.isfile('.env'):
+            load_dotenv(dotenv_path='.env')
+    except ImportError:
+        pass
+    variables = ['HOST', 'DATABASE_NAME', 'USER_NAME', 'USER_PASSWORD', 'PORT']
+    if any(variable not in os.environ for variable in variables):
+        return None
+
+    return postgres_sql_connector_factory(vendor='gcp', host=os.environ['HOST'],
+                                          database_name=os.environ['DATABASE_NAME'],
+                                          user_name=os.environ['USER_NAME'],
+                                          user_password=os.environ['USER_PASSWORD'], port=os.environ['PORT'])
+
+
+def run(sizes=DEFAULT_SIZES, dataset_names=None, repeat=3, end_to_end=True, max_cells=10 ** 7,
+        max_end_to_end_rows=100000, memory=False, log=print):
+    """
+    Runs the benchmarks of importing the package, and the ones over every dataset and size.
+
+    Args:
+        sizes: numbers of rows of the datasets.
+        dataset_names: names of the datasets of benchmarks.datasets.GENERATORS to use. None for all of them.
+        repeat: times each operation is timed. The minimum is reported.
+        end_to_end: False to skip the benchmarks that need a database.
+        max_cells: datasets with more rows times columns are skipped, to bound the memory used.
+        max_end_to_end_rows: datasets with more rows are not used on end-to-end benchmarks.
+        memory: True to run end-to-end benchmarks against the stand-in database of PostgresMemory.
+        log: function called with a line of text as each result is available.
+
+    Returns:
+        dictionary with the environment of the run and a list of results.
+    """
+    if memory:
+        db_conn = PostgresMemory()
+    else:
+        db_conn = connect_from_environment() if end_to_end else None
+    end_to_end_scope = 'memory' if memory else 'end_to_end'
+    if db_conn is not None:
+        db_conn.open_pool(max_size=2)
+        db_conn.execute('CREATE SCHEMA IF NOT EXISTS %s' % SCHEMA)
+
+    results = []
+    for result in import_benchmarks(repeat):
+        result.update(scope='import', dataset=None, rows=None, columns=None)
+        results.append(result)
+        log('%-25s %-36s %-13s %10.4fs' % ('new process:', result['operation'], ', '.join(result['modules']),
+                                          result['seconds']))
+    try:
+        for name in dataset_names or list(datasets.GENERATORS):
+            for n_rows in sizes:
+                df = datasets.GENERATORS[name](n_rows)
+                if df.size > max_cells:
+                    log('%-10s %8d rows: skipped, more than %d cells' % (name, n_rows, max_cells))
+                    continue
+
+                scopes = [('offline', offline_benchmarks(name, df, repeat))]
+                if db_conn is not None and n_rows <= max_end_to_end_rows:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore')
+                        scopes.append((end_to_end_scope, end_to_end_benchmarks(db_conn, name, df, repeat)))
+                for scope, scope_results in scopes:
+                    for result in scope_results:
+                        result.update(scope=scope, dataset=name, rows=n_rows, columns=df.shape[1])
+                        results.append(result)
+                        log('%-10s %8d rows: %-36s %-13s %10.4fs' % (
+                            name, n_rows, result['operation'], result['method'] or '', result['seconds']))
+    finally:
+        if db_conn is not None:
+            db_conn.execute('DROP SCHEMA IF EXISTS %s CASCADE' % SCHEMA)
+            db_conn.close()
+
+    return {'created_at': pd.Timestamp.now(tz='UTC').isoformat(), 'version': _package_version(),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'repeat': repeat, 'results': results}
+
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Returns:
+        list of the results of current that are threshold times slower than the same one in baseline, as tuples of
+        the key of the result, the seconds in baseline and the seconds in current.
+    """
+    def key(result):
+        return result['scope'], result['dataset'], result['rows'], result['operation'], result['method']
+    baseline_seconds = {key(result): result['seconds'] for result in baseline['results']}
+    return [(key(result), baseline_seconds[key(result)], result['seconds']) for result in current['results']
+            if key(result) in baseline_seconds and result['seconds'] > threshold * baseline_seconds[key(result)]]
+
+
+def _package_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version('postgresql-interface')
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='rows of the datasets')
+    parser.add_argument('--datasets', nargs='+', choices=list(datasets.GENERATORS), help='datasets to use')
+    parser.add_argument('--repeat', type=int, default=3, help='times each operation is timed')
+    parser.add_argument('--offline', action='store_true', help='skip the benchmarks that need a database')
+    parser.add_argument('--memory', action='store_true',
+                        help='run end-to-end benchmarks against an in-process stand-in database')
+    parser.add_argument('--max-cells', type=int, default=10 ** 7, help='skip datasets with more cells')
+    parser.add_argument('--max-end-to-end-rows', type=int, default=100000,
+                        help='skip end-to-end benchmarks of datasets with more rows')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file where results are written')
+    parser.add_argument('--compare', help='JSON file of a previous run to report regressions against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='ratio of seconds reported as regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.datasets, args.repeat, not args.offline, args.max_cells, args.max_end_to_end_rows,
+                 args.memory)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print('Results written to %s' % args.output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(json.load(file), report, args.threshold)
+        for result_key, before, after in regressions:
+            print('REGRESSION %s: %.4fs -> %.4fs (x%.2f)' % (result_key, before, after, after / before))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
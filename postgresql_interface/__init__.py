@@ -0,0 +1,36 @@
+import importlib
+
+# names given by the package and the module where they are defined. Modules are only imported the first time one of
+# their names is used, so importing the package costs nothing
+_NAMES = {
+    'postgres_sql_connector_factory': 'postgresql_interface.postgresql_interface',
+    'PostgresSQLConnector': 'postgresql_interface.postgresql_interface',
+    'PostgresGCP': 'postgresql_interface.postgresql_interface',
+    'PostgresHeroku': 'postgresql_interface.postgresql_interface',
+    'PostgresMemory': 'postgresql_interface.postgresql_interface',
+    'ErrorPossibleSQLInjectionDetected': 'postgresql_interface.custom_errors',
+    'ErrorConnectionPool': 'postgresql_interface.custom_errors',
+    'ErrorParallelInsert': 'postgresql_interface.custom_errors',
+    'Observer': 'postgresql_interface.instrumentation',
+    'TimingCollector': 'postgresql_interface.instrumentation',
+}
+
+__all__ = list(_NAMES)
+
+
+def __getattr__(name):
+    """
+    Imports the module where name is defined the first time it is used, see PEP 562.
+
+    Raises:
+        AttributeError: if name is not given by the package.
+    """
+    if name not in _NAMES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(_NAMES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
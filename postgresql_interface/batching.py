@@ -0,0 +1,65 @@
+class AdaptiveBatchSizer:
+    """
+    Tunes the number of rows per batch of a load from what has been measured on previous batches. The size grows
+    while batches are fast and small, and it is limited so that a batch takes about target_seconds and its statement
+    does not exceed max_bytes.
+
+    Args:
+        initial_size: number of rows of the first batch.
+        min_size: minimum number of rows per batch.
+        max_size: maximum number of rows per batch.
+        target_seconds: desired duration of a batch, from building its statement until it has been executed.
+        max_bytes: maximum size in bytes of the statement of a batch.
+        max_growth: maximum factor by which the size can grow from one batch to the next.
+        smoothing: weight given to the last batch when updating the measured throughput and bytes per row.
+    """
+    def __init__(self, initial_size=1000, min_size=100, max_size=1000000, target_seconds=2.0,
+                 max_bytes=64 * 1024 * 1024, max_growth=2.0, smoothing=0.5):
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError('Batch sizes must satisfy 0 < min_size <= initial_size <= max_size.')
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.max_growth = max_growth
+        self.smoothing = smoothing
+
+        self.size = initial_size
+        self.rows_per_second = None
+        self.bytes_per_row = None
+
+    def next_size(self):
+        """
+        Returns:
+            number of rows to put on the next batch.
+        """
+        return self.size
+
+    def record(self, rows, seconds, statement_bytes):
+        """
+        Updates the measurements with a finished batch and computes the size of the next one.
+
+        Args:
+            rows: number of rows of the batch.
+            seconds: time taken by the batch.
+            statement_bytes: size in bytes of the statement sent for the batch.
+        """
+        if rows <= 0:
+            return
+
+        self.rows_per_second = self._smooth(self.rows_per_second, rows / max(seconds, 1e-6))
+        self.bytes_per_row = self._smooth(self.bytes_per_row, statement_bytes / rows)
+
+        size = min(self.rows_per_second * self.target_seconds,
+                   self.max_bytes / max(self.bytes_per_row, 1.0),
+                   self.size * self.max_growth)
+        self.size = int(min(max(size, self.min_size), self.max_size))
+
+    def _smooth(self, previous, value):
+        """
+        Exponentially weighted moving average, so a single slow batch does not collapse the size.
+        """
+        if previous is None:
+            return value
+        return self.smoothing * value + (1 - self.smoothing) * previous
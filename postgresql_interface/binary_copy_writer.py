@@ -0,0 +1,266 @@
+import struct
+from postgresql_interface.copy_writer import CopyBuffer
+from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# oids of the types of PostgreSQL that can be written in binary format
+BOOL, INT8, INT2, INT4, TEXT, FLOAT4, FLOAT8, BPCHAR, VARCHAR, DATE, TIMESTAMP, TIMESTAMPTZ = (
+    16, 20, 21, 23, 25, 700, 701, 1042, 1043, 1082, 1114, 1184)
+
+# fixed-width big-endian numpy types of their binary representation
+_INTEGER_TYPES = {INT2: '>i2', INT4: '>i4', INT8: '>i8'}
+_FLOAT_TYPES = {FLOAT4: '>f4', FLOAT8: '>f8'}
+_TEXT_TYPES = (TEXT, VARCHAR, BPCHAR)
+
+_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+_TRAILER = struct.pack('>h', -1)
+# days and microseconds from 1970-01-01, the epoch of numpy, to 2000-01-01, the epoch of PostgreSQL
+_EPOCH_DAYS = 10957
+_EPOCH_MICROSECONDS = _EPOCH_DAYS * 86400 * 10 ** 6
+
+
+class BinaryCopyWriter:
+    """
+    Trait that writes the statement and the data stream of a COPY ... FROM STDIN WITH (FORMAT binary) operation given
+    an input dataframe.
+
+    Values are encoded column-wise from the numpy arrays of the dataframe, with the binary representation of the type
+    of the column of the table they are loaded into, so they are never converted to text. Supported columns are:
+    - booleans into boolean
+    - integers into smallint, integer, bigint, real and double precision
+    - floats into real and double precision, and into integer types if all of them are integral
+    - naive timestamps into timestamp, and into date if all of them are at midnight
+    - timestamps with time zone into timestamp with time zone
+    - strings into text, varchar and char
+
+    A COPY is either binary or text, so a dataframe with any other column has to be loaded in text format with
+    CopyWriter. Nulls are written for NaN, None and NaT, as in the text format.
+    """
+    @staticmethod
+    def create_copy_from_statement(table_name, columns, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to load data in binary format from STDIN into a table.
+
+            COPY table_name (columns[0], columns[1], ... columns[n]) FROM STDIN WITH (FORMAT binary)
+
+        - Args:
+            table_name: name of the table where data is going to be loaded, it must include the schema
+            columns: list of column names in the same order than the data stream
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the COPY FROM STDIN sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on a column name
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return 'COPY %s (%s) FROM STDIN WITH (FORMAT binary)' % (table_name, ', '.join(columns))
+
+    @staticmethod
+    def get_column_encoders(df, column_types, encoding='utf-8'):
+        """
+        This method chooses how each column of df is encoded, given the types of the columns of the table.
+
+        - Args:
+            df: dataframe of values to load
+            column_types: dictionary with the upper case name of each column of the table as key and the oid of its
+                type as value
+            encoding: python name of the client encoding of the connection, used to encode strings
+
+        - Returns:
+            List with an encoder per column of df, to be given to iter_copy_chunks(), or None if some column can not
+            be written in binary format
+        """
+        encoders = []
+        for i, col in enumerate(df.columns.values.tolist()):
+            encoder = _column_encoder(df.iloc[:, i], column_types.get(str(col).upper()), encoding)
+            if encoder is None:
+                return None
+            encoders.append(encoder)
+        return encoders or None
+
+    @staticmethod
+    def iter_copy_chunks(df, encoders, chunk_size=10000):
+        """
+        Generator that encodes df in COPY binary format, chunk_size rows at a time, so the whole stream never needs
+        to be in memory.
+
+        - Args:
+            df: dataframe of values to load
+            encoders: list of encoders of the columns of df, as returned by get_column_encoders()
+            chunk_size: number of rows encoded on each chunk
+
+        - Yields:
+            Bytes with the header of the stream, then chunk_size rows of df at a time, then the trailer
+        """
+        yield _HEADER
+        for start in range(0, df.shape[0], chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            yield _encode_rows([encoder(chunk.iloc[:, i]) for i, encoder in enumerate(encoders)])
+        yield _TRAILER
+
+    @staticmethod
+    def create_copy_buffer(df, encoders, chunk_size=10000):
+        """
+        This method returns a file-like object with df in COPY binary format, ready to be given to
+        cursor.copy_expert(). The data is encoded lazily while it is read.
+
+        - Args:
+            df: dataframe of values to load
+            encoders: list of encoders of the columns of df, as returned by get_column_encoders()
+            chunk_size: number of rows encoded at a time
+
+        - Returns:
+            Readable file-like object
+        """
+        return CopyBuffer(BinaryCopyWriter.iter_copy_chunks(df, encoders, chunk_size), empty=b'')
+
+
+def _column_encoder(series, type_oid, encoding):
+    """
+    Chooses how a column is encoded, given the type of the column of the table it is loaded into.
+
+    Args:
+        series: column of the dataframe.
+        type_oid: oid of the type of the column of the table, or None if it is not known.
+        encoding: python name of the client encoding, used to encode strings.
+
+    Returns:
+        function that encodes a chunk of the column as described in _encode_rows(), or None if the column can not be
+        written in binary format.
+    """
+    dtype = series.dtype
+    kind = getattr(dtype, 'kind', 'O')
+    nulls = series.isna().to_numpy()
+
+    if type_oid == BOOL and kind == 'b':
+        return lambda chunk: _encode_fixed(chunk, np.dtype('u1'), bool)
+    if type_oid in _FLOAT_TYPES and kind in 'iuf':
+        return lambda chunk: _encode_fixed(chunk, np.dtype(_FLOAT_TYPES[type_oid]), np.float64)
+    if type_oid in _INTEGER_TYPES and kind in 'iuf':
+        values = series.to_numpy(dtype=np.float64 if kind == 'f' else None, na_value=0)[~nulls]
+        bounds = np.iinfo(_INTEGER_TYPES[type_oid])
+        if kind == 'f':
+            # the upper bound is compared as a power of two, which floats represent exactly
+            out_of_range = (values < bounds.min) | (values >= -float(bounds.min)) | (np.floor(values) != values)
+        else:
+            out_of_range = (values < bounds.min) | (values > bounds.max)
+        if out_of_range.any():
+            return None
+        return lambda chunk: _encode_fixed(chunk, np.dtype(_INTEGER_TYPES[type_oid]), np.int64)
+    if kind == 'M' and type_oid in (DATE, TIMESTAMP, TIMESTAMPTZ):
+        # timestamps with time zone are only written into timestamp with time zone, and naive ones into the rest
+        if isinstance(dtype, pd.DatetimeTZDtype) != (type_oid == TIMESTAMPTZ):
+            return None
+        values = _naive_datetimes(series)[~nulls]
+        unit = 'D' if type_oid == DATE else 'us'
+        # values that can not be represented exactly are left to PostgreSQL, which rounds them
+        if (values.astype('datetime64[%s]' % unit) != values).any():
+            return None
+        return lambda chunk: _encode_datetimes(chunk, unit)
+    if type_oid in _TEXT_TYPES and (kind == 'O' or isinstance(dtype, pd.StringDtype)) \
+            and not isinstance(dtype, pd.CategoricalDtype):
+        return lambda chunk: _encode_strings(chunk, encoding)
+    return None
+
+
+def _naive_datetimes(series):
+    """
+    Returns:
+        numpy array of datetime64 of a column of timestamps. Timestamps with time zone are converted to UTC.
+    """
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_convert(None)
+    return series.to_numpy()
+
+
+def _encode_fixed(series, dtype, numpy_type):
+    """
+    Encodes a column as values of dtype, a fixed-width big-endian numpy type.
+
+    Args:
+        series: chunk of the column.
+        dtype: numpy type of the binary representation of the values.
+        numpy_type: numpy type the column is read as, with nulls replaced by 0.
+
+    Returns:
+        see _encode_rows().
+    """
+    nulls = series.isna().to_numpy()
+    values = series.to_numpy(dtype=numpy_type, na_value=0)
+    return np.where(nulls, -1, dtype.itemsize), values[~nulls].astype(dtype).view(np.uint8)
+
+
+def _encode_datetimes(series, unit):
+    """
+    Encodes a column of timestamps as days, for date, or microseconds, for timestamps, from 2000-01-01.
+
+    Args:
+        series: chunk of the column.
+        unit: 'D' or 'us'.
+
+    Returns:
+        see _encode_rows().
+    """
+    nulls = series.isna().to_numpy()
+    values = _naive_datetimes(series)[~nulls].astype('datetime64[%s]' % unit).view(np.int64)
+    if unit == 'D':
+        data = (values - _EPOCH_DAYS).astype('>i4')
+    else:
+        data = (values - _EPOCH_MICROSECONDS).astype('>i8')
+    return np.where(nulls, -1, data.itemsize), data.view(np.uint8)
+
+
+def _encode_strings(series, encoding):
+    """
+    Encodes a column of strings. Other values are converted to str(), as in the text format.
+
+    Args:
+        series: chunk of the column.
+        encoding: python name of the client encoding.
+
+    Returns:
+        see _encode_rows().
+    """
+    nulls = series.isna().to_numpy()
+    encoded = [value.encode(encoding) if isinstance(value, str) else str(value).encode(encoding)
+               for value in series.to_numpy(dtype=object)[~nulls]]
+    lengths = np.full(nulls.shape[0], -1, dtype=np.int64)
+    lengths[~nulls] = [len(value) for value in encoded]
+    return lengths, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _encode_rows(columns):
+    """
+    Puts together the encoded columns of a chunk as the tuples of a COPY binary stream. Each tuple is the number of
+    fields as int16, then for each field its length as int32, -1 for null, followed by its bytes.
+
+    Args:
+        columns: list with a tuple per column of the lengths of its fields, as an array with one value per row, and
+            the bytes of its non-null values one after the other, as an array of uint8.
+
+    Returns:
+        Bytes with the tuples of the chunk.
+    """
+    lengths = np.stack([column_lengths for column_lengths, _ in columns], axis=1).astype(np.int64)
+    n_rows, n_columns = lengths.shape
+    field_sizes = 4 + np.maximum(lengths, 0)
+    row_sizes = 2 + field_sizes.sum(axis=1)
+    row_starts = np.cumsum(row_sizes) - row_sizes
+    field_starts = row_starts[:, None] + 2 + np.cumsum(field_sizes, axis=1) - field_sizes
+
+    out = np.empty(int(row_sizes.sum()), dtype=np.uint8)
+    out[row_starts[:, None] + np.arange(2)] = np.frombuffer(struct.pack('>h', n_columns), dtype=np.uint8)
+    for j, (_, data) in enumerate(columns):
+        out[field_starts[:, j, None] + np.arange(4)] = lengths[:, j].astype('>i4').view(np.uint8).reshape(n_rows, 4)
+        present = lengths[:, j] > 0
+        sizes = lengths[present, j]
+        if sizes.size:
+            # positions of the bytes of each value, which are one after the other on data
+            offsets = np.cumsum(sizes) - sizes
+            out[np.repeat(field_starts[present, j] + 4 - offsets, sizes) + np.arange(data.shape[0])] = data
+    return out.tobytes()
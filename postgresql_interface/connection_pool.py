@@ -0,0 +1,261 @@
+import threading
+import time
+from collections import deque
+from postgresql_interface.custom_errors import ErrorConnectionPool
+from postgresql_interface.lazy_import import lazy_import
+
+psycopg2 = lazy_import('psycopg2', submodules=('extensions',))
+
+
+class _PooledConnection:
+    """
+    Book-keeping of a connection held by ConnectionPool.
+
+    Args:
+        conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+    """
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections. Connections are created on demand up to max_size, reused while they
+    are healthy and closed when they have been idle or alive for too long.
+
+    Args:
+        connection_factory: callable without arguments that returns a new psycopg2 connection.
+        min_size: number of connections opened when the pool is created and kept open even when idle.
+        max_size: maximum number of connections, idle or in use, that the pool can hold.
+        max_idle_time: seconds a connection above min_size can remain idle before being closed. None to disable.
+        max_lifetime: seconds after which a connection is closed instead of being reused. None to disable.
+        health_check: if True, connections are checked with a "SELECT 1" before being handed out.
+        timeout: seconds to wait for a free connection when the pool is exhausted. None to wait forever.
+
+    Raises:
+        ValueError: if min_size or max_size are not coherent.
+    """
+    def __init__(self, connection_factory, min_size=1, max_size=10, max_idle_time=300, max_lifetime=3600,
+                 health_check=True, timeout=30):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError('Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.')
+
+        self.connection_factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+        self.timeout = timeout
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        try:
+            for _ in range(min_size):
+                self._idle.append(self._connect())
+                self._size += 1
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def size(self):
+        """
+        Number of open connections, idle or in use.
+        """
+        with self._condition:
+            return self._size
+
+    @property
+    def idle(self):
+        """
+        Number of connections waiting in the pool to be borrowed.
+        """
+        with self._condition:
+            return len(self._idle)
+
+    @property
+    def closed(self):
+        """
+        True once close() has been called.
+        """
+        return self._closed
+
+    def getconn(self):
+        """
+        Borrows a connection from the pool. An idle connection is reused if it is still healthy, otherwise a new one
+        is opened as long as max_size is not reached. If the pool is exhausted it waits for a connection to be
+        returned.
+
+        Returns:
+            psycopg2 connection that must be given back with putconn().
+
+        Raises:
+            ErrorConnectionPool: if the pool is closed or no connection became available within timeout.
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            entry = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise ErrorConnectionPool('ERROR: Connection pool is closed.')
+                    self._evict_idle()
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise ErrorConnectionPool(
+                            'ERROR: Connection pool exhausted, no connection available after %s seconds.'
+                            % self.timeout)
+                    self._condition.wait(remaining)
+
+            if entry is None:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_reusable(entry, check_health=self.health_check):
+                self._discard(entry)
+                continue
+
+            with self._condition:
+                self._in_use[id(entry.conn)] = entry
+            return entry.conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Gives back a connection to the pool. Any transaction left open on it is rolled back. Broken or expired
+        connections are closed instead of being kept.
+
+        Args:
+            conn: psycopg2 connection obtained with getconn().
+            discard: if True the connection is closed instead of being kept in the pool.
+
+        Raises:
+            ErrorConnectionPool: if the connection does not belong to the pool.
+        """
+        with self._condition:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            raise ErrorConnectionPool('ERROR: Trying to return a connection that does not belong to the pool.')
+
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        if discard or self._closed or not self._is_reusable(entry, check_health=False):
+            self._discard(entry)
+        else:
+            with self._condition:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def close(self):
+        """
+        Closes the pool and every idle connection. Connections in use are closed when they are given back.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def _connect(self):
+        """
+        Opens a new connection through connection_factory.
+
+        Returns:
+            _PooledConnection wrapping the new connection.
+        """
+        return _PooledConnection(self.connection_factory())
+
+    def _is_reusable(self, entry, check_health):
+        """
+        Evaluates if a connection can be handed out again.
+
+        Args:
+            entry: _PooledConnection to evaluate.
+            check_health: if True a "SELECT 1" round trip is done to make sure the server still answers.
+
+        Returns:
+            True if the connection is open, has not exceeded max_lifetime and, when requested, is healthy.
+        """
+        if entry.conn.closed:
+            return False
+        if self.max_lifetime is not None and time.monotonic() - entry.created_at > self.max_lifetime:
+            return False
+        if check_health:
+            try:
+                cursor = entry.conn.cursor()
+                try:
+                    cursor.execute('SELECT 1')
+                finally:
+                    cursor.close()
+                entry.conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _evict_idle(self):
+        """
+        Closes connections above min_size that have been idle longer than max_idle_time. Must be called holding
+        the pool lock.
+        """
+        if self.max_idle_time is None:
+            return
+        now = time.monotonic()
+        # idle connections are kept from least to most recently used, so candidates are on the left
+        while self._idle and self._size > self.min_size and now - self._idle[0].last_used > self.max_idle_time:
+            entry = self._idle.popleft()
+            self._size -= 1
+            self._close_quietly(entry.conn)
+
+    def _discard(self, entry):
+        """
+        Closes a connection and frees its slot in the pool.
+
+        Args:
+            entry: _PooledConnection to close.
+        """
+        self._close_quietly(entry.conn)
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        """
+        Closes a connection ignoring errors, as it may already be broken.
+
+        Args:
+            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
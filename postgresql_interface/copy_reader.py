@@ -0,0 +1,133 @@
+import functools
+from postgresql_interface.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+# value written by COPY for NULL, so that it can be told apart from empty strings, which are quoted
+_COPY_NULL = '\\N'
+
+# PostgreSQL type oids read with a given dtype by the CSV parser. Integers are left to the parser, so they come as
+# int64, or float64 when there are nulls, as with pd.read_sql_query()
+_FLOAT_OIDS = {700, 701, 1700}
+_INTEGER_OIDS = {20, 21, 23, 26}
+_BOOLEAN_OID = 16
+_DATE_OID = 1082
+_TIMESTAMP_OIDS = {1114: False, 1184: True}
+
+
+class CopyReader:
+    """
+    Trait that writes the statements of a COPY ... TO STDOUT operation and parses the data it returns into a
+    dataframe with pandas' CSV reader, using the types of the columns of the query.
+
+    Values are parsed to the same types than pd.read_sql_query() does, except that text values equal to \\N are read
+    as NULL and types without a pandas counterpart, like arrays or json, are read as text.
+    """
+    @staticmethod
+    def create_describe_statement(statement):
+        """
+        This method returns a sql statement that returns no rows, but whose cursor description has the columns of
+        statement.
+
+            SELECT * FROM (statement) AS pgi_query LIMIT 0
+
+        - Args:
+            statement: query to describe
+
+        - Returns:
+            String containing the SELECT sql statement
+        """
+        return 'SELECT * FROM (%s) AS pgi_query LIMIT 0' % _strip_statement(statement)
+
+    @staticmethod
+    def create_copy_to_statement(statement):
+        """
+        This method returns a sql statement to write the result of a query to STDOUT in CSV format.
+
+            COPY (statement) TO STDOUT WITH (FORMAT csv, NULL '\\N')
+
+        - Args:
+            statement: query whose result is copied
+
+        - Returns:
+            String containing the COPY TO STDOUT sql statement
+        """
+        return "COPY (%s) TO STDOUT WITH (FORMAT csv, NULL '%s')" % (_strip_statement(statement), _COPY_NULL)
+
+    @staticmethod
+    def read_copy_buffer(buffer, description, encoding='utf-8'):
+        """
+        This method parses the data written by the statement of create_copy_to_statement().
+
+        - Args:
+            buffer: binary file-like object with the data, positioned at its start
+            description: cursor.description of the query, as given by the statement of create_describe_statement()
+            encoding: python encoding of the data
+
+        - Returns:
+            Dataframe with the result of the query
+        """
+        columns = [col.name for col in description]
+        dtypes = {}
+        for i, col in enumerate(description):
+            if col.type_code in _FLOAT_OIDS:
+                dtypes[i] = 'float64'
+            elif col.type_code not in _INTEGER_OIDS:
+                dtypes[i] = str
+
+        try:
+            df = pd.read_csv(buffer, header=None, dtype=dtypes, na_values=[_COPY_NULL], keep_default_na=False,
+                             encoding=encoding)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame(columns=columns)
+
+        for i, col in enumerate(description):
+            df[i] = _parse_column(df[i], col.type_code)
+        df.columns = columns
+        return df
+
+
+def _strip_statement(statement):
+    """
+    Removes the blanks and semicolon at the end of a statement, so it can be used as a subquery.
+    """
+    return statement.strip().rstrip(';').rstrip()
+
+
+def _parse_column(series, type_code):
+    """
+    Converts a column read as text to the type pd.read_sql_query() would give it.
+
+    Args:
+        series: column read from the CSV data.
+        type_code: oid of the PostgreSQL type of the column.
+
+    Returns:
+        the converted column, or the same one if its type does not need a conversion or some value cannot be
+        converted, like 'infinity' dates.
+    """
+    nulls = series.isna()
+    if type_code == _BOOLEAN_OID:
+        values = series.map({'t': True, 'f': False})
+        return values.astype(bool) if not nulls.any() else values.astype(object).where(~nulls, None)
+
+    try:
+        if type_code == _DATE_OID:
+            values = pd.to_datetime(series, format='%Y-%m-%d').dt.date
+            return values.astype(object).where(~nulls, None)
+        if type_code in _TIMESTAMP_OIDS:
+            return pd.to_datetime(series, format=_timestamp_format(), utc=_TIMESTAMP_OIDS[type_code])
+    except (ValueError, OverflowError):
+        pass
+    return series
+
+
+@functools.lru_cache(maxsize=None)
+def _timestamp_format():
+    """
+    Returns:
+        'ISO8601' on pandas 2.0 or later, which otherwise infers the format from the first value and fails on values
+        with and without fractional seconds, or None on older versions, which have no such format and parse every
+        value on its own.
+    """
+    return 'ISO8601' if int(pd.__version__.split('.')[0]) >= 2 else None
@@ -0,0 +1,151 @@
+import io
+from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+# characters with special meaning in COPY text format and their escaped version
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+_COPY_NULL = '\\N'
+
+
+class CopyWriter:
+    """
+    Trait that writes the statement and the data stream of a COPY ... FROM STDIN operation given an input dataframe.
+
+    Data is written in PostgreSQL text format: columns separated by tabs, rows by new lines and NULL as \\N. Values
+    are rendered as they would be in an INSERT INTO statement written by SQLWriter.
+    """
+    @staticmethod
+    def create_copy_from_statement(table_name, columns, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to load data from STDIN into a table.
+
+            COPY table_name (columns[0], columns[1], ... columns[n]) FROM STDIN
+
+        - Args:
+            table_name: name of the table where data is going to be loaded, it must include the schema
+            columns: list of column names in the same order than the data stream
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the COPY FROM STDIN sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on a column name
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return 'COPY %s (%s) FROM STDIN' % (table_name, ', '.join(columns))
+
+    @staticmethod
+    def iter_copy_chunks(df, chunk_size=10000):
+        """
+        Generator that renders df in COPY text format, chunk_size rows at a time, so the whole stream never needs to
+        be in memory.
+
+        - Args:
+            df: dataframe of values to load
+            chunk_size: number of rows rendered on each chunk
+
+        - Yields:
+            String with chunk_size rows of df in COPY text format
+        """
+        for start in range(0, df.shape[0], chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            lines = None
+            for i in range(chunk.shape[1]):
+                column = _copy_text_column(chunk.iloc[:, i])
+                lines = column if lines is None else lines + '\t' + column
+            if lines is not None:
+                yield '\n'.join(lines.tolist()) + '\n'
+
+    @staticmethod
+    def create_copy_buffer(df, chunk_size=10000):
+        """
+        This method returns a file-like object with df in COPY text format, ready to be given to
+        cursor.copy_expert(). The data is rendered lazily while it is read.
+
+        - Args:
+            df: dataframe of values to load
+            chunk_size: number of rows rendered at a time
+
+        - Returns:
+            Readable file-like object
+        """
+        return CopyBuffer(CopyWriter.iter_copy_chunks(df, chunk_size))
+
+
+class CopyBuffer(io.TextIOBase):
+    """
+    Read-only file-like object that pulls its content from an iterator of strings. The number of characters read so
+    far is kept on characters_read.
+
+    Args:
+        chunks: iterable of strings to be read one after the other.
+        empty: empty chunk, '' for strings or b'' for an iterator of bytes.
+    """
+    def __init__(self, chunks, empty=''):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._empty = empty
+        self._buffer = empty
+        self._position = 0
+        self.characters_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        """
+        Reads up to size characters, or everything left if size is negative or None.
+        """
+        if size is None or size < 0:
+            data = self._buffer[self._position:] + self._empty.join(self._chunks)
+            self._buffer, self._position = self._empty, 0
+            self.characters_read += len(data)
+            return data
+
+        while len(self._buffer) - self._position < size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                break
+            self._buffer = self._buffer[self._position:] + chunk
+            self._position = 0
+
+        data = self._buffer[self._position:self._position + size]
+        self._position += len(data)
+        self.characters_read += len(data)
+        return data
+
+
+def _copy_text_column(series):
+    """
+    Renders a column in COPY text format.
+
+    Args:
+        series: column of the dataframe to render.
+
+    Returns:
+        numpy array of objects with one string per row.
+    """
+    nulls = series.isna().to_numpy()
+    values = series.to_numpy()
+    if series.dtype.kind == 'b':
+        rendered = np.where(series.to_numpy(dtype=bool, na_value=False), 'True', 'False').astype(object)
+    elif series.dtype.kind in 'iu' and isinstance(values, np.ndarray) and values.dtype.kind in 'iu':
+        rendered = values.astype(str).astype(object)
+    elif series.dtype.kind == 'f' and isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+        rendered = values.astype(str).astype(object)
+        # integer columns with nulls come as float from pandas, and COPY does not accept "1.0" for an integer column
+        with np.errstate(invalid='ignore'):
+            integral = np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < 2 ** 53)
+        if integral.any():
+            rendered[integral] = values[integral].astype(np.int64).astype(str)
+    else:
+        rendered = np.array(
+            [_COPY_NULL if null else str(value).translate(_COPY_ESCAPES) for value, null in zip(values, nulls)],
+            dtype=object)
+    if nulls.any():
+        rendered[nulls] = _COPY_NULL
+    return rendered
@@ -1,3 +1,17 @@
 class ErrorPossibleSQLInjectionDetected(Exception):
     def __init__(self, code):
         self.code = code
+
+
+class ErrorConnectionPool(Exception):
+    def __init__(self, code):
+        self.code = code
+
+
+class ErrorParallelInsert(Exception):
+    def __init__(self, code, errors=(), inserted_rows=0):
+        super().__init__(code)
+        self.code = code
+        # tuples of (chunk number, first row, row after the last one, exception) of the chunks that failed
+        self.errors = errors
+        self.inserted_rows = inserted_rows
@@ -0,0 +1,339 @@
+import datetime as dt
+import decimal
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import warnings
+from postgresql_interface.query_cache import normalize_statement
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# formats of the files where results are stored
+FORMATS = ('npy', 'feather')
+_METADATA = 'metadata.json'
+_FEATHER = 'result.feather'
+# kinds of values of the columns that are not mapped, stored as UTF-8 text, never pickled, with their type and the
+# functions that write and read them back
+_TEXT_KINDS = {
+    'str': (str, str, str),
+    'int': (int, str, int),
+    'float': (float, repr, float),
+    'bool': (bool, str, lambda text: text == 'True'),
+    'decimal': (decimal.Decimal, str, decimal.Decimal),
+    'date': (dt.date, dt.date.isoformat, dt.date.fromisoformat),
+    'datetime': (dt.datetime, dt.datetime.isoformat, dt.datetime.fromisoformat),
+    'time': (dt.time, dt.time.isoformat, dt.time.fromisoformat),
+    'uuid': (uuid.UUID, str, uuid.UUID),
+    'bytes': (bytes, bytes.hex, bytes.fromhex),
+    'memoryview': (memoryview, memoryview.hex, lambda text: memoryview(bytes.fromhex(text))),
+    'json': (dict, json.dumps, json.loads),
+}
+_KIND_OF_TYPE = {kind_type: kind for kind, (kind_type, _, _) in _TEXT_KINDS.items()}
+_KIND_OF_TYPE[list] = 'json'
+
+
+class DiskCache:
+    """
+    Thread-safe cache of query results on local disk, so they outlive the process. Each result is stored on its own
+    directory, named by a hash of the text of the statement with its blanks normalized, the method used to read it,
+    and a version.
+
+    Results are stored in a columnar binary format and reloaded memory-mapped, so a big result is available at once
+    and its pages are only read from disk when they are used:
+    - 'npy': a NumPy .npy file per column. Numbers, booleans and timestamps are mapped as they are. Pages changed by
+      the caller are copied on write, so the files are never changed. Timestamps with time zone are stored in UTC and
+      converted back, which copies them. Other columns, like strings, dates or decimals, are stored as UTF-8 text and
+      read into memory. pandas before 2.0 copies the columns of the same type into a single block when the dataframe
+      is built, so no column stays mapped there.
+    - 'feather': a single uncompressed Feather file, read memory-mapped with pyarrow. Only if pyarrow is installed.
+
+    Values are never pickled, so reading a directory others can write does not run their code, although they can
+    change the results read.
+
+    Results expire ttl seconds after being stored. Versions allow to expire them on demand instead: a result is only
+    found with the version it has been stored with, the one of the cache and, optionally, the one given for the
+    statement, e.g. the date of the data. Writes done through the connector do not invalidate stored results.
+
+    Args:
+        directory: directory where results are stored. It is created if it does not exist.
+        ttl: seconds a result is valid. None for results to be valid until their version changes.
+        version: version of all the results, e.g. the version of the schema of the database.
+        max_bytes: maximum size of the files stored. The results used least recently are removed first. None for no
+            limit.
+        file_format: 'npy', 'feather' or None for 'feather' if pyarrow is installed and 'npy' otherwise.
+
+    Raises:
+        ValueError: if file_format is not valid, or it is 'feather' and pyarrow is not installed.
+    """
+    def __init__(self, directory, ttl=None, version=None, max_bytes=None, file_format=None):
+        if file_format is None:
+            file_format = 'feather' if importlib.util.find_spec('pyarrow') is not None else 'npy'
+        if file_format not in FORMATS:
+            raise ValueError("No valid file_format has been provided to the disk cache.")
+        if file_format == 'feather' and importlib.util.find_spec('pyarrow') is None:
+            raise ValueError("file_format='feather' needs pyarrow to be installed.")
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.ttl = ttl
+        self.version = version
+        self.max_bytes = max_bytes
+        self.file_format = file_format
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, statement, method='read_sql', version=None):
+        """
+        Args:
+            statement: sql statement of the query.
+            method: method used to read the result, as results differ slightly from one to another.
+            version: version of the result given for the statement, if any.
+
+        Returns:
+            the stored result, memory-mapped, or None if there is no valid entry.
+        """
+        path = self._path(statement, method, version)
+        df = None
+        try:
+            with open(os.path.join(path, _METADATA)) as file:
+                metadata = json.load(file)
+            if self.ttl is None or time.time() - metadata['created_at'] <= self.ttl:
+                df = _read_result(path, metadata)
+            else:
+                shutil.rmtree(path, ignore_errors=True)
+        except (OSError, ValueError, KeyError, ImportError):
+            # missing, expired, being replaced by another process, or stored as Feather by a process with pyarrow
+            df = None
+
+        with self._lock:
+            if df is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # the modification time of the directory tells which results have been used least recently
+        try:
+            os.utime(path)
+        except OSError:
+            # removed or replaced by another process, the mapped files stay readable
+            pass
+        return df
+
+    def put(self, statement, df, method='read_sql', version=None):
+        """
+        Stores the result of a query. The index of df is not kept, as results of queries have the default one.
+        Results that cannot be written, because some column has values that cannot be stored as text, see _TEXT_KINDS,
+        or the directory is removed meanwhile, are not stored and a warning is given instead.
+
+        Args:
+            statement: sql statement of the query.
+            df: result of the query.
+            method: method used to read the result.
+            version: version of the result given for the statement, if any.
+        """
+        path = self._path(statement, method, version)
+        # the result is written on a temporary directory first, so it is never read half written
+        temporary = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+        try:
+            os.makedirs(temporary)
+            metadata = _write_result(temporary, df, self.file_format)
+            metadata.update(statement=normalize_statement(statement), method=method, created_at=time.time(),
+                            version=[self.version, version])
+            with open(os.path.join(temporary, _METADATA), 'w') as file:
+                json.dump(metadata, file)
+            shutil.rmtree(path, ignore_errors=True)
+            try:
+                os.replace(temporary, path)
+            except OSError:
+                # another process stored it at the same time
+                if not os.path.isdir(path):
+                    raise
+        except (OSError, ValueError) as e:
+            # e.g. the directory has been removed by clear() from another process, or a column cannot be stored
+            warnings.warn("Result of the query not stored on disk. %s" % e)
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+        if self.max_bytes is not None:
+            self._evict()
+
+    def clear(self):
+        """
+        Removes all stored results.
+        """
+        for name in os.listdir(self.directory):
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def stats(self):
+        """
+        Returns:
+            dictionary with the number of hits, misses and evictions of this object, the hit ratio, and the number of
+            entries and bytes stored on the directory.
+        """
+        entries = self._entries()
+        with self._lock:
+            requests = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_ratio': self.hits / requests if requests else 0.0, 'entries': len(entries),
+                    'bytes': sum(size for _, _, size in entries)}
+
+    def _path(self, statement, method, version):
+        """
+        Returns:
+            directory of the result of a statement.
+        """
+        key = json.dumps([method, normalize_statement(statement), self.version, version], default=str)
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def _entries(self):
+        """
+        Returns:
+            list with the directory, modification time and size of each stored result.
+        """
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp') or not os.path.isdir(path):
+                continue
+            try:
+                entries.append((path, os.stat(path).st_mtime,
+                                sum(entry.stat().st_size for entry in os.scandir(path))))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self):
+        """
+        Removes the results used least recently until the size of the files stored is not above max_bytes.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+
+def _write_result(path, df, file_format):
+    """
+    Writes the columns of df on a directory.
+
+    Returns:
+        metadata needed to read them back.
+    """
+    names = [str(col) for col in df.columns]
+    if file_format == 'feather' and len(set(names)) == len(names):
+        df = df.reset_index(drop=True)
+        df.columns = names
+        df.to_feather(os.path.join(path, _FEATHER), compression='uncompressed')
+        return {'format': 'feather', 'columns': names}
+
+    columns = []
+    for i, name in enumerate(names):
+        series = df.iloc[:, i]
+        dtype = series.dtype
+        column = {'name': name, 'dtype': str(dtype), 'mapped': True}
+        file_name = os.path.join(path, '%d' % i)
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            # stored in UTC and converted back to its time zone
+            np.save(file_name + '.npy', series.dt.tz_convert(None).to_numpy(), allow_pickle=False)
+            column['tz'] = str(dtype.tz)
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            np.save(file_name + '.npy', series.to_numpy(), allow_pickle=False)
+        else:
+            _write_text_column(file_name, series.to_numpy(dtype=object), column)
+        columns.append(column)
+    return {'format': 'npy', 'columns': columns}
+
+
+def _read_result(path, metadata):
+    """
+    Reads the result stored on a directory, memory-mapped.
+
+    Returns:
+        dataframe with the result.
+    """
+    if metadata['format'] == 'feather':
+        feather = lazy_import('pyarrow.feather')
+        return feather.read_table(os.path.join(path, _FEATHER), memory_map=True).to_pandas(split_blocks=True)
+
+    arrays = {}
+    for i, column in enumerate(metadata['columns']):
+        file_name = os.path.join(path, '%d.npy' % i)
+        if column['mapped']:
+            # pages are copied on write, so the file is never changed. The view hands out a plain array on the map
+            values = pd.Series(np.load(file_name, mmap_mode='c').view(np.ndarray), copy=False)
+            if 'tz' in column:
+                values = values.dt.tz_localize('UTC').dt.tz_convert(column['tz'])
+        else:
+            values = pd.Series(_read_text_column(os.path.join(path, '%d' % i), column), copy=False)
+            if column['dtype'] != 'object':
+                values = values.astype(column['dtype'])
+        arrays[i] = values
+    df = pd.DataFrame(arrays, copy=False)
+    df.columns = [column['name'] for column in metadata['columns']]
+    return df
+
+
+def _write_text_column(path, values, column):
+    """
+    Writes a column that cannot be mapped as the UTF-8 text of its values, all of the same kind of _TEXT_KINDS, one
+    after the other, with the offsets where each one starts and a mask of nulls. Values are never pickled, so reading
+    them does not run code written by others on the directory.
+
+    Raises:
+        ValueError: if the values are not all of the same kind.
+    """
+    nulls = pd.isna(values)
+    present = values[~nulls]
+    kinds = {_KIND_OF_TYPE.get(type(value)) for value in present}
+    if len(kinds) > 1 or None in kinds:
+        raise ValueError("Column %r has values of types that cannot be stored on disk: %s." % (
+            column['name'], sorted({type(value).__name__ for value in present})))
+    kind = kinds.pop() if kinds else 'str'
+    to_text = _TEXT_KINDS[kind][1]
+    try:
+        encoded = [to_text(value).encode('utf-8') for value in present]
+    except (TypeError, ValueError) as e:
+        raise ValueError("Column %r has values that cannot be stored on disk: %s." % (column['name'], e))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+    np.save(path + '.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8), allow_pickle=False)
+    np.save(path + '.offsets.npy', offsets, allow_pickle=False)
+    np.save(path + '.nulls.npy', nulls, allow_pickle=False)
+    null = values[nulls][0] if nulls.any() else None
+    column.update(mapped=False, kind=kind,
+                  null='None' if null is None else 'NA' if null is pd.NA else 'NaT' if null is pd.NaT else 'nan')
+
+
+def _read_text_column(path, column):
+    """
+    Returns:
+        object array with the values of a column written by _write_text_column().
+    """
+    text = np.load(path + '.npy').tobytes()
+    offsets = np.load(path + '.offsets.npy').tolist()
+    nulls = np.load(path + '.nulls.npy')
+    from_text = _TEXT_KINDS[column['kind']][2]
+
+    null = {'None': None, 'NA': pd.NA, 'NaT': pd.NaT, 'nan': np.nan}[column['null']]
+    values = np.full(nulls.shape[0], null, dtype=object)
+    # assigned one by one, so lists read from JSON are not taken as sequences of values
+    for i, start, stop in zip(np.flatnonzero(~nulls).tolist(), offsets[:-1], offsets[1:]):
+        values[i] = from_text(text[start:stop].decode('utf-8'))
+    return values
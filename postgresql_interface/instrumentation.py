@@ -0,0 +1,282 @@
+import functools
+import inspect
+import threading
+import time
+import warnings
+from collections import defaultdict, deque
+
+from postgresql_interface.lazy_import import lazy_import
+from postgresql_interface.row_source import RowSource
+
+np = lazy_import('numpy')
+
+# phases of a call to a method of PostgresSQLConnector
+CONNECT, BUILD, EXECUTE, FETCH, CLOSE = 'connect', 'build', 'execute', 'fetch', 'close'
+
+_local = threading.local()
+# serializes the merge of the measurements of worker threads into the trace of the call that started them
+_merge_lock = threading.Lock()
+
+
+class Trace:
+    """
+    Measurements of a call to a method of PostgresSQLConnector, given to the observers.
+
+    Attributes:
+        method: name of the method called.
+        table_name: table written by the method, or None.
+        phases: dictionary with the seconds spent on each phase: 'connect' (opening or borrowing connections),
+            'build' (writing statements), 'execute' (running statements on the server, including sending data),
+            'fetch' (reading results into python objects) and 'close' (closing or giving back connections). With
+            pd.read_sql_query(), execution and fetch cannot be told apart, so both are measured as 'fetch'. Phases run
+            by worker threads, like the partitions of query_parallel() or the chunks of insert_table(parallel=...),
+            are added up, so they can sum to more than seconds. Work done on other processes, with workers, is not
+            measured.
+        rows: number of rows written or read, or None.
+        statement_bytes: size of the statements and data sent to the server.
+        seconds: total duration of the call.
+        error: exception raised by the call, or None.
+    """
+    __slots__ = ('method', 'table_name', 'phases', 'rows', 'statement_bytes', 'seconds', 'error', '_started_at')
+
+    def __init__(self, method, table_name=None):
+        self.method = method
+        self.table_name = table_name
+        self.phases = defaultdict(float)
+        self.rows = None
+        self.statement_bytes = 0
+        self.seconds = None
+        self.error = None
+        self._started_at = time.perf_counter()
+
+    def __repr__(self):
+        return 'Trace(method=%r, table_name=%r, seconds=%r, phases=%r, rows=%r, statement_bytes=%r)' % (
+            self.method, self.table_name, self.seconds, dict(self.phases), self.rows, self.statement_bytes)
+
+
+class Observer:
+    """
+    Base class of the objects that receive the measurements of the calls to the methods of a connector. Override
+    the hooks needed and register the object with PostgresSQLConnector.add_observer().
+    """
+    def before(self, trace):
+        """
+        Called before the method runs, with a trace that only has the method and table name.
+        """
+
+    def after(self, trace):
+        """
+        Called once the method has finished, successfully or not, with the complete trace.
+        """
+
+
+class TimingCollector(Observer):
+    """
+    Observer that keeps the durations of the last calls and gives their percentiles, per method and phase.
+
+    Args:
+        max_samples: number of calls kept per method. The oldest ones are discarded first.
+    """
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self.calls = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def after(self, trace):
+        with self._lock:
+            self.calls[trace.method] += 1
+            if trace.error is not None:
+                self.errors[trace.method] += 1
+            self._samples[trace.method].append(
+                (trace.seconds, dict(trace.phases), trace.rows or 0, trace.statement_bytes))
+
+    def percentiles(self, method, phase='total', q=(50, 90, 99)):
+        """
+        Args:
+            method: name of the method.
+            phase: 'total' for the whole call, or the name of a phase.
+            q: percentiles to compute, between 0 and 100.
+
+        Returns:
+            dictionary with the seconds at each percentile, or None values if method has not been called.
+        """
+        with self._lock:
+            samples = [seconds if phase == 'total' else phases.get(phase, 0.0)
+                       for seconds, phases, _, _ in self._samples.get(method, ())]
+        if not samples:
+            return {p: None for p in q}
+        return dict(zip(q, np.percentile(samples, q).tolist()))
+
+    def summary(self, q=(50, 90, 99)):
+        """
+        Returns:
+            dictionary with, per method called, the number of calls and errors, the rows and bytes of the calls kept,
+            and the percentiles of the total and of each phase.
+        """
+        with self._lock:
+            methods = list(self._samples)
+        result = {}
+        for method in methods:
+            with self._lock:
+                samples = list(self._samples[method])
+                calls, errors = self.calls[method], self.errors[method]
+            phases = sorted({phase for _, sample_phases, _, _ in samples for phase in sample_phases})
+            result[method] = {
+                'calls': calls, 'errors': errors,
+                'rows': sum(rows for _, _, rows, _ in samples),
+                'statement_bytes': sum(size for _, _, _, size in samples),
+                'seconds': self.percentiles(method, 'total', q),
+                'phases': {phase: self.percentiles(method, phase, q) for phase in phases}}
+        return result
+
+    def reset(self):
+        """
+        Discards all the samples.
+        """
+        with self._lock:
+            self._samples.clear()
+            self.calls.clear()
+            self.errors.clear()
+
+
+class _Phase:
+    """
+    Context manager that adds the time spent inside it to a phase of a trace.
+    """
+    __slots__ = ('trace', 'name', 'started_at')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.trace.phases[self.name] += time.perf_counter() - self.started_at
+
+
+class _NullPhase:
+    """
+    Context manager that does nothing, used when no call is being traced.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name):
+    """
+    Returns:
+        context manager that measures a phase of the call being traced on the current thread, if any.
+    """
+    trace = getattr(_local, 'trace', None)
+    return _NULL_PHASE if trace is None else _Phase(trace, name)
+
+
+def record(statement_bytes):
+    """
+    Adds the size of what has been sent to the server to the call being traced on the current thread, if any.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.statement_bytes += statement_bytes
+
+
+def count_rows(rows):
+    """
+    Adds rows to the call being traced on the current thread, if any. Used for inputs whose rows are only known once
+    they are consumed, like iterators of rows.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.rows = (trace.rows or 0) + rows
+
+
+def propagate(function):
+    """
+    Binds a function to be run on a worker thread to the call being traced on the current thread, if any: the time of
+    its phases and the size of what it sends are added to that trace, and the methods it calls are not traced apart.
+
+    Returns:
+        function wrapped, or function itself if no call is being traced.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        child = Trace(trace.method, table_name=trace.table_name)
+        _local.trace = child
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _local.trace = None
+            with _merge_lock:
+                for name, seconds in child.phases.items():
+                    trace.phases[name] += seconds
+                trace.statement_bytes += child.statement_bytes
+    return wrapper
+
+
+def traced(method):
+    """
+    Decorator for the methods of PostgresSQLConnector to be measured. When the object has no observer, or a call is
+    already being traced on the thread, the method is just called.
+
+    If the method has table_name and df arguments, they give the table name and rows of the trace, counted as
+    RowSource.count_rows() does. Otherwise rows are the ones of the dataframe returned, if any.
+    """
+    parameters = list(inspect.signature(method).parameters)
+    has_table = len(parameters) > 1 and parameters[1] == 'table_name'
+    has_df = has_table and len(parameters) > 2 and parameters[2] == 'df'
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        observers = self._observers
+        if not observers or getattr(_local, 'trace', None) is not None:
+            return method(self, *args, **kwargs)
+
+        table_name = (args[0] if args else kwargs.get('table_name')) if has_table else None
+        trace = Trace(method.__name__, table_name=table_name)
+        if has_df:
+            df = args[1] if len(args) > 1 else kwargs.get('df')
+            trace.rows = RowSource.count_rows(df)
+        _notify(observers, 'before', trace)
+
+        _local.trace = trace
+        try:
+            result = method(self, *args, **kwargs)
+            if not has_df and hasattr(result, 'shape'):
+                trace.rows = result.shape[0]
+            return result
+        except BaseException as e:
+            trace.error = e
+            raise
+        finally:
+            _local.trace = None
+            trace.seconds = time.perf_counter() - trace._started_at
+            _notify(observers, 'after', trace)
+    return wrapper
+
+
+def _notify(observers, hook, trace):
+    """
+    Calls a hook of every observer. A failing observer does not make the call fail, a warning is given instead.
+    """
+    for observer in observers:
+        try:
+            getattr(observer, hook)(trace)
+        except Exception as e:
+            warnings.warn('Observer %r failed on %s(): %r' % (observer, hook, e))
@@ -0,0 +1,67 @@
+import importlib
+import importlib.util
+import inspect
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that has not been imported yet, returned by lazy_import().
+
+    Args:
+        name: name of the module.
+        submodules: names of its submodules imported with it.
+        namespace: globals of the module that called lazy_import(), where the stand-in is replaced by the module.
+    """
+    def __init__(self, name, submodules, namespace):
+        super().__init__(name)
+        self.__dict__['_lazy_submodules'] = submodules
+        self.__dict__['_lazy_namespace'] = namespace
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        for submodule in self._lazy_submodules:
+            importlib.import_module('%s.%s' % (self.__name__, submodule))
+        # from now on the module itself is used, so the stand-in is not called again
+        namespace = self._lazy_namespace
+        for key, value in list(namespace.items()):
+            if value is self:
+                namespace[key] = module
+        return getattr(module, attr)
+
+
+def lazy_import(name, submodules=()):
+    """
+    Imports a module lazily: the module is imported the first time one of its attributes is used, and from then on
+    the global name it has been bound to in the calling module refers to the module itself, so using it costs the
+    same than if it had been imported. It allows the package to be imported, and execute() to be used, without paying
+    for pandas, numpy or psycopg2 until they are needed. Modules are imported with the import system, so it is safe
+    to use them from several threads.
+
+        pd = lazy_import('pandas')
+        psycopg2 = lazy_import('psycopg2', submodules=('extras',))
+
+    Args:
+        name: name of the module.
+        submodules: names of submodules to import with the module, as 'import psycopg2.extras' does.
+
+    Returns:
+        the module if it has already been imported, or a stand-in that imports it.
+
+    Raises:
+        ModuleNotFoundError: if the module is not installed.
+    """
+    if name in sys.modules and all('%s.%s' % (name, submodule) in sys.modules for submodule in submodules):
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError("No module named %r" % name, name=name)
+    return _LazyModule(name, tuple(submodules), inspect.currentframe().f_back.f_globals)
+
+
+def is_loaded(name):
+    """
+    Returns:
+        True if the module has been imported, e.g. to know if objects of its classes can exist without importing it.
+    """
+    return name in sys.modules
@@ -0,0 +1,300 @@
+import csv
+import datetime
+import io
+import re
+import threading
+import time
+from collections import namedtuple
+
+from postgresql_interface.parameterized_writer import ParameterizedWriter
+from postgresql_interface.query_cache import normalize_statement
+from postgresql_interface.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+psycopg2 = lazy_import('psycopg2', submodules=('extensions',))
+
+# kinds of the statements recorded
+EXECUTE, COPY_FROM, COPY_TO = 'execute', 'copy_from', 'copy_to'
+
+# same fields than psycopg2.extensions.Column, so description can be read by name or by position
+Column = namedtuple('Column', ['name', 'type_code', 'display_size', 'internal_size', 'precision', 'scale', 'null_ok'])
+
+_COPY_TO = re.compile(r'\bTO\s+STDOUT\b', re.IGNORECASE)
+_QUERY = re.compile(r'\s*\(*\s*(?:SELECT|WITH|VALUES|TABLE|SHOW)\b', re.IGNORECASE)
+_COPY_NULL = '\\N'
+
+
+class RecordedStatement:
+    """
+    Statement received by a MemoryConnection.
+
+    Attributes:
+        statement: text of the statement, with its parameters already bound.
+        kind: 'execute', 'copy_from' for COPY ... FROM STDIN or 'copy_to' for COPY ... TO STDOUT.
+        statement_bytes: size of the statement, encoded in utf-8.
+        data_bytes: size of the data sent with COPY ... FROM STDIN or received with COPY ... TO STDOUT.
+        rows: rows of the data of a COPY, or of the result of a query.
+        seconds: time spent on the call. For COPY ... FROM STDIN it includes rendering the data, which is done
+            lazily as the data is read.
+    """
+    __slots__ = ('statement', 'kind', 'statement_bytes', 'data_bytes', 'rows', 'seconds')
+
+    def __init__(self, statement, kind, statement_bytes, data_bytes, rows, seconds):
+        self.statement = statement
+        self.kind = kind
+        self.statement_bytes = statement_bytes
+        self.data_bytes = data_bytes
+        self.rows = rows
+        self.seconds = seconds
+
+    def __repr__(self):
+        return 'RecordedStatement(kind=%r, statement_bytes=%r, data_bytes=%r, rows=%r, seconds=%r, statement=%r)' % (
+            self.kind, self.statement_bytes, self.data_bytes, self.rows, self.seconds, self.statement[:80])
+
+
+class MemoryDatabase:
+    """
+    In-process stand-in for a PostgreSQL database. It records every statement its connections receive, and answers
+    queries with the results given with add_result(), or with no rows. Nothing is stored.
+
+    It is thread-safe, so it can be shared by the connections of a pool.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = []
+        self.statements = []
+        self.connections = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    def add_result(self, statement, df):
+        """
+        Sets the result returned by the statements that match statement.
+
+        Args:
+            statement: a string, which matches the statements that contain it once blanks and case are normalized,
+                so it also matches the statements query() wraps it into, or a compiled regular expression, which
+                matches the statements where it is found. When several strings match, the longest one is used.
+            df: dataframe returned.
+        """
+        with self._lock:
+            if isinstance(statement, str):
+                statement = normalize_statement(statement).lower()
+            self._results.append((statement, df))
+
+    def find_result(self, statement):
+        """
+        Returns:
+            the dataframe set for statement with add_result(), or None.
+        """
+        normalized = normalize_statement(statement).lower()
+        best, best_length = None, -1
+        with self._lock:
+            for key, df in self._results:
+                if isinstance(key, str):
+                    if key in normalized and len(key) > best_length:
+                        best, best_length = df, len(key)
+                elif best is None and key.search(statement):
+                    best = df
+        return best
+
+    def record(self, statement):
+        """
+        Adds a RecordedStatement to statements.
+        """
+        with self._lock:
+            self.statements.append(statement)
+
+    def reset(self):
+        """
+        Discards the statements recorded and the counters, but not the results.
+        """
+        with self._lock:
+            self.statements = []
+            self.connections = self.commits = self.rollbacks = 0
+
+    def summary(self):
+        """
+        Returns:
+            dictionary with the number of statements per kind, their bytes and seconds, and the number of
+            connections, commits and rollbacks.
+        """
+        with self._lock:
+            statements = list(self.statements)
+            result = {'connections': self.connections, 'commits': self.commits, 'rollbacks': self.rollbacks}
+        result.update(statements=len(statements),
+                      statement_bytes=sum(statement.statement_bytes for statement in statements),
+                      data_bytes=sum(statement.data_bytes for statement in statements),
+                      seconds=sum(statement.seconds for statement in statements),
+                      kinds={kind: sum(statement.kind == kind for statement in statements)
+                             for kind in (EXECUTE, COPY_FROM, COPY_TO)})
+        return result
+
+
+class MemoryConnection:
+    """
+    Stand-in for a psycopg2 connection to a MemoryDatabase, with the methods used by PostgresSQLConnector.
+    """
+    encoding = 'UTF8'
+
+    def __init__(self, database):
+        self.database = database
+        self.closed = 0
+        self._status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with database._lock:
+            database.connections += 1
+
+    def cursor(self, name=None):
+        return MemoryCursor(self, name=name)
+
+    def commit(self):
+        self._status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with self.database._lock:
+            self.database.commits += 1
+
+    def rollback(self):
+        self._status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with self.database._lock:
+            self.database.rollbacks += 1
+
+    def get_transaction_status(self):
+        return self._status
+
+    def close(self):
+        self.closed = 1
+
+
+class MemoryCursor:
+    """
+    Stand-in for a psycopg2 cursor of a MemoryConnection. Parameters are bound with the adapters of psycopg2, so
+    psycopg2.extras.execute_values() and execute_batch() can be used with it.
+    """
+    def __init__(self, connection, name=None):
+        self.connection = connection
+        self.name = name
+        self.itersize = 2000
+        self.description = None
+        self.rowcount = -1
+        self.query = None
+        self.closed = False
+        self._rows = []
+        self._position = 0
+
+    def mogrify(self, statement, parameters=None):
+        if isinstance(statement, bytes):
+            statement = statement.decode('utf-8')
+        if parameters is not None:
+            if isinstance(parameters, dict):
+                statement = statement % {key: _quote(value) for key, value in parameters.items()}
+            else:
+                statement = statement % tuple(_quote(value) for value in parameters)
+        return statement.encode('utf-8')
+
+    def execute(self, statement, parameters=None):
+        started_at = time.perf_counter()
+        self.query = self.mogrify(statement, parameters)
+        statement = self.query.decode('utf-8')
+        df = self.connection.database.find_result(statement)
+        if df is not None:
+            self.description = _describe(df)
+        else:
+            # queries without a result given return no rows and no columns
+            self.description = [] if _QUERY.match(statement) else None
+        self._rows = ParameterizedWriter.create_parameters(df) if df is not None else []
+        self._position = 0
+        self.rowcount = len(self._rows)
+        self.connection._status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        self._record(statement, EXECUTE, 0, self.rowcount, started_at, len(self.query))
+
+    def copy_expert(self, statement, file, size=8192):
+        started_at = time.perf_counter()
+        self.connection._status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        if _COPY_TO.search(statement):
+            df = self.connection.database.find_result(statement)
+            data = _to_csv(df) if df is not None else b''
+            file.write(data)
+            self._record(statement, COPY_TO, len(data), df.shape[0] if df is not None else 0, started_at)
+        else:
+            data_bytes, rows = 0, 0
+            chunk = file.read(size)
+            while chunk:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                data_bytes += len(data)
+                rows += data.count(b'\n')
+                chunk = file.read(size)
+            self._record(statement, COPY_FROM, data_bytes, rows, started_at)
+        self.description = None
+
+    def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def fetchmany(self, size=None):
+        size = self.itersize if size is None else size
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        self.closed = True
+
+    def _record(self, statement, kind, data_bytes, rows, started_at, statement_bytes=None):
+        if statement_bytes is None:
+            statement_bytes = len(statement.encode('utf-8'))
+        self.connection.database.record(RecordedStatement(
+            statement, kind, statement_bytes, data_bytes, rows, time.perf_counter() - started_at))
+
+
+def _quote(value):
+    """
+    Renders a parameter as a literal with the adapters of psycopg2.
+    """
+    adapted = psycopg2.extensions.adapt(value)
+    if hasattr(adapted, 'encoding'):
+        adapted.encoding = 'utf-8'
+    return adapted.getquoted().decode('utf-8')
+
+
+def _describe(df):
+    """
+    Returns:
+        cursor description of a result, with the type oids pd.read_sql_query() and CopyReader rely on.
+    """
+    return [Column(str(col), _type_code(df[col]), None, None, None, None, None) for col in df.columns]
+
+
+def _type_code(series):
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 16
+    if pd.api.types.is_integer_dtype(dtype):
+        return 20
+    if pd.api.types.is_float_dtype(dtype):
+        return 701
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return 1184
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return 1114
+    values = series.dropna()
+    if len(values) and all(isinstance(value, datetime.date) and not isinstance(value, datetime.datetime)
+                           for value in values):
+        return 1082
+    return 25
+
+
+def _to_csv(df):
+    """
+    Returns:
+        df as written by COPY ... TO STDOUT WITH (FORMAT csv, NULL '\\N'), encoded in utf-8.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in ParameterizedWriter.create_parameters(df):
+        writer.writerow([_COPY_NULL if value is None else ('t' if value else 'f') if isinstance(value, bool)
+                         else value for value in row])
+    return buffer.getvalue().encode('utf-8')
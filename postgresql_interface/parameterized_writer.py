@@ -0,0 +1,151 @@
+from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+
+class ParameterizedWriter:
+    """
+    Trait that writes parameterized sql statements and their parameters given an input dataframe.
+
+    Values are never written into the statements, they are sent apart and adapted by psycopg2. Because of that,
+    only column names go through the SQL Injection check.
+
+    Current valid methods are:
+    - INSERT INTO ... VALUES %s, for psycopg2.extras.execute_values()
+    - PREPARE ... AS UPDATE
+    - PREPARE ... AS DELETE FROM
+    - EXECUTE, for psycopg2.extras.execute_batch()
+    """
+    @staticmethod
+    def create_insert_statement(table_name, columns, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to insert rows into a table with psycopg2.extras.execute_values().
+
+            INSERT INTO table_name (columns[0], columns[1], ... columns[n]) VALUES %s
+
+        - Args:
+            table_name: name of the table where data is going to be inserted, it must include the schema
+            columns: list of column names in the same order than the parameters
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the INSERT INTO sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on a column name
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return 'INSERT INTO %s (%s) VALUES %%s' % (table_name, ', '.join(columns))
+
+    @staticmethod
+    def create_prepare_update_statement(statement_name, table_name, columns, where_identifier,
+                                        sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to prepare an UPDATE of one row taking into account the where_identifier.
+        Parameters are the values of columns, in the same order.
+
+            WITH to_update = [col for col in columns if col not in where_identifier]
+                PREPARE statement_name AS UPDATE table_name
+                    SET to_update[0] = $i, ... to_update[n] = $j
+                    WHERE where_identifier[0] = $k AND ... where_identifier[n] = $l
+
+        - Args:
+            statement_name: name of the prepared statement
+            table_name: name of the table to update included schema
+            columns: list of columns of the parameters
+            where_identifier: list of columns to list on the where clause
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the PREPARE sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on a column name
+            KeyError: if a column of where_identifier is not on columns
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        positions = {col.upper(): i + 1 for i, col in enumerate(columns)}
+        where_identifier_upper = [col.upper() for col in where_identifier]
+        for col in where_identifier_upper:
+            if col not in positions:
+                raise KeyError(col)
+
+        to_update = [col for col in columns if col.upper() not in where_identifier_upper]
+        return 'PREPARE %s AS UPDATE %s SET %s WHERE %s' % (
+            statement_name, table_name,
+            ', '.join(['%s = $%d' % (col, positions[col.upper()]) for col in to_update]),
+            ' AND '.join(['%s = $%d' % (col, positions[col]) for col in where_identifier_upper]))
+
+    @staticmethod
+    def create_prepare_delete_statement(statement_name, table_name, columns, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to prepare a DELETE of the rows matching the values of all columns.
+        Parameters are the values of columns, in the same order.
+
+            PREPARE statement_name AS DELETE FROM table_name WHERE columns[0] = $1 AND ... columns[n] = $n
+
+        - Args:
+            statement_name: name of the prepared statement
+            table_name: name of the table to delete from included schema
+            columns: list of columns of the parameters
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the PREPARE sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on a column name
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return 'PREPARE %s AS DELETE FROM %s WHERE %s' % (
+            statement_name, table_name, ' AND '.join(['%s = $%d' % (col, i + 1) for i, col in enumerate(columns)]))
+
+    @staticmethod
+    def create_execute_statement(statement_name, n_parameters):
+        """
+        This method returns a sql statement to execute a prepared statement with psycopg2.extras.execute_batch().
+
+            EXECUTE statement_name (%s, ... %s)
+
+        - Args:
+            statement_name: name of the prepared statement
+            n_parameters: number of parameters of the prepared statement
+
+        - Returns:
+            String containing the EXECUTE sql statement
+        """
+        return 'EXECUTE %s (%s)' % (statement_name, ', '.join(['%s'] * n_parameters))
+
+    @staticmethod
+    def create_parameters(df):
+        """
+        This method returns the rows of df as tuples of python objects that psycopg2 can adapt. Nulls are None and
+        numpy scalars are converted to their python counterpart.
+
+        - Args:
+            df: dataframe of values
+
+        - Returns:
+            List with a tuple per row of df
+        """
+        return list(zip(*[_column_parameters(df.iloc[:, i]) for i in range(df.shape[1])]))
+
+
+def _column_parameters(series):
+    """
+    Converts a column to a list of python objects that psycopg2 can adapt.
+
+    Args:
+        series: column of the dataframe to convert.
+
+    Returns:
+        list with a value per row.
+    """
+    values = series.tolist()
+    if series.dtype == object:
+        values = [value.item() if isinstance(value, np.generic) else value for value in values]
+    nulls = series.isna().to_numpy()
+    for i in np.flatnonzero(nulls):
+        values[i] = None
+    return values
@@ -0,0 +1,143 @@
+import datetime
+import decimal
+import re
+
+from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.lazy_import import lazy_import
+
+psycopg2 = lazy_import('psycopg2', submodules=('extensions',))
+
+# a table name, with or without schema, as opposed to a sql statement
+_TABLE_NAME = re.compile(r'^\s*(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?\s*$')
+
+
+class PartitionedReader:
+    """
+    Trait that writes the statements to read the result of a query in partitions, each one with the rows whose
+    partition column falls in a range of values, so that they can be read concurrently.
+
+    Partitions follow the bounds given or found, but together they always cover every row: the first partition has
+    no lower limit and also has the rows where the partition column is NULL, and the last one has no upper limit.
+    """
+    @staticmethod
+    def create_source_statement(table_or_statement):
+        """
+        This method returns the query whose result is partitioned.
+
+            SELECT * FROM table_or_statement  # if it is a table name
+            table_or_statement  # otherwise, without its ending semicolon
+
+        - Args:
+            table_or_statement: name of a table, included schema, or a query that can be used as a subquery
+
+        - Returns:
+            String containing the SELECT sql statement
+        """
+        if _TABLE_NAME.match(table_or_statement):
+            return 'SELECT * FROM %s' % table_or_statement.strip()
+        return table_or_statement.strip().rstrip(';').rstrip()
+
+    @staticmethod
+    def create_bounds_statement(source, partition_column, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to find the minimum and maximum values of the partition column.
+
+            SELECT MIN(partition_column), MAX(partition_column) FROM (source) AS pgi_query
+
+        - Args:
+            source: query whose result is partitioned
+            partition_column: column of source used to partition its result
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the SELECT sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on partition_column
+        """
+        SQLInjectionBodyguard.check_column_names([partition_column], enabled=sql_injection_check_enabled)
+        return 'SELECT MIN(%s), MAX(%s) FROM (%s) AS pgi_query' % (partition_column, partition_column, source)
+
+    @staticmethod
+    def create_partition_bounds(lower_bound, upper_bound, num_partitions):
+        """
+        This method splits the range between lower_bound and upper_bound in num_partitions ranges of the same width.
+        Integers are split on integers, and dates on whole days, so fewer partitions are made if the range is too
+        narrow.
+
+        - Args:
+            lower_bound: lowest value of the partition column. A number, date or timestamp
+            upper_bound: highest value of the partition column, of the same type than lower_bound
+            num_partitions: number of ranges wanted
+
+        - Returns:
+            Sorted list of the values that separate a range from the next one, between lower_bound and upper_bound
+
+        - Raises:
+            ValueError: if bounds are not numbers, dates or timestamps
+        """
+        if not isinstance(lower_bound, (int, float, decimal.Decimal, datetime.date)) or isinstance(lower_bound, bool):
+            raise ValueError("partition_column must be a number, a date or a timestamp to be partitioned, got %r."
+                             % (lower_bound,))
+        if num_partitions < 2 or not upper_bound > lower_bound:
+            return []
+
+        if isinstance(lower_bound, int):
+            width = -(-(upper_bound - lower_bound + 1) // num_partitions)
+        elif isinstance(lower_bound, datetime.datetime):
+            width = (upper_bound - lower_bound) / num_partitions
+        elif isinstance(lower_bound, datetime.date):
+            width = datetime.timedelta(days=-(-(upper_bound - lower_bound).days // num_partitions))
+        else:
+            width = (upper_bound - lower_bound) / num_partitions
+
+        bounds = []
+        for i in range(1, num_partitions):
+            bound = lower_bound + width * i
+            if bound > upper_bound:
+                break
+            if not bounds or bound > bounds[-1]:
+                bounds.append(bound)
+        return bounds
+
+    @staticmethod
+    def create_partition_statements(source, partition_column, bounds, sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement for each partition, with bounds as separations.
+
+            SELECT * FROM (source) AS pgi_query WHERE partition_column < bounds[0] OR partition_column IS NULL
+            SELECT * FROM (source) AS pgi_query WHERE partition_column >= bounds[0] AND partition_column < bounds[1]
+            .
+            .
+            .
+            SELECT * FROM (source) AS pgi_query WHERE partition_column >= bounds[n]
+
+        - Args:
+            source: query whose result is partitioned
+            partition_column: column of source used to partition its result
+            bounds: sorted list of values that separate a partition from the next one
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            List with len(bounds) + 1 SELECT sql statements. Just source if bounds is empty
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected on partition_column
+        """
+        SQLInjectionBodyguard.check_column_names([partition_column], enabled=sql_injection_check_enabled)
+        if not bounds:
+            return [source]
+
+        literals = [_quote(bound) for bound in bounds]
+        conditions = ['%s < %s OR %s IS NULL' % (partition_column, literals[0], partition_column)]
+        conditions += ['%s >= %s AND %s < %s' % (partition_column, lower, partition_column, upper)
+                       for lower, upper in zip(literals, literals[1:])]
+        conditions.append('%s >= %s' % (partition_column, literals[-1]))
+        return ['SELECT * FROM (%s) AS pgi_query WHERE %s' % (source, condition) for condition in conditions]
+
+
+def _quote(value):
+    """
+    Renders a bound as a sql literal with the adapters of psycopg2.
+    """
+    return psycopg2.extensions.adapt(value).getquoted().decode('utf-8')
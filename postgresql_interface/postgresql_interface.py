@@ -1,135 +1,1245 @@
-import psycopg2
-import pandas as pd
 from abc import ABCMeta, abstractmethod
 from postgresql_interface.sql_writer import SQLWriter
+from postgresql_interface.copy_writer import CopyWriter
+from postgresql_interface.binary_copy_writer import BinaryCopyWriter
+from postgresql_interface.copy_reader import CopyReader
+from postgresql_interface.record_reader import RecordReader, OUTPUTS
+from postgresql_interface.parameterized_writer import ParameterizedWriter
+from postgresql_interface.partitioned_reader import PartitionedReader
+from postgresql_interface.process_pool_writer import ProcessPoolWriter
+from postgresql_interface.row_source import RowSource, STREAM_CHUNK_SIZE
+from postgresql_interface.connection_pool import ConnectionPool
+from postgresql_interface.batching import AdaptiveBatchSizer
+from postgresql_interface.query_cache import QueryCache
+from postgresql_interface.disk_cache import DiskCache
+from postgresql_interface.memory_connection import MemoryConnection, MemoryDatabase
+from postgresql_interface.custom_errors import ErrorParallelInsert
+from postgresql_interface import instrumentation
+from postgresql_interface.instrumentation import CONNECT, BUILD, EXECUTE, FETCH, CLOSE
+from postgresql_interface.lazy_import import lazy_import
 import warnings
+import time
+import uuid
+import io
+import functools
+import contextlib
+import threading
+import concurrent.futures
+import collections.abc
+
+psycopg2 = lazy_import('psycopg2', submodules=('extras',))
+pd = lazy_import('pandas')
+
+# number of characters read at a time from the data stream of a COPY FROM STDIN
+COPY_READ_SIZE = 1 << 16
+# rows sent per round trip by the parameterized methods
+PARAMETERS_PAGE_SIZE = 1000
+
+
+def _invalidates_cache(method):
+    """
+    Decorator for the methods that write into the table given as their first argument. Once they finish, the cached
+    results that reference the table are invalidated, whether the write succeeded or not.
+    """
+    @functools.wraps(method)
+    def wrapper(self, table_name, *args, **kwargs):
+        try:
+            return method(self, table_name, *args, **kwargs)
+        finally:
+            self._invalidate_cache(table_name=table_name)
+    return wrapper
+
+
+def _iter_slices(df, next_size):
+    """
+    Generator that splits df in consecutive slices of rows, each of them of the size returned by next_size() when
+    it is taken.
+    """
+    start = 0
+    while start < df.shape[0]:
+        batch = df.iloc[start:start + next_size()]
+        start += batch.shape[0]
+        yield batch
+
+
+class _Session:
+    """
+    State of a session opened with PostgresSQLConnector.session() on a thread.
+
+    Args:
+        conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        # tables and statements written, to invalidate the cache again once the transaction is over
+        self.writes = []
 
 
 class PostgresSQLConnector(metaclass=ABCMeta):
     """
     Abstract Class to use as base for an API to interact with PostgreSQL databases at different platforms.
 
-    To use it, you will need to overwrite the create_connection() method on your child class.
-    """
-    @staticmethod
-    def close_connection(cursor, conn):
+    To use it, you will need to overwrite the create_connection() method on your child class.
+
+    By default every method opens and closes its own connection. Call open_pool() to keep a pool of connections
+    that methods borrow and give back transparently, and close() to release it.
+
+    Results of query() can be cached in memory by calling enable_cache(), and on local disk, across processes, by
+    calling enable_disk_cache().
+
+    Several calls can share a connection and a transaction with session().
+
+    The time spent on each phase of a call can be measured by adding an observer with add_observer().
+    """
+    _pool = None
+    _cache = None
+    _disk_cache = None
+    _observers = ()
+
+    @staticmethod
+    def close_connection(cursor, conn):
+        """
+        Method to close a database connection to a PostgreSQL database.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    @abstractmethod
+    def create_connection(self):
+        """
+        Method to create a database connection to a PostgreSQL database
+
+        Raises:
+            NotImplementedError: Must be overridden on children class
+        """
+        NotImplementedError("Must be overridden on children class")
+
+    class SQLWriter(SQLWriter):
+        pass
+
+    class CopyWriter(CopyWriter):
+        pass
+
+    class BinaryCopyWriter(BinaryCopyWriter):
+        pass
+
+    class CopyReader(CopyReader):
+        pass
+
+    class RecordReader(RecordReader):
+        pass
+
+    class ParameterizedWriter(ParameterizedWriter):
+        pass
+
+    class PartitionedReader(PartitionedReader):
+        pass
+
+    class ProcessPoolWriter(ProcessPoolWriter):
+        pass
+
+    class RowSource(RowSource):
+        pass
+
+    def open_pool(self, min_size=1, max_size=10, max_idle_time=300, max_lifetime=3600, health_check=True,
+                  timeout=30):
+        """
+        Opens a thread-safe pool of connections owned by the object. From then on, every method borrows a connection
+        from the pool and gives it back when finished, instead of opening and closing a new one.
+
+        Args:
+            min_size: number of connections opened straight away and kept open even when idle.
+            max_size: maximum number of connections that can be open at the same time.
+            max_idle_time: seconds a connection above min_size can remain idle before being closed. None to disable.
+            max_lifetime: seconds after which a connection is closed instead of being reused. None to disable.
+            health_check: if True, connections are checked with a "SELECT 1" before being borrowed.
+            timeout: seconds to wait for a free connection when all of them are in use. None to wait forever.
+
+        Returns:
+            the ConnectionPool created.
+
+        Raises:
+            Exception: if a pool is already open.
+        """
+        if self._pool is not None:
+            raise Exception('A connection pool is already open. Call close() before opening a new one.')
+        self._pool = ConnectionPool(
+            self._create_pooled_connection, min_size=min_size, max_size=max_size, max_idle_time=max_idle_time,
+            max_lifetime=max_lifetime, health_check=health_check, timeout=timeout)
+        return self._pool
+
+    def enable_cache(self, ttl=300, max_bytes=256 * 1024 * 1024, max_entries=None):
+        """
+        Starts caching the results of query() in memory. Cached results are invalidated when the tables they reference
+        are written through this object: execute(), copy_from(), insert_table(), update_table(), delete_from_table()
+        and merge_table(). Writes done by other means are not noticed, so ttl must be set accordingly.
+
+        Args:
+            ttl: seconds a result is valid. None for results to be valid until evicted or invalidated.
+            max_bytes: maximum memory used by the cached results. The least recently used ones are evicted first.
+            max_entries: maximum number of cached results. None for no limit.
+
+        Returns:
+            the QueryCache created, which has the hit and miss statistics.
+        """
+        self._cache = QueryCache(ttl=ttl, max_bytes=max_bytes, max_entries=max_entries)
+        return self._cache
+
+    def disable_cache(self):
+        """
+        Stops caching the results of query() and drops the results cached.
+        """
+        self._cache = None
+
+    def enable_disk_cache(self, directory, ttl=None, version=None, max_bytes=None, file_format=None):
+        """
+        Allows query() to store results on local disk with persist, so they are reused by later processes. Results are
+        stored in a columnar binary format and reloaded memory-mapped, see DiskCache. They are not invalidated by
+        writes, so they must be expired with ttl or by changing their version.
+
+        Args:
+            directory: directory where results are stored.
+            ttl: seconds a result is valid. None for results to be valid until their version changes.
+            version: version of all the results, e.g. the version of the schema of the database.
+            max_bytes: maximum size of the files stored. The results used least recently are removed first.
+            file_format: 'npy', 'feather' or None for 'feather' if pyarrow is installed and 'npy' otherwise.
+
+        Returns:
+            the DiskCache created, which has the hit and miss statistics.
+
+        Raises:
+            ValueError: if file_format is not valid.
+        """
+        self._disk_cache = DiskCache(directory, ttl=ttl, version=version, max_bytes=max_bytes,
+                                     file_format=file_format)
+        return self._disk_cache
+
+    def disable_disk_cache(self):
+        """
+        Stops reading and storing results on disk. Stored results are kept, DiskCache.clear() removes them.
+        """
+        self._disk_cache = None
+
+    @contextlib.contextmanager
+    def session(self):
+        """
+        Context manager to run several methods on a single connection and in a single transaction. Inside it, every
+        method called on the object from the same thread uses the connection of the session and nothing is
+        committed. On exit the transaction is committed once, or rolled back if an exception has been raised, and the
+        connection is closed or given back to the pool. A session opened inside another one just joins it.
+
+            with db_conn.session():
+                db_conn.delete_from_table('test.simple', to_delete)
+                db_conn.insert_table('test.simple', to_insert)
+
+        As there is a single transaction, commit_per_batch has no effect inside a session, and the cache enabled with
+        enable_cache() is not used by query().
+
+        Yields:
+            the object itself.
+
+        Raises:
+            psycopg2.Error: in case of a problem committing the transaction.
+        """
+        local = self.__dict__.setdefault('_local', threading.local())
+        if getattr(local, 'session', None) is not None:
+            yield self
+            return
+
+        cursor, conn = self._acquire_connection()
+        session = local.session = _Session(conn)
+        error = None
+        try:
+            yield self
+            conn.commit()
+        except psycopg2.Error as e:
+            error = e
+            self._rollback(conn)
+        except BaseException:
+            self._rollback(conn)
+            raise
+        finally:
+            local.session = None
+            self._release_connection(cursor, conn)
+            for table_name, statement in session.writes:
+                self._invalidate_cache(table_name=table_name, statement=statement)
+            if error:
+                raise Exception(error)
+
+    transaction = session
+
+    def _current_session(self):
+        """
+        Returns:
+            the session opened on the current thread, or None.
+        """
+        local = self.__dict__.get('_local')
+        return getattr(local, 'session', None) if local is not None else None
+
+    def _commit(self, conn):
+        """
+        Commits the transaction of conn, unless it is the connection of a session, which commits on exit.
+
+        Args:
+            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        session = self._current_session()
+        if session is None or session.conn is not conn:
+            conn.commit()
+
+    @staticmethod
+    def _rollback(conn):
+        """
+        Rolls back the transaction of conn. If the connection is broken there is nothing to roll back.
+
+        Args:
+            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+
+    def _invalidate_cache(self, table_name=None, statement=None):
+        """
+        Invalidates the cached results that reference a table, or the tables written by a statement. Inside a session
+        this is done again when the session ends, so results read before the commit are not kept.
+
+        Args:
+            table_name: name of the table written.
+            statement: sql statement executed, when table_name is None.
+        """
+        cache = self._cache
+        if cache is None:
+            return
+        session = self._current_session()
+        if session is not None:
+            session.writes.append((table_name, statement))
+        if table_name is not None:
+            cache.invalidate(table_name)
+        else:
+            cache.invalidate_statement(statement)
+
+    def add_observer(self, observer):
+        """
+        Registers an observer of the calls to query(), execute(), copy_from(), insert_table(), update_table(),
+        delete_from_table() and merge_table(). Its before() and after() hooks receive an instrumentation.Trace with
+        the table name, rows, statement bytes and the seconds spent on each phase of the call: connect, build,
+        execute, fetch and close. Calls made while another one is running on the same thread, like the execute() of
+        insert_table(), are measured as part of it.
+
+        Args:
+            observer: instrumentation.Observer, like instrumentation.TimingCollector which gives percentiles.
+
+        Returns:
+            the observer.
+        """
+        self._observers = self._observers + (observer,)
+        return observer
+
+    def remove_observer(self, observer):
+        """
+        Unregisters an observer added with add_observer().
+        """
+        self._observers = tuple(registered for registered in self._observers if registered is not observer)
+
+    def close(self):
+        """
+        Closes the connection pool, if any. Connections in use are closed as soon as they are given back.
+        """
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _create_pooled_connection(self):
+        """
+        Connection factory given to ConnectionPool. It relies on create_connection() so every vendor is supported.
+
+        Returns:
+            handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        cursor, conn = self.create_connection()
+        cursor.close()
+        return conn
+
+    def _acquire_connection(self):
+        """
+        Gets a connection to work with: the one of the session opened on the current thread, borrowed from the pool
+        if there is one, or newly created otherwise.
+
+        Returns:
+            cursor and connection, as create_connection().
+        """
+        with instrumentation.phase(CONNECT):
+            session = self._current_session()
+            if session is not None:
+                return session.conn.cursor(), session.conn
+
+            pool = self._pool
+            if pool is None:
+                return self.create_connection()
+
+            conn = pool.getconn()
+            try:
+                cursor = conn.cursor()
+            except psycopg2.Error as e:
+                pool.putconn(conn, discard=True)
+                raise Exception(e)
+            return cursor, conn
+
+    def _release_connection(self, cursor, conn):
+        """
+        Counterpart of _acquire_connection(). Gives the connection back to its pool or closes it. The connection of a
+        session is kept open, only the cursor is closed.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+        """
+        with instrumentation.phase(CLOSE):
+            session = self._current_session()
+            pool = self._pool
+            if session is not None and session.conn is conn:
+                if cursor and not cursor.closed:
+                    cursor.close()
+            elif pool is None or conn is None:
+                self.close_connection(cursor, conn)
+            else:
+                if cursor and not cursor.closed:
+                    cursor.close()
+                pool.putconn(conn)
+
+    @instrumentation.traced
+    def query(self, statement, method='read_sql', use_cache=True, output='dataframe', persist=False):
+        """
+        Retrieves data from a sql statement as a Pandas dataframe, or as the rows fetched from the cursor.
+        It handles transactions with databases. It handles full connection life with the database and ensures that
+        connection is closed at the end no matter if the query was successful or unsuccessful.
+
+        With method='copy' the result is written by the database with COPY (statement) TO STDOUT WITH CSV and parsed
+        with the CSV reader of pandas, which is several times faster for big results. Column types are taken from the
+        query, and text values equal to \\N are read as nulls. The statement must be a query that can be used as a
+        subquery.
+
+        With output other than 'dataframe' the rows are fetched from the cursor and converted without pandas, which
+        is much cheaper for small results, see RecordReader: 'tuples' for a list of tuples, 'dicts' for a list of
+        dictionaries, 'numpy' for a numpy structured array and 'columns' for a dictionary of numpy arrays. The cache is
+        only used for dataframes.
+
+        With persist the result is read from the disk cache enabled with enable_disk_cache(), memory-mapped, or stored
+        on it after being read from the database. The cache in memory is not used then.
+
+        Args:
+            statement: sql statement to evaluate at database. Must be a str.
+            method: 'read_sql' or 'copy'. Only 'read_sql' with output other than 'dataframe'.
+            use_cache: if False, the cache enabled with enable_cache() is neither read nor written. It is not used
+                inside a session either.
+            output: 'dataframe', 'tuples', 'dicts', 'numpy' or 'columns'.
+            persist: True, or the version of the result, e.g. the date of the data, to use the disk cache. It is not
+                used inside a session.
+
+        Returns:
+            dataframe resulting from query to database, or its rows in the structure given by output.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if method or output are not valid, or persist is used without enable_disk_cache() or with
+                output other than 'dataframe'.
+        """
+        if method not in ('read_sql', 'copy'):
+            raise ValueError("No valid method has been provided to query.")
+        if persist is not False and self._disk_cache is None:
+            raise ValueError("persist can only be used after enable_disk_cache().")
+        if persist is not False and output != 'dataframe':
+            raise ValueError("persist can only be used with output='dataframe'.")
+        if output != 'dataframe':
+            if output not in OUTPUTS:
+                raise ValueError("No valid output has been provided to query.")
+            if method != 'read_sql':
+                raise ValueError("output=%r can only be used with method='read_sql'." % output)
+            return self._query_rows(statement, output)
+
+        disk_cache = self._disk_cache if persist is not False and self._current_session() is None else None
+        version = None if persist is True else persist
+        if disk_cache is not None:
+            df = disk_cache.get(statement, method=method, version=version)
+            if df is not None:
+                return df
+
+        cache = self._cache if use_cache and disk_cache is None and self._current_session() is None else None
+        if cache is not None:
+            df = cache.get(statement, method=method)
+            if df is not None:
+                return df
+            generation = cache.generation
+
+        conn, cursor, error = None, None, None
+        df = pd.DataFrame()
+        try:
+            cursor, conn = self._acquire_connection()
+            if method == 'copy':
+                with instrumentation.phase(EXECUTE):
+                    cursor.execute(self.CopyReader.create_describe_statement(statement))
+                    description = cursor.description
+                    buffer = io.BytesIO()
+                    cursor.copy_expert(
+                        self.CopyReader.create_copy_to_statement(statement), buffer, size=COPY_READ_SIZE)
+                    buffer.seek(0)
+                with instrumentation.phase(FETCH):
+                    df = self.CopyReader.read_copy_buffer(
+                        buffer, description, encoding=psycopg2.extensions.encodings[conn.encoding])
+            else:
+                with instrumentation.phase(FETCH):
+                    df = pd.read_sql_query(statement, conn)
+
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+
+        if cache is not None:
+            cache.put(statement, df, generation, method=method)
+        if disk_cache is not None:
+            disk_cache.put(statement, df, method=method, version=version)
+        return df
+
+    def _query_rows(self, statement, output):
+        """
+        Retrieves data from a sql statement as the rows fetched from the cursor, converted to output without pandas.
+        See query() for the arguments.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        conn, cursor, error, rows = None, None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            with instrumentation.phase(EXECUTE):
+                cursor.execute(statement)
+            with instrumentation.phase(FETCH):
+                description = cursor.description or []
+                rows = self.RecordReader.read_rows(cursor.fetchall() if description else [], description, output)
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+        return rows
+
+    @instrumentation.traced
+    def query_parallel(self, table_or_statement, partition_column, num_partitions, lower_bound=None,
+                       upper_bound=None, method='read_sql', stream=False, use_cache=True,
+                       sql_injection_check_enabled=True):
+        """
+        Retrieves data from a table or a sql statement as a Pandas dataframe, reading it in partitions concurrently,
+        each over its own connection, so the work is spread over several server processes.
+
+        The range of values of partition_column, found with MIN() and MAX() unless given, is split in num_partitions
+        ranges of the same width, and the rows of each range are read by a sub-query:
+
+            SELECT * FROM (statement) AS pgi_query WHERE partition_column >= lower AND partition_column < upper
+
+        The first partition also has the rows below lower_bound or where partition_column is NULL, and the last one
+        the rows above upper_bound, so every row is read. Partitions are as balanced as the values of partition_column
+        are evenly distributed. Connections are borrowed from the pool opened with open_pool(), if any, so its
+        max_size must allow num_partitions connections.
+
+        Args:
+            table_or_statement: name of a table, it must include the table schema, or a sql statement that can be
+                used as a subquery.
+            partition_column: column of the result used to partition it. Must be a number, a date or a timestamp.
+            num_partitions: number of partitions, and of concurrent connections.
+            lower_bound: lowest value of partition_column to split from. Found on the database if None.
+            upper_bound: highest value of partition_column to split to. Found on the database if None.
+            method: 'read_sql' or 'copy', used to read each partition. See query().
+            stream: if True, a generator that yields the dataframe of each partition as soon as it is read is
+                returned instead, in no particular order.
+            use_cache: if False, the cache enabled with enable_cache() is not used for the partitions.
+            sql_injection_check_enabled: allows to disable SQL Injection check on partition_column.
+
+        Returns:
+            dataframe resulting from concatenating the partitions in order, or a generator of dataframes if stream.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if method or num_partitions are not valid, partition_column cannot be split, or it is called
+                inside a session.
+        """
+        if method not in ('read_sql', 'copy'):
+            raise ValueError("No valid method has been provided to query.")
+        if not isinstance(num_partitions, int) or num_partitions < 1:
+            raise ValueError("num_partitions must be a positive integer.")
+        if self._current_session() is not None:
+            raise ValueError("query_parallel cannot be used inside a session, as partitions use their own connections.")
+
+        source = self.PartitionedReader.create_source_statement(table_or_statement)
+        if num_partitions > 1 and (lower_bound is None or upper_bound is None):
+            found_lower, found_upper = self._query_bounds(source, partition_column, sql_injection_check_enabled)
+            lower_bound = found_lower if lower_bound is None else lower_bound
+            upper_bound = found_upper if upper_bound is None else upper_bound
+
+        bounds = []
+        if lower_bound is not None and upper_bound is not None:
+            bounds = self.PartitionedReader.create_partition_bounds(lower_bound, upper_bound, num_partitions)
+        statements = self.PartitionedReader.create_partition_statements(
+            source, partition_column, bounds, sql_injection_check_enabled=sql_injection_check_enabled)
+
+        partitions = self._read_partitions(statements, method, use_cache)
+        if stream:
+            return (df for _, df in partitions)
+        frames = dict(partitions)
+        return pd.concat([frames[number] for number in range(len(statements))], ignore_index=True)
+
+    def _query_bounds(self, source, partition_column, sql_injection_check_enabled):
+        """
+        Returns:
+            tuple with the minimum and maximum values of partition_column in the result of source, which are None if
+            it has no rows.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        statement = self.PartitionedReader.create_bounds_statement(
+            source, partition_column, sql_injection_check_enabled=sql_injection_check_enabled)
+        conn, cursor, error, bounds = None, None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            with instrumentation.phase(EXECUTE):
+                cursor.execute(statement)
+                bounds = cursor.fetchone()
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+        return tuple(bounds) if bounds else (None, None)
+
+    def _read_partitions(self, statements, method, use_cache):
+        """
+        Generator that runs query() with every statement concurrently, each on its own thread, and yields a tuple with
+        the position of the statement and its result as soon as each one finishes. Partitions not started yet are
+        cancelled if one fails or the generator is closed.
+        """
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(statements), thread_name_prefix='pgi_query')
+        futures = {}
+        try:
+            query = instrumentation.propagate(self.query)
+            for number, statement in enumerate(statements):
+                futures[pool.submit(query, statement, method, use_cache)] = number
+            for future in concurrent.futures.as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def query_iter(self, statement, chunk_size=10000, output='dataframe'):
+        """
+        Retrieves data from a sql statement in chunks of rows, so results bigger than memory can be processed.
+        Rows are fetched through a named (server-side) cursor, so no more than chunk_size rows are held in memory at
+        a time. It handles full connection life with the database and ensures that connection is closed once all
+        rows have been read, an error is raised, or the generator is closed before the end.
+
+        Args:
+            statement: sql statement to evaluate at database. Must be a str.
+            chunk_size: maximum number of rows of each chunk.
+            output: 'dataframe' to yield Pandas dataframes, 'tuples' to yield lists of tuples as returned by
+                psycopg2, or 'dicts', 'numpy' or 'columns' to yield chunks converted without pandas. See query().
+
+        Yields:
+            chunks of at most chunk_size rows. With output='dataframe', an empty dataframe with the columns of the
+            result is yielded if the query returns no rows.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if chunk_size or output are not valid.
+        """
+        if output != 'dataframe' and output not in OUTPUTS:
+            raise ValueError("No valid output has been provided to query.")
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+
+        conn, cursor, named_cursor, error = None, None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            named_cursor = conn.cursor(name='pgi_cursor_%s' % uuid.uuid4().hex)
+            named_cursor.itersize = chunk_size
+            named_cursor.execute(statement)
+
+            rows = named_cursor.fetchmany(chunk_size)
+            columns = [col.name for col in named_cursor.description]
+            if not rows and output == 'dataframe':
+                yield pd.DataFrame(columns=columns)
+            while rows:
+                if output == 'dataframe':
+                    yield pd.DataFrame.from_records(rows, columns=columns)
+                else:
+                    yield self.RecordReader.read_rows(rows, named_cursor.description, output)
+                rows = named_cursor.fetchmany(chunk_size)
+
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            if named_cursor is not None:
+                named_cursor.close()
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+
+    @instrumentation.traced
+    def execute(self, statement):
+        """
+        Execute a sql statement in database.
+        Transaction is fully handle by the method. The strategy is that transaction is only committed if all statement
+        execution is successful. It handles full connection life with the database and ensures that
+        connection is closed at the end no matter if the query was successful or unsuccessful.
+
+        Args:
+            statement: sql statement with SQL to be executed at database. Must be a str.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        conn, cursor, error = None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            with instrumentation.phase(EXECUTE):
+                cursor.execute(statement)
+                self._commit(conn)
+            instrumentation.record(len(statement))
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            self._invalidate_cache(statement=statement)
+            if error:
+                raise Exception(error)
+
+    @instrumentation.traced
+    def copy_from(self, statement, file, pre_statement=None):
+        """
+        Loads data into the database with a COPY ... FROM STDIN statement.
+        Transaction is fully handle by the method, so pre_statement and the load are committed together or not at all.
+        It handles full connection life with the database and ensures that connection is closed at the end no matter
+        if the load was successful or unsuccessful.
+
+        Args:
+            statement: COPY ... FROM STDIN sql statement. Must be a str.
+            file: file-like object to read the data from.
+            pre_statement: optional sql statement to execute in the same transaction before the load. Must be a str.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        conn, cursor, error = None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            with instrumentation.phase(EXECUTE):
+                if pre_statement:
+                    cursor.execute(pre_statement)
+                cursor.copy_expert(statement, file, size=COPY_READ_SIZE)
+                self._commit(conn)
+            instrumentation.record(len(statement) + getattr(file, 'characters_read', 0))
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            self._invalidate_cache(statement=(pre_statement or '') + statement)
+            if error:
+                raise Exception(error)
+
+    @instrumentation.traced
+    @_invalidates_cache
+    def insert_table(self, table_name, df, print_sql=False, truncate=False, sql_injection_check_enabled=True,
+                     method='statement', batch_size=None, commit_per_batch=False, progress_callback=None,
+                     parallel=None, all_or_nothing=False, workers=None, columns=None):
+        """
+        This method is to insert new values in a table. It is able to manage insertion of null values.
+
+        With method='statement' an INSERT INTO statement is sent:
+
+            INSERT INTO table_name (df.column[0], df.column[1], ... df.column[n])
+                VALUES (df.loc[0, column[0]], df.loc[0, column[1]], ... df.loc[0, column[n]]),
+                       (df.loc[1, column[0]], df.loc[1, column[1]], ... df.loc[1, column[n]]),
+                       .
+                       .
+                       .
+                       (df.loc[n, column[0]], df.loc[n, column[1]], ... df.loc[n, column[n]]);
+
+        With method='copy' df is streamed to the database, which is much faster for big dataframes:
+
+            COPY table_name (df.column[0], df.column[1], ... df.column[n]) FROM STDIN
+
+        With method='binary' df is streamed in binary format, encoded from the numpy arrays of its columns with the
+        types of the columns of the table, so numbers and timestamps are never converted to text. If some column can
+        not be encoded in binary format, see BinaryCopyWriter, df is streamed in text format as with method='copy':
+
+            COPY table_name (df.column[0], df.column[1], ... df.column[n]) FROM STDIN WITH (FORMAT binary)
+
+        With method='parameterized' values are sent apart from the statement with psycopg2.extras.execute_values(),
+        in pages of rows:
+
+            INSERT INTO table_name (df.column[0], df.column[1], ... df.column[n]) VALUES %s
+
+        By default the whole dataframe is sent at once. With batch_size, it is split in batches of rows that are
+        sent one after the other on the same connection, so memory used and statement size are bounded.
+
+        With parallel, df is split in chunks that are inserted concurrently by a pool of threads, each chunk over its
+        own connection and in its own transaction, so the load is spread over several server processes. Chunks that
+        fail are reported together once all chunks are over, and the ones that succeeded are kept. With
+        all_or_nothing, chunks are loaded into an unlogged staging table instead, and its rows are inserted into
+        table_name in a single final transaction only if all of them succeeded. Connections are borrowed from the
+        pool opened with open_pool(), if any, so its max_size must allow parallel connections.
+
+        With workers and method='statement', df is split in shards whose statements are built by a pool of worker
+        processes, to use several cores, and executed in order on a single connection as soon as each one is ready.
+
+        Instead of a dataframe, df can be rows in any of the inputs of RowSource. An iterator or generator of rows is
+        consumed in batches of batch_size rows, STREAM_CHUNK_SIZE by default, each one inserted as soon as it is read,
+        so it never needs to be in memory at once. With method='parameterized', a list of rows is sent as it is,
+        without building a dataframe.
+
+        Args:
+            table_name: name of the table where data is going to be inserted, it must include the table schema.
+            df: dataframe of values to insert into the table, or rows as described above.
+            print_sql: boolean to indicate if sql statement must be print on python console.
+            truncate: before inserting data into a table, it is truncated.
+            sql_injection_check_enabled: allows to disable SQL Injection check. With method='copy', method='binary'
+                or method='parameterized' only column names are checked, as values are never part of the sql
+                statement.
+            method: 'statement', 'copy', 'binary' or 'parameterized'.
+            batch_size: None to send all rows at once, number of rows per batch, or 'auto' to tune the number of rows
+                of each batch from the throughput and statement size measured on the previous ones.
+            commit_per_batch: if True each batch is committed on its own, so a failure only rolls back the batch that
+                failed. Otherwise all batches are committed together at the end.
+            progress_callback: callable called after each batch as progress_callback(batch_number, rows_inserted,
+                total_rows). With parallel it is called from the calling thread as chunks finish. total_rows is None
+                with an iterator of rows.
+            parallel: None to insert over a single connection, or number of connections used concurrently. Each chunk
+                has batch_size rows, or the rows of df divided by parallel if batch_size is None. commit_per_batch
+                does not apply, as each chunk is always committed on its own.
+            all_or_nothing: with parallel, if True either all rows are inserted or none is.
+            workers: None to build the statement on the calling process, or number of worker processes that build
+                the statements of the shards of df. Each shard has batch_size rows, or a quarter of the rows per
+                worker if batch_size is None. Only with method='statement'.
+            columns: names of the columns when df is rows that are not dictionaries. With a dictionary of columns,
+                the ones to insert, in order.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+            ErrorParallelInsert: with parallel, if some chunk failed. Its attribute errors has the number, rows and
+                exception of the chunks that failed.
+            ValueError: if method, batch_size, parallel or workers are not valid, parallel is used inside a session,
+                or df is rows without the columns needed.
+        """
+        if method not in ('statement', 'copy', 'binary', 'parameterized'):
+            raise ValueError("No valid method has been provided to insert into %s." % table_name)
+        self._check_batch_size(batch_size)
+        self._check_workers(workers, method)
+        if workers is not None and (parallel is not None or batch_size == 'auto'):
+            raise ValueError("workers cannot be used with parallel or batch_size='auto'.")
+        if parallel is not None:
+            if not isinstance(parallel, int) or parallel < 1:
+                raise ValueError("parallel must be None or a positive integer.")
+            if batch_size == 'auto':
+                raise ValueError("batch_size='auto' cannot be used with parallel.")
+            if self._current_session() is not None:
+                raise ValueError("parallel cannot be used inside a session, as chunks use their own connections.")
+
+        if not self.RowSource.is_dataframe(df):
+            stream = self.RowSource.is_stream(df)
+            if stream and (parallel is not None or workers is not None):
+                raise ValueError("parallel and workers cannot be used with an iterator of rows, which is consumed as "
+                                 "it is written.")
+            if stream or (method == 'parameterized' and parallel is None
+                           and not isinstance(df, collections.abc.Mapping)):
+                rows_inserted = self._write_in_batches(
+                    df, batch_size or STREAM_CHUNK_SIZE, commit_per_batch, progress_callback,
+                    lambda cursor, batch, first: self._insert_rows(
+                        cursor, table_name, batch, print_sql, truncate and first, sql_injection_check_enabled,
+                        method),
+                    columns=columns)
+                if rows_inserted == 0:
+                    warnings.warn("No rows provided to insert into %s." % table_name)
+                return
+            df = self.RowSource.create_dataframe(df, columns)
+            if df.shape[0] == 0:
+                warnings.warn("No rows provided to insert into %s." % table_name)
+                return
+
+        if (df.shape[0] == 0) & (df.columns.to_list().__len__() > 0):
+            warnings.warn("Dataframe provided to insert into %s is empty." % table_name)
+
+        elif parallel is not None:
+            self._insert_parallel(table_name, df, print_sql, truncate, sql_injection_check_enabled, method,
+                                  batch_size, parallel, all_or_nothing, progress_callback)
+
+        elif workers is not None:
+            self._execute_shards(
+                self.ProcessPoolWriter.iter_statements(
+                    self.SQLWriter.create_insert_table_statement, table_name, df, workers, shard_size=batch_size,
+                    first_shard_kwargs={'truncate': truncate}, truncate=False,
+                    sql_injection_check_enabled=sql_injection_check_enabled),
+                df.shape[0], print_sql, commit_per_batch, progress_callback)
+
+        elif batch_size is not None or method in ('parameterized', 'binary'):
+            # the types of the columns are needed to encode binary data, so it is always loaded on an open cursor
+            self._write_in_batches(
+                df, batch_size or (df.shape[0] if method == 'binary' else PARAMETERS_PAGE_SIZE), commit_per_batch,
+                progress_callback,
+                lambda cursor, batch, first: self._insert_batch(
+                    cursor, table_name, batch, print_sql, truncate and first, sql_injection_check_enabled, method))
+
+        elif method == 'copy':
+            with instrumentation.phase(BUILD):
+                statement = self.CopyWriter.create_copy_from_statement(
+                    table_name, df.columns.values.tolist(), sql_injection_check_enabled=sql_injection_check_enabled)
+            pre_statement = 'TRUNCATE TABLE %s; ' % table_name if truncate else None
+            if print_sql:
+                print((pre_statement or '') + statement)
+            self.copy_from(statement, self.CopyWriter.create_copy_buffer(df), pre_statement=pre_statement)
+
+        else:
+            with instrumentation.phase(BUILD):
+                statement = self.SQLWriter.create_insert_table_statement(
+                    table_name, df, truncate, sql_injection_check_enabled=sql_injection_check_enabled)
+            if print_sql:
+                print(statement)
+            self.execute(statement)
+
+    def _insert_batch(self, cursor, table_name, batch, print_sql, truncate, sql_injection_check_enabled, method):
+        """
+        Inserts a batch of rows on an open cursor, without committing. See insert_table() for the arguments.
+
+        Returns:
+            size of the statement, or of the data streamed with method='copy' or method='binary'.
+        """
+        if method == 'parameterized':
+            with instrumentation.phase(BUILD):
+                parameters = self.ParameterizedWriter.create_parameters(batch)
+            return self._insert_parameters(cursor, table_name, batch.columns.values.tolist(), parameters, print_sql,
+                                           truncate, sql_injection_check_enabled)
+
+        if method in ('copy', 'binary'):
+            encoders = None
+            if method == 'binary':
+                with instrumentation.phase(EXECUTE):
+                    column_types = self._get_column_type_oids(cursor, table_name)
+                encoding = psycopg2.extensions.encodings.get(cursor.connection.encoding, 'utf-8')
+                encoders = self.BinaryCopyWriter.get_column_encoders(batch, column_types, encoding=encoding)
+            if encoders is not None:
+                statement = self.BinaryCopyWriter.create_copy_from_statement(
+                    table_name, batch.columns.values.tolist(),
+                    sql_injection_check_enabled=sql_injection_check_enabled)
+                buffer = self.BinaryCopyWriter.create_copy_buffer(batch, encoders)
+            else:
+                statement = self.CopyWriter.create_copy_from_statement(
+                    table_name, batch.columns.values.tolist(),
+                    sql_injection_check_enabled=sql_injection_check_enabled)
+                buffer = self.CopyWriter.create_copy_buffer(batch)
+            if print_sql:
+                print(statement)
+            # rows are rendered while they are streamed, so building is measured as part of the execution
+            with instrumentation.phase(EXECUTE):
+                if truncate:
+                    cursor.execute('TRUNCATE TABLE %s; ' % table_name)
+                cursor.copy_expert(statement, buffer, size=COPY_READ_SIZE)
+            return buffer.characters_read
+
+        with instrumentation.phase(BUILD):
+            statement = self.SQLWriter.create_insert_table_statement(
+                table_name, batch, truncate, sql_injection_check_enabled=sql_injection_check_enabled)
+        if print_sql:
+            print(statement)
+        with instrumentation.phase(EXECUTE):
+            cursor.execute(statement)
+        return len(statement)
+
+    def _insert_rows(self, cursor, table_name, batch, print_sql, truncate, sql_injection_check_enabled, method):
+        """
+        Inserts a batch of rows that are not a dataframe on an open cursor, without committing. With
+        method='parameterized' rows are sent as they are, otherwise they are converted into a dataframe first. See
+        insert_table() for the arguments.
+
+        Args:
+            batch: tuple with the list of columns and a list with a tuple per row, as given by RowSource.iter_chunks().
+
+        Returns:
+            size of the statement, or of the data streamed with method='copy' or method='binary'.
+        """
+        columns, rows = batch
+        if method == 'parameterized':
+            return self._insert_parameters(cursor, table_name, columns, rows, print_sql, truncate,
+                                           sql_injection_check_enabled)
+        with instrumentation.phase(BUILD):
+            df = pd.DataFrame.from_records(rows, columns=columns)
+        return self._insert_batch(cursor, table_name, df, print_sql, truncate, sql_injection_check_enabled, method)
+
+    def _insert_parameters(self, cursor, table_name, columns, parameters, print_sql, truncate,
+                           sql_injection_check_enabled):
         """
-        Method to close a database connection to a PostgreSQL database.
+        Inserts rows with psycopg2.extras.execute_values() on an open cursor, without committing. See insert_table()
+        for the arguments.
 
         Args:
-            cursor: Allows Python code to execute PostgreSQL command in a database session.
-                class Cursor from psycopg2
-            conn: handles connection to a PostgreSQL database. class Connection from psycopg2
+            columns: list of the names of the columns.
+            parameters: list with a tuple of values per row, in the order of the columns.
+
+        Returns:
+            size of the statement.
         """
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        with instrumentation.phase(BUILD):
+            statement = self.ParameterizedWriter.create_insert_statement(
+                table_name, columns, sql_injection_check_enabled=sql_injection_check_enabled)
+        if print_sql:
+            print(statement)
+        with instrumentation.phase(EXECUTE):
+            if truncate:
+                cursor.execute('TRUNCATE TABLE %s; ' % table_name)
+            psycopg2.extras.execute_values(cursor, statement, parameters, page_size=len(parameters))
+        return len(cursor.query)
 
-    @abstractmethod
-    def create_connection(self):
+    def _insert_parallel(self, table_name, df, print_sql, truncate, sql_injection_check_enabled, method, batch_size,
+                         parallel, all_or_nothing, progress_callback):
         """
-        Method to create a database connection to a PostgreSQL database
+        Inserts df in chunks loaded concurrently by parallel threads, each chunk over its own connection. See
+        insert_table() for the arguments.
 
         Raises:
-            NotImplementedError: Must be overridden on children class
+            ErrorParallelInsert: if some chunk failed.
         """
-        NotImplementedError("Must be overridden on children class")
+        total_rows = df.shape[0]
+        chunk_size = batch_size or -(-total_rows // parallel)
+        chunks = [(start, min(start + chunk_size, total_rows)) for start in range(0, total_rows, chunk_size)]
+        columns = df.columns.values.tolist()
 
-    class SQLWriter(SQLWriter):
-        pass
+        target = table_name
+        if all_or_nothing:
+            # the staging table is created on the schema of table_name, to be visible from every connection
+            schema = table_name.rsplit('.', 1)[0] + '.' if '.' in table_name else ''
+            target = '%spgi_staging_%s' % (schema, uuid.uuid4().hex)
+            statement = self.SQLWriter.create_staging_table_statement(
+                target, table_name, columns, sql_injection_check_enabled=sql_injection_check_enabled, temporary=False)
+            if print_sql:
+                print(statement)
+            self.execute(statement)
+        elif truncate:
+            self.execute('TRUNCATE TABLE %s;' % table_name)
 
-    def query(self, statement):
-        """
-        Retrieves data from a sql statement as a Pandas dataframe.
-        It handles transactions with databases. It handles full connection life with the database and ensures that
-        connection is closed at the end no matter if the query was successful or unsuccessful.
+        try:
+            errors, inserted_rows, chunks_inserted = [], 0, 0
+            insert_chunk = instrumentation.propagate(self._insert_chunk)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=parallel, thread_name_prefix='pgi_insert') as pool:
+                futures = {pool.submit(insert_chunk, target, df.iloc[start:stop], print_sql,
+                                       sql_injection_check_enabled, method): (number, start, stop)
+                           for number, (start, stop) in enumerate(chunks)}
+                for future in concurrent.futures.as_completed(futures):
+                    number, start, stop = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        instrumentation.record(future.result())
+                    except Exception as e:
+                        errors.append((number, start, stop, e))
+                        if all_or_nothing:
+                            # nothing is going to be kept, so chunks not started yet are not loaded
+                            for other in futures:
+                                other.cancel()
+                        continue
+                    inserted_rows += stop - start
+                    chunks_inserted += 1
+                    if progress_callback:
+                        progress_callback(chunks_inserted, inserted_rows, total_rows)
 
-        Args:
-            statement: sql statement to evaluate at database. Must be a str.
+            if all_or_nothing and not errors:
+                statement = self.SQLWriter.create_insert_from_table_statement(
+                    table_name, target, columns, truncate, sql_injection_check_enabled=sql_injection_check_enabled)
+                if print_sql:
+                    print(statement)
+                self.execute(statement)
+        finally:
+            if all_or_nothing:
+                self.execute('DROP TABLE IF EXISTS %s;' % target)
+
+        if errors:
+            errors.sort(key=lambda error: error[0])
+            raise ErrorParallelInsert(
+                'ERROR: %d of %d chunks failed to insert into %s%s.\n%s' % (
+                    len(errors), len(chunks), table_name, ', nothing has been inserted' if all_or_nothing else '',
+                    '\n'.join('chunk %d (rows %d to %d): %s' % (number, start, stop - 1, error)
+                              for number, start, stop, error in errors)),
+                errors=errors, inserted_rows=0 if all_or_nothing else inserted_rows)
+
+    def _insert_chunk(self, table_name, chunk, print_sql, sql_injection_check_enabled, method):
+        """
+        Inserts a chunk of rows over its own connection, in its own transaction. With method='parameterized' rows
+        are sent in pages of PARAMETERS_PAGE_SIZE rows. See insert_table() for the arguments.
 
         Returns:
-            dataframe resulting from query to database.
+            size of what has been sent.
 
         Raises:
             psycopg2.Error: in case of a problem handling query to database.
         """
-        conn, cursor, error = None, None, None
-        df = pd.DataFrame()
+        page_size = PARAMETERS_PAGE_SIZE if method == 'parameterized' else chunk.shape[0]
+        conn, cursor, error, statement_bytes = None, None, None, 0
         try:
-            cursor, conn = self.create_connection()
-            df = pd.read_sql_query(statement, conn)
-
+            cursor, conn = self._acquire_connection()
+            for start in range(0, chunk.shape[0], page_size):
+                statement_bytes += self._insert_batch(
+                    cursor, table_name, chunk.iloc[start:start + page_size], print_sql, False,
+                    sql_injection_check_enabled, method)
+            self._commit(conn)
         except psycopg2.Error as e:
             error = e
         finally:
-            self.close_connection(cursor, conn)
+            self._release_connection(cursor, conn)
             if error:
                 raise Exception(error)
+        return statement_bytes
 
-        return df
-
-    def execute(self, statement):
+    def _execute_shards(self, statements, total_rows, print_sql, commit_per_batch=False, progress_callback=None):
         """
-        Execute a sql statement in database.
-        Transaction is fully handle by the method. The strategy is that transaction is only committed if all statement
-        execution is successful. It handles full connection life with the database and ensures that
-        connection is closed at the end no matter if the query was successful or unsuccessful.
+        Executes the statements of the shards of a dataframe one after the other on the same connection, as soon as
+        each one has been built.
 
         Args:
-            statement: sql statement with SQL to be executed at database. Must be a str.
+            statements: generator of tuples with the number of rows of a shard and its statement, as given by
+                ProcessPoolWriter.iter_statements(). It is closed at the end.
+            total_rows: number of rows of the dataframe.
+            print_sql: boolean to indicate if sql statements must be print on python console.
+            commit_per_batch: if True each shard is committed on its own. Otherwise all shards are committed
+                together at the end.
+            progress_callback: callable called after each shard as progress_callback(shard_number, rows_written,
+                total_rows), or None.
 
         Raises:
             psycopg2.Error: in case of a problem handling query to database.
         """
         conn, cursor, error = None, None, None
         try:
-            cursor, conn = self.create_connection()
-            cursor.execute(statement)
-            conn.commit()
+            cursor, conn = self._acquire_connection()
+            rows_written, shard_number = 0, 0
+            while True:
+                # waiting for the workers is measured as building
+                with instrumentation.phase(BUILD):
+                    shard = next(statements, None)
+                if shard is None:
+                    break
+                rows, statement = shard
+                if print_sql:
+                    print(statement)
+                with instrumentation.phase(EXECUTE):
+                    cursor.execute(statement)
+                    if commit_per_batch:
+                        self._commit(conn)
+                instrumentation.record(len(statement))
+
+                rows_written += rows
+                shard_number += 1
+                if progress_callback:
+                    progress_callback(shard_number, rows_written, total_rows)
+
+            with instrumentation.phase(EXECUTE):
+                self._commit(conn)
         except psycopg2.Error as e:
             error = e
         finally:
-            self.close_connection(cursor, conn)
+            statements.close()
+            self._release_connection(cursor, conn)
             if error:
                 raise Exception(error)
 
-    def insert_table(self, table_name, df, print_sql=False, truncate=False, sql_injection_check_enabled=True):
+    def _write_in_batches(self, df, batch_size, commit_per_batch, progress_callback, write_batch, columns=None):
         """
-        This method is to insert new values in a table. It is able to manage insertion of null values.
-
-            INSERT INTO table_name (df.column[0], df.column[1], ... df.column[n])
-                VALUES (df.loc[0, column[0]], df.loc[0, column[1]], ... df.loc[0, column[n]]),
-                       (df.loc[1, column[0]], df.loc[1, column[1]], ... df.loc[1, column[n]]),
-                       .
-                       .
-                       .
-                       (df.loc[n, column[0]], df.loc[n, column[1]], ... df.loc[n, column[n]]);
+        Writes df in batches of rows sent one after the other on the same connection.
 
         Args:
-            table_name: name of the table where data is going to be inserted, it must include the table schema.
-            df: dataframe of values to insert into the table.
-            print_sql: boolean to indicate if sql statement must be print on python console.
-            truncate: before inserting data into a table, it is truncated.
-            sql_injection_check_enabled: allows to disable SQL Injection check.
+            df: dataframe to write, or rows as accepted by RowSource, which are read in batches as they are written.
+            batch_size: number of rows per batch, or 'auto' to tune the number of rows of each batch from the
+                throughput and statement size measured on the previous ones.
+            commit_per_batch: if True each batch is committed on its own. Otherwise all batches are committed
+                together at the end.
+            progress_callback: callable called after each batch as progress_callback(batch_number, rows_written,
+                total_rows), or None.
+            write_batch: callable that writes a batch as write_batch(cursor, batch, is_first_batch) and returns the
+                size of what has been sent. Batches of rows are given as RowSource.iter_chunks() yields them.
+            columns: names of the columns when df is rows that are not dictionaries.
+
+        Returns:
+            number of rows written.
 
         Raises:
             psycopg2.Error: in case of a problem handling query to database.
         """
-        if (df.shape[0] == 0) & (df.columns.to_list().__len__() > 0):
-            warnings.warn("Dataframe provided to insert into %s is empty." % table_name)
-
+        sizer = AdaptiveBatchSizer() if batch_size == 'auto' else None
+        next_size = sizer.next_size if sizer else lambda: batch_size
+        if self.RowSource.is_dataframe(df):
+            total_rows = df.shape[0]
+            batches = ((batch.shape[0], batch) for batch in _iter_slices(df, next_size))
         else:
-            statement = self.SQLWriter.create_insert_table_statement(
-                table_name, df, truncate, sql_injection_check_enabled=sql_injection_check_enabled)
-            if print_sql:
-                print(statement)
-            self.execute(statement)
+            total_rows = None if self.RowSource.is_stream(df) else len(df)
+            batches = ((len(rows), (batch_columns, rows))
+                       for batch_columns, rows in self.RowSource.iter_chunks(df, columns, next_size))
+
+        conn, cursor, error = None, None, None
+        start = 0
+        try:
+            cursor, conn = self._acquire_connection()
+            batch_number = 0
+            for rows, batch in batches:
+                started_at = time.perf_counter()
+                statement_bytes = write_batch(cursor, batch, batch_number == 0)
+                instrumentation.record(statement_bytes)
+                if commit_per_batch:
+                    with instrumentation.phase(EXECUTE):
+                        self._commit(conn)
+                if sizer:
+                    sizer.record(rows, time.perf_counter() - started_at, statement_bytes)
+
+                start += rows
+                batch_number += 1
+                if total_rows is None:
+                    instrumentation.count_rows(rows)
+                if progress_callback:
+                    progress_callback(batch_number, start, total_rows)
+
+            with instrumentation.phase(EXECUTE):
+                self._commit(conn)
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+        return start
 
-    def update_table(self, table_name, df, where_identifier, print_sql=False, sql_injection_check_enabled=True):
+    @instrumentation.traced
+    @_invalidates_cache
+    def update_table(self, table_name, df, where_identifier, print_sql=False, sql_injection_check_enabled=True,
+                     method='statement', workers=None, columns=None):
         """
-        This method is to update values in a table taking into account the where_identifier. It creates one UPDATE
-        statement for each row in df.
+        This method is to update values in a table taking into account the where_identifier. With
+        method='statement', it creates one UPDATE statement for each row in df.
 
             WITH to_update = [col for col in df.columns if col not in where_identifier]
                 UPDATE table_name
@@ -158,16 +1268,59 @@ class PostgresSQLConnector(metaclass=ABCMeta):
                       .
                       where_identifier[n] = df.loc[n, where_identifier[n]];
 
+        With method='values', a single set-based UPDATE joins the table to the rows of df given as a VALUES list.
+        Values are cast to the types of the columns of the table:
+
+            UPDATE table_name SET to_update[0] = v.to_update[0], ... to_update[n] = v.to_update[n]
+            FROM (VALUES (...), ... (...)) AS v (df.column[0], ... df.column[n])
+            WHERE table_name.where_identifier[0] = v.where_identifier[0] AND ...
+
+        With method='staging', df is first loaded with COPY into a temporary table, that is joined to the table by a
+        single UPDATE. This is the fastest option for big dataframes.
+
+        In both set-based methods, if several rows of df match the same row of the table only one of them is applied.
+
+        With method='prepared', the UPDATE of one row is prepared once on the server and executed for each row of df
+        with its values as parameters, so it is neither parsed nor planned again:
+
+            PREPARE statement_name AS UPDATE table_name SET to_update[0] = $1, ... WHERE where_identifier[0] = $n ...
+            EXECUTE statement_name (df.loc[0, column[0]], ... df.loc[0, column[n]])
+
+        df can also be rows in any of the inputs of RowSource. An iterator or generator of rows is consumed in chunks
+        of STREAM_CHUNK_SIZE rows, each one updated as soon as it is read, in a single session.
+
         Args:
             table_name: name of the table to update included schema.
-            df: dataframe with the data to update in the table.
+            df: dataframe with the data to update in the table, or rows as described above.
             where_identifier: list of columns to list on the where clause.
             print_sql: boolean to indicate if sql statement must be print on python console.
-            sql_injection_check_enabled: allows to disable SQL Injection check.
+            sql_injection_check_enabled: allows to disable SQL Injection check. With method='prepared' only column
+                names are checked, as values are never part of the sql statement.
+            method: 'statement', 'values', 'staging' or 'prepared'.
+            workers: with method='statement', number of worker processes that build the statements of shards of df,
+                which are executed in order in a single transaction. See insert_table(). Not with an iterator of
+                rows.
+            columns: names of the columns when df is rows that are not dictionaries. See insert_table().
 
         Raises:
             psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if method or workers are not valid, or df is rows without the columns needed.
         """
+        if method not in ('statement', 'values', 'staging', 'prepared'):
+            raise ValueError("No valid method has been provided to update %s." % table_name)
+        self._check_workers(workers, method)
+
+        if not self.RowSource.is_dataframe(df):
+            if self.RowSource.is_stream(df):
+                return self._write_stream(
+                    df, columns, workers,
+                    lambda chunk: self.update_table(table_name, chunk, where_identifier, print_sql,
+                                                    sql_injection_check_enabled, method))
+            df = self.RowSource.create_dataframe(df, columns)
+            if df.shape[0] == 0:
+                warnings.warn("No rows provided to update %s." % table_name)
+                return
+
         if (df.shape[0] == 0) & (df.columns.to_list().__len__() > 0):
             warnings.warn("Dataframe provided to insert into %s is empty." % table_name)
 
@@ -175,14 +1328,42 @@ class PostgresSQLConnector(metaclass=ABCMeta):
             raise Exception(
                 "Cannot create update operation on table %s as there are no columns to update" % table_name)
 
+        elif method in ('values', 'staging'):
+            self._execute_set_based(
+                table_name, df, print_sql, sql_injection_check_enabled, method,
+                lambda column_types: self.SQLWriter.create_update_from_values_statement(
+                    table_name, df, where_identifier, column_types=column_types,
+                    sql_injection_check_enabled=sql_injection_check_enabled),
+                lambda staging_table, columns: self.SQLWriter.create_update_from_table_statement(
+                    table_name, staging_table, columns, where_identifier,
+                    sql_injection_check_enabled=sql_injection_check_enabled))
+
+        elif method == 'prepared':
+            self._execute_prepared(
+                df, print_sql,
+                lambda statement_name: self.ParameterizedWriter.create_prepare_update_statement(
+                    statement_name, table_name, df.columns.values.tolist(), where_identifier,
+                    sql_injection_check_enabled=sql_injection_check_enabled))
+
+        elif workers is not None:
+            self._execute_shards(
+                self.ProcessPoolWriter.iter_statements(
+                    self.SQLWriter.create_update_table_statement, table_name, df, workers,
+                    where_identifier=where_identifier, sql_injection_check_enabled=sql_injection_check_enabled),
+                df.shape[0], print_sql)
+
         else:
-            statement = self.SQLWriter.create_update_table_statement(
-                table_name, df.copy(), where_identifier, sql_injection_check_enabled=sql_injection_check_enabled)
+            with instrumentation.phase(BUILD):
+                statement = self.SQLWriter.create_update_table_statement(
+                    table_name, df, where_identifier, sql_injection_check_enabled=sql_injection_check_enabled)
             if print_sql:
                 print(statement)
             self.execute(statement)
 
-    def delete_from_table(self, table_name, df, print_sql=False, sql_injection_check_enabled=True):
+    @instrumentation.traced
+    @_invalidates_cache
+    def delete_from_table(self, table_name, df, print_sql=False, sql_injection_check_enabled=True,
+                          method='statement', workers=None, columns=None):
         """
         Method to delete rows from a table. It deletes rows from table_name based on the where clause created with
         values and columns of df.
@@ -198,25 +1379,438 @@ class PostgresSQLConnector(metaclass=ABCMeta):
                 DELETE FROM table_name  WHERE df.column[0] == 'df.loc[n, column[0]]'......
                                             AND df.column[n] == 'df.loc[n, column[n]]';
 
+        That is with method='statement'. The other methods always send a single statement whatever the number of
+        columns, which is much faster when there are many rows to delete:
+            - 'in': compares all the columns at once with a row constructor.
+                DELETE FROM table_name WHERE (df.column[0], ... df.column[n]) IN ((...), ... (...))
+            - 'values': joins the table to the rows of df given as a VALUES list. Values are cast to the types of the
+                columns of the table.
+                DELETE FROM table_name USING (VALUES (...), ... (...)) AS v (df.column[0], ... df.column[n])
+                    WHERE table_name.column[0] = v.column[0] AND ...
+            - 'staging': df is first loaded with COPY into a temporary table, that is joined to the table. This is
+                the fastest option for big dataframes.
+        With method='prepared', the DELETE of the rows matching all the columns is prepared once on the server and
+        executed for each row of df with its values as parameters:
+                PREPARE statement_name AS DELETE FROM table_name WHERE df.column[0] = $1 AND ... df.column[n] = $n
+        With any method, rows of df with a null value do not delete anything.
+
+        df can also be rows in any of the inputs of RowSource. An iterator or generator of rows is consumed in chunks
+        of STREAM_CHUNK_SIZE rows, each one deleted as soon as it is read, in a single session.
+
         Args:
             table_name: name of the table to update included schema.
-            df: dataframe with the columns of the table to be included on the where clause.
+            df: dataframe with the columns of the table to be included on the where clause, or rows as described
+                above.
             print_sql: boolean to indicate if sql statement must be print on python console.
-            sql_injection_check_enabled: allows to disable SQL Injection check.
+            sql_injection_check_enabled: allows to disable SQL Injection check. With method='prepared' only column
+                names are checked, as values are never part of the sql statement.
+            method: 'statement', 'in', 'values', 'staging' or 'prepared'.
+            workers: with method='statement', number of worker processes that build the statements of shards of df,
+                which are executed in order in a single transaction. See insert_table(). Not with an iterator of
+                rows.
+            columns: names of the columns when df is rows that are not dictionaries. See insert_table().
 
         Raises:
             psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if method or workers are not valid, or df is rows without the columns needed.
         """
+        if method not in ('statement', 'in', 'values', 'staging', 'prepared'):
+            raise ValueError("No valid method has been provided to delete from %s." % table_name)
+        self._check_workers(workers, method)
+
+        if not self.RowSource.is_dataframe(df):
+            if self.RowSource.is_stream(df):
+                return self._write_stream(
+                    df, columns, workers,
+                    lambda chunk: self.delete_from_table(table_name, chunk, print_sql, sql_injection_check_enabled,
+                                                         method))
+            df = self.RowSource.create_dataframe(df, columns)
+            if df.shape[0] == 0:
+                warnings.warn("No rows provided to delete from %s." % table_name)
+                return
+
         if (df.shape[0] == 0) & (df.columns.to_list().__len__() > 0):
             warnings.warn("Dataframe provided to insert into %s is empty." % table_name)
 
+        elif method in ('values', 'staging'):
+            self._execute_set_based(
+                table_name, df, print_sql, sql_injection_check_enabled, method,
+                lambda column_types: self.SQLWriter.create_delete_using_values_statement(
+                    table_name, df, column_types=column_types,
+                    sql_injection_check_enabled=sql_injection_check_enabled),
+                lambda staging_table, columns: self.SQLWriter.create_delete_using_table_statement(
+                    table_name, staging_table, columns, sql_injection_check_enabled=sql_injection_check_enabled))
+
+        elif method == 'prepared':
+            self._execute_prepared(
+                df, print_sql,
+                lambda statement_name: self.ParameterizedWriter.create_prepare_delete_statement(
+                    statement_name, table_name, df.columns.values.tolist(),
+                    sql_injection_check_enabled=sql_injection_check_enabled))
+
+        elif method == 'in':
+            with instrumentation.phase(BUILD):
+                statement = self.SQLWriter.create_delete_row_values_statement(
+                    table_name, df, sql_injection_check_enabled=sql_injection_check_enabled)
+            if print_sql:
+                print(statement)
+            self.execute(statement)
+
+        elif workers is not None:
+            self._execute_shards(
+                self.ProcessPoolWriter.iter_statements(
+                    self.SQLWriter.create_delete_from_table_statement, table_name, df, workers,
+                    sql_injection_check_enabled=sql_injection_check_enabled),
+                df.shape[0], print_sql)
+
+        else:
+            with instrumentation.phase(BUILD):
+                statement = self.SQLWriter.create_delete_from_table_statement(
+                    table_name, df, sql_injection_check_enabled=sql_injection_check_enabled)
+            if print_sql:
+                print(statement)
+            self.execute(statement)
+
+    @instrumentation.traced
+    @_invalidates_cache
+    def merge_table(self, table_name, df, conflict_columns, update_columns=None, print_sql=False,
+                    sql_injection_check_enabled=True, method='statement', batch_size=None, commit_per_batch=False,
+                    progress_callback=None, columns=None):
+        """
+        This method is to insert new rows in a table and update the ones that already exist, in one go. Rows already
+        exist if they have the same values on conflict_columns, which must have a unique constraint on the table.
+
+        With method='statement' an INSERT ... ON CONFLICT statement is sent, optionally in batches:
+
+            INSERT INTO table_name (df.column[0], df.column[1], ... df.column[n])
+                VALUES (df.loc[0, column[0]], df.loc[0, column[1]], ... df.loc[0, column[n]]),
+                       .
+                       .
+                       .
+                       (df.loc[n, column[0]], df.loc[n, column[1]], ... df.loc[n, column[n]])
+                ON CONFLICT (conflict_columns[0], ... conflict_columns[n])
+                DO UPDATE SET update_columns[0] = EXCLUDED.update_columns[0],
+                              .
+                              .
+                              .
+                              update_columns[n] = EXCLUDED.update_columns[n];
+
+        With method='staging', df is first loaded with COPY into a temporary table, that is merged into the table by a
+        single INSERT ... SELECT ... ON CONFLICT. This is the fastest option for big dataframes.
+
+        Rows of df with the same values on conflict_columns must go on different batches, as a single statement
+        cannot update a row twice.
+
+        df can also be rows in any of the inputs of RowSource. An iterator or generator of rows is consumed in chunks
+        of STREAM_CHUNK_SIZE rows, each one merged as soon as it is read, in a single session.
+
+        Args:
+            table_name: name of the table to merge into, it must include the table schema.
+            df: dataframe with the rows to insert or update, or rows as described above.
+            conflict_columns: list of columns that identify a row.
+            update_columns: list of columns to update on existing rows. None to update every column of df that is not
+                on conflict_columns. If empty, existing rows are left untouched.
+            print_sql: boolean to indicate if sql statement must be print on python console.
+            sql_injection_check_enabled: allows to disable SQL Injection check.
+            method: 'statement' or 'staging'.
+            batch_size: with method='statement', None to send all rows at once, number of rows per batch, or 'auto'.
+                See insert_table().
+            commit_per_batch: if True each batch is committed on its own. Otherwise all batches are committed
+                together at the end.
+            progress_callback: callable called after each batch as progress_callback(batch_number, rows_merged,
+                total_rows).
+            columns: names of the columns when df is rows that are not dictionaries. See insert_table().
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+            ValueError: if method, conflict_columns or batch_size are not valid, or df is rows without the columns
+                needed.
+        """
+        if method not in ('statement', 'staging'):
+            raise ValueError("No valid method has been provided to merge into %s." % table_name)
+        if len(conflict_columns) == 0:
+            raise ValueError("conflict_columns must have at least one column to merge into %s." % table_name)
+        self._check_batch_size(batch_size)
+
+        if not self.RowSource.is_dataframe(df):
+            if self.RowSource.is_stream(df):
+                return self._write_stream(
+                    df, columns, None,
+                    lambda chunk: self.merge_table(
+                        table_name, chunk, conflict_columns, update_columns, print_sql, sql_injection_check_enabled,
+                        method, batch_size, commit_per_batch, progress_callback))
+            df = self.RowSource.create_dataframe(df, columns)
+            if df.shape[0] == 0:
+                warnings.warn("No rows provided to merge into %s." % table_name)
+                return
+
+        if (df.shape[0] == 0) & (df.columns.to_list().__len__() > 0):
+            warnings.warn("Dataframe provided to merge into %s is empty." % table_name)
+
+        elif method == 'staging':
+            self._execute_set_based(
+                table_name, df, print_sql, sql_injection_check_enabled, method, None,
+                lambda staging_table, columns: self.SQLWriter.create_merge_from_table_statement(
+                    table_name, staging_table, columns, conflict_columns, update_columns=update_columns,
+                    sql_injection_check_enabled=sql_injection_check_enabled))
+
+        elif batch_size is not None:
+            self._write_in_batches(
+                df, batch_size, commit_per_batch, progress_callback,
+                lambda cursor, batch, first: self._merge_batch(
+                    cursor, table_name, batch, conflict_columns, update_columns, print_sql,
+                    sql_injection_check_enabled))
+
         else:
-            statement = self.SQLWriter.create_delete_from_table_statement(
-                table_name, df, sql_injection_check_enabled=sql_injection_check_enabled)
+            with instrumentation.phase(BUILD):
+                statement = self.SQLWriter.create_merge_table_statement(
+                    table_name, df, conflict_columns, update_columns=update_columns,
+                    sql_injection_check_enabled=sql_injection_check_enabled)
             if print_sql:
                 print(statement)
             self.execute(statement)
 
+    def _write_stream(self, rows, columns, workers, write_chunk):
+        """
+        Writes an iterator of rows in chunks of STREAM_CHUNK_SIZE rows, each one converted into a dataframe and
+        written as soon as it is read, in a single session.
+
+        Args:
+            rows: iterator of rows, as accepted by RowSource.
+            columns: names of the columns when rows are not dictionaries.
+            workers: workers given to the write method, which must be None.
+            write_chunk: callable that writes a chunk as write_chunk(df).
+
+        Raises:
+            ValueError: if workers is not None, or columns are needed and not given.
+        """
+        if workers is not None:
+            raise ValueError("workers cannot be used with an iterator of rows, which is consumed as it is written.")
+        with self.session():
+            for chunk in self.RowSource.iter_dataframes(rows, columns):
+                write_chunk(chunk)
+                instrumentation.count_rows(chunk.shape[0])
+
+    def _merge_batch(self, cursor, table_name, batch, conflict_columns, update_columns, print_sql,
+                     sql_injection_check_enabled):
+        """
+        Merges a batch of rows on an open cursor, without committing. See merge_table() for the arguments.
+
+        Returns:
+            size of the statement.
+        """
+        with instrumentation.phase(BUILD):
+            statement = self.SQLWriter.create_merge_table_statement(
+                table_name, batch, conflict_columns, update_columns=update_columns,
+                sql_injection_check_enabled=sql_injection_check_enabled)
+        return self._execute_on_cursor(cursor, statement, print_sql)
+
+    @staticmethod
+    def _execute_on_cursor(cursor, statement, print_sql):
+        """
+        Executes a statement on an open cursor, without committing.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            statement: sql statement to execute. Must be a str.
+            print_sql: boolean to indicate if sql statement must be print on python console.
+
+        Returns:
+            size of the statement.
+        """
+        if print_sql:
+            print(statement)
+        with instrumentation.phase(EXECUTE):
+            cursor.execute(statement)
+        return len(statement)
+
+    @staticmethod
+    def _check_workers(workers, method):
+        """
+        Raises:
+            ValueError: if workers is not None or a positive integer, or it is given with a method other than
+                'statement'.
+        """
+        if workers is not None:
+            if not isinstance(workers, int) or workers < 1:
+                raise ValueError("workers must be None or a positive integer.")
+            if method != 'statement':
+                raise ValueError("workers can only be used with method='statement'.")
+
+    @staticmethod
+    def _check_batch_size(batch_size):
+        """
+        Raises:
+            ValueError: if batch_size is not None, a positive integer or 'auto'.
+        """
+        if batch_size is not None and batch_size != 'auto' and (not isinstance(batch_size, int) or batch_size < 1):
+            raise ValueError("batch_size must be None, a positive integer or 'auto'.")
+
+    def _execute_set_based(self, table_name, df, print_sql, sql_injection_check_enabled, method, from_values,
+                           from_table):
+        """
+        Executes a set-based statement that joins table_name to the rows of df, given either as a VALUES list or
+        loaded into a staging table.
+
+        Args:
+            table_name: name of the table, it must include the table schema.
+            df: dataframe with the rows to join.
+            print_sql: boolean to indicate if sql statements must be print on python console.
+            sql_injection_check_enabled: allows to disable SQL Injection check.
+            method: 'values' or 'staging'.
+            from_values: callable that receives the column types of table_name and returns the statement to execute
+                with method='values'. None if the method is not supported.
+            from_table: callable that receives the name and the columns of the staging table and returns the
+                statement to execute with method='staging'.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        conn, cursor, error = None, None, None
+        try:
+            cursor, conn = self._acquire_connection()
+            if method == 'staging':
+                source = self._load_staging_table(cursor, table_name, df, print_sql, sql_injection_check_enabled)
+                with instrumentation.phase(BUILD):
+                    statement = from_table(*source)
+            else:
+                with instrumentation.phase(EXECUTE):
+                    column_types = self._get_column_types(cursor, table_name)
+                with instrumentation.phase(BUILD):
+                    statement = from_values(column_types)
+            if print_sql:
+                print(statement)
+            with instrumentation.phase(EXECUTE):
+                cursor.execute(statement)
+                self._commit(conn)
+            instrumentation.record(len(statement))
+        except psycopg2.Error as e:
+            error = e
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+
+    def _execute_prepared(self, df, print_sql, prepare):
+        """
+        Prepares a statement and executes it once per row of df, with the values of the row as parameters, in a single
+        transaction. The prepared statement is deallocated at the end, as prepared statements outlive transactions.
+
+        Args:
+            df: dataframe with the parameters of each execution, in the order of the prepared statement.
+            print_sql: boolean to indicate if sql statement must be print on python console.
+            prepare: callable that receives the name of the prepared statement and returns the PREPARE statement.
+
+        Raises:
+            psycopg2.Error: in case of a problem handling query to database.
+        """
+        statement_name = 'pgi_prepared_%s' % uuid.uuid4().hex
+        with instrumentation.phase(BUILD):
+            prepare_statement = prepare(statement_name)
+        if print_sql:
+            print(prepare_statement)
+
+        conn, cursor, error, prepared = None, None, None, False
+        try:
+            cursor, conn = self._acquire_connection()
+            with instrumentation.phase(BUILD):
+                parameters = self.ParameterizedWriter.create_parameters(df)
+            with instrumentation.phase(EXECUTE):
+                cursor.execute(prepare_statement)
+                prepared = True
+                psycopg2.extras.execute_batch(
+                    cursor, self.ParameterizedWriter.create_execute_statement(statement_name, df.shape[1]),
+                    parameters, page_size=PARAMETERS_PAGE_SIZE)
+                cursor.execute('DEALLOCATE %s' % statement_name)
+                prepared = False
+                self._commit(conn)
+            instrumentation.record(len(prepare_statement))
+        except psycopg2.Error as e:
+            error = e
+            # inside a session the transaction must be rolled back by the session, so the statement is left
+            if prepared and self._current_session() is None:
+                try:
+                    conn.rollback()
+                    cursor.execute('DEALLOCATE %s' % statement_name)
+                    self._commit(conn)
+                except psycopg2.Error:
+                    # the connection is broken, so the prepared statement is gone with it
+                    pass
+        finally:
+            self._release_connection(cursor, conn)
+            if error:
+                raise Exception(error)
+
+    @staticmethod
+    def _get_column_types(cursor, table_name):
+        """
+        Retrieves the sql types of the columns of a table.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            table_name: name of the table, it must include the table schema.
+
+        Returns:
+            dictionary with the upper case name of each column as key and its sql type as value.
+        """
+        cursor.execute(
+            "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped", (table_name,))
+        return {name.upper(): sql_type for name, sql_type in cursor.fetchall()}
+
+    @staticmethod
+    def _get_column_type_oids(cursor, table_name):
+        """
+        Retrieves the oids of the types of the columns of a table.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            table_name: name of the table, it must include the table schema.
+
+        Returns:
+            dictionary with the upper case name of each column as key and the oid of its type as value.
+        """
+        cursor.execute(
+            "SELECT attname, atttypid::integer FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped", (table_name,))
+        return {name.upper(): type_oid for name, type_oid in cursor.fetchall()}
+
+    def _load_staging_table(self, cursor, table_name, df, print_sql, sql_injection_check_enabled):
+        """
+        Loads df with COPY into a new temporary table with the types of the matching columns of table_name. The
+        temporary table is dropped at the end of the transaction.
+
+        Args:
+            cursor: Allows Python code to execute PostgreSQL command in a database session.
+                class Cursor from psycopg2
+            table_name: name of the table to take the column types from, it must include the table schema.
+            df: dataframe to load.
+            print_sql: boolean to indicate if sql statements must be print on python console.
+            sql_injection_check_enabled: allows to disable SQL Injection check.
+
+        Returns:
+            name of the temporary table and list of its columns.
+        """
+        staging_table = 'pgi_staging_%s' % uuid.uuid4().hex
+        columns = [col.upper() for col in df.columns.values.tolist()]
+        with instrumentation.phase(BUILD):
+            statement = self.SQLWriter.create_staging_table_statement(
+                staging_table, table_name, columns, sql_injection_check_enabled=sql_injection_check_enabled)
+            copy_statement = self.CopyWriter.create_copy_from_statement(
+                staging_table, columns, sql_injection_check_enabled=sql_injection_check_enabled)
+        if print_sql:
+            print(statement)
+            print(copy_statement)
+        buffer = self.CopyWriter.create_copy_buffer(df)
+        with instrumentation.phase(EXECUTE):
+            cursor.execute(statement)
+            cursor.copy_expert(copy_statement, buffer, size=COPY_READ_SIZE)
+        instrumentation.record(len(statement) + len(copy_statement) + buffer.characters_read)
+        return staging_table, columns
+
 
 class PostgresHeroku(PostgresSQLConnector):
     """
@@ -295,6 +1889,43 @@ class PostgresGCP(PostgresSQLConnector):
         return cursor, conn
 
 
+class PostgresMemory(PostgresSQLConnector):
+    """
+    API that works against an in-process stand-in of a PostgreSQL database instead of a real one, to profile and
+    test the library without a database. Every statement sent is recorded with its size and timing on
+    database.statements, and queries return the results given with database.add_result(), or no rows. Nothing is
+    stored, so reads do not see previous writes. Timings include the work of the stand-in, like rendering the
+    results given, so they measure the client side only roughly for reads.
+
+    Example of use:
+    ```
+    db_conn = postgres_sql_connector_factory(vendor='memory')
+    db_conn.database.add_result("SELECT * FROM test.simple", my_df)
+    db_conn.insert_table("test.simple", my_df, method='copy')
+    print(db_conn.database.summary())
+    ```
+
+    Args:
+        database: MemoryDatabase to connect to. A new one is created if None, so connectors can share one.
+    """
+    def __init__(self, database=None):
+        self.vendor = 'Memory'
+        self.database = database if database is not None else MemoryDatabase()
+
+    def create_connection(self):
+        """
+        Method to create a connection to the in-process database.
+        """
+        conn = MemoryConnection(self.database)
+        return conn.cursor(), conn
+
+    def __repr__(self):
+        return 'PostgresMemory()'
+
+    def __str__(self):
+        return 'API to record the statements sent to a PostgresSQL database, without a database'
+
+
 def postgres_sql_connector_factory(vendor, **kwargs):
     """
     Factory method that returns the right API given the provided vendor.
@@ -312,6 +1943,8 @@ def postgres_sql_connector_factory(vendor, **kwargs):
     Returns:
         depending on vendor:
             - Heroku: object of class PostgresHeroku
+            - GCP: object of class PostgresGCP
+            - Memory: object of class PostgresMemory
 
     Raises:
         ValueError: if the vendor is not yet implemented
@@ -320,5 +1953,7 @@ def postgres_sql_connector_factory(vendor, **kwargs):
         return PostgresHeroku(**kwargs)
     elif vendor.upper() == 'GCP':
         return PostgresGCP(**kwargs)
+    elif vendor.upper() == 'MEMORY':
+        return PostgresMemory(**kwargs)
     else:
         raise ValueError('No valid vendor has been provided when instantiating the class.')
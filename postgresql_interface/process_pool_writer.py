@@ -0,0 +1,79 @@
+import collections
+import concurrent.futures
+
+
+class ProcessPoolWriter:
+    """
+    Trait that builds the statements of a SQLWriter for a big dataframe in a pool of processes, so that rendering
+    values, which is CPU-bound, uses several cores. The dataframe is split in shards of rows, the statement of each
+    shard is built by a worker process, and statements are given back in the order of the shards as soon as they are
+    ready, so they can be executed while the next ones are being built.
+
+    Starting the processes and sending them the shards has a cost, so it only pays off for dataframes of hundreds of
+    thousands of rows or more.
+    """
+    @staticmethod
+    def iter_statements(create_statement, table_name, df, workers, shard_size=None, first_shard_kwargs=None,
+                        **kwargs):
+        """
+        Generator that builds the statements of the shards of df in a pool of processes.
+
+        - Args:
+            create_statement: function that writes the statement of a shard as create_statement(table_name, shard,
+                **kwargs), like SQLWriter.create_insert_table_statement. It must be importable by the workers
+            table_name: name of the table, included schema
+            df: dataframe of values
+            workers: number of worker processes. With 1 statements are built on the calling process
+            shard_size: number of rows of each shard. None for four shards per worker
+            first_shard_kwargs: arguments that replace kwargs for the first shard, e.g. truncate=True
+            kwargs: arguments of create_statement
+
+        - Yields:
+            Tuple with the number of rows of a shard and its statement, in the order of the shards
+        """
+        total_rows = df.shape[0]
+        shard_size = shard_size or max(-(-total_rows // (workers * 4)), 1)
+        shards = ((df.iloc[start:start + shard_size], dict(kwargs, **(first_shard_kwargs or {})) if start == 0
+                   else kwargs) for start in range(0, total_rows, shard_size))
+
+        if workers == 1:
+            for shard, shard_kwargs in shards:
+                yield shard.shape[0], create_statement(table_name, shard, **shard_kwargs)
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = collections.deque()
+            try:
+                for shard, shard_kwargs in shards:
+                    # at most two shards per worker are in flight, so memory used stays bounded
+                    if len(pending) >= 2 * workers:
+                        yield _result(pending.popleft())
+                    pending.append((shard.shape[0], pool.submit(create_statement, table_name, shard,
+                                                                **shard_kwargs)))
+                while pending:
+                    yield _result(pending.popleft())
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def join_statements(statements):
+        """
+        This method joins the statements of the shards into a single one.
+
+        - Args:
+            statements: iterable of the statements of the shards, as yielded by iter_statements()
+
+        - Returns:
+            String containing all the statements, separated by semicolons
+        """
+        return ''.join(statement if statement.rstrip().endswith(';') or not statement else statement + '; '
+                       for _, statement in statements)
+
+
+def _result(pending):
+    """
+    Waits for the statement of a shard.
+    """
+    rows, future = pending
+    return rows, future.result()
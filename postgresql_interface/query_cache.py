@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# string literals, with standard or backslash escapes, quoted identifiers and dollar-quoted strings, whose blanks are
+# kept, or blanks outside them
+_LITERAL_OR_WHITESPACE = re.compile(
+    r"(?<![\w$])[Ee]'(?:[^'\\]|\\.|'')*'|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(?<![\w$])(\$[A-Za-z_]\w*\$|\$\$).*?\1|"
+    r"(\s+)",
+    re.DOTALL)
+_IDENTIFIER = r'(?:"[^"]+"|[\w$]+)(?:\s*\.\s*(?:"[^"]+"|[\w$]+))*'
+# targets of the statements that change the content of a table
+_WRITE_TARGETS = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO|COPY|TRUNCATE(?:\s+TABLE)?|'
+    r'(?:ALTER|DROP)\s+(?:TABLE|VIEW|MATERIALIZED\s+VIEW)(?:\s+IF\s+EXISTS)?|REFRESH\s+MATERIALIZED\s+VIEW)'
+    r'\s+(?:ONLY\s+)?(%s(?:\s*,\s*%s)*)' % (_IDENTIFIER, _IDENTIFIER),
+    re.IGNORECASE)
+
+
+class QueryCache:
+    """
+    Thread-safe in-process cache of query results, keyed by the text of the statement with its blanks normalized.
+
+    Entries expire ttl seconds after being stored, and the least recently used ones are evicted when the memory used
+    by the cached dataframes goes above max_bytes. Results are stored and handed out as copies, so callers cannot
+    change what is cached.
+
+    A table is considered to be referenced by a statement if its name, without schema, appears on it as a word. That
+    is conservative, as results are invalidated if the name appears as a column or alias too, but results that read
+    a table through a view are not invalidated when the table is written.
+
+    Args:
+        ttl: seconds an entry is valid. None for entries to be valid until evicted or invalidated.
+        max_bytes: maximum memory used by the cached dataframes, as measured by DataFrame.memory_usage(deep=True).
+        max_entries: maximum number of cached results. None for no limit.
+    """
+    def __init__(self, ttl=300, max_bytes=256 * 1024 * 1024, max_entries=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self):
+        """
+        Number of invalidations done so far. It is taken before running a query and given back to put(), so results
+        read while a table is being written are not cached.
+        """
+        return self._generation
+
+    def get(self, statement, method='read_sql'):
+        """
+        Args:
+            statement: sql statement of the query.
+            method: method used to read the result, as results differ slightly from one to another.
+
+        Returns:
+            a copy of the cached result, or None if there is no valid entry.
+        """
+        key = (method, normalize_statement(statement))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            df = entry[0]
+        return df.copy()
+
+    def put(self, statement, df, generation, method='read_sql'):
+        """
+        Stores a copy of the result of a query, unless some table has been invalidated since generation was taken or
+        the result alone is bigger than max_bytes.
+
+        Args:
+            statement: sql statement of the query.
+            df: result of the query.
+            generation: value of the property generation before running the query.
+            method: method used to read the result.
+        """
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        key = (method, normalize_statement(statement))
+        df = df.copy()
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (df, time.monotonic(), size, _words(key[1]))
+            self._bytes += size
+            while self._bytes > self.max_bytes or (
+                    self.max_entries is not None and len(self._entries) > self.max_entries):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, table_name):
+        """
+        Removes the cached results that reference a table.
+
+        Args:
+            table_name: name of the table, with or without schema.
+        """
+        words = _words(table_name.split('.')[-1])
+        with self._lock:
+            self._generation += 1
+            for key in [key for key, entry in self._entries.items() if not words.isdisjoint(entry[3])]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_statement(self, statement):
+        """
+        Removes the cached results that reference the tables written by a statement. If no table written is found on
+        it, like on a call to a stored procedure, everything is removed.
+
+        Args:
+            statement: sql statement executed.
+        """
+        tables = [table for match in _WRITE_TARGETS.finditer(statement)
+                  for table in re.split(r'\s*,\s*', match.group(1))]
+        if not tables:
+            self.clear()
+        for table in tables:
+            self.invalidate(table)
+
+    def clear(self):
+        """
+        Removes all cached results.
+        """
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dictionary with the number of hits, misses, evictions, invalidations, the hit ratio, and the number of
+            entries and bytes cached.
+        """
+        with self._lock:
+            requests = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'invalidations': self.invalidations, 'hit_ratio': self.hits / requests if requests else 0.0,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _remove(self, key):
+        """
+        Removes an entry. Must be called holding the lock.
+        """
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+
+def normalize_statement(statement):
+    """
+    Collapses the blanks of a statement outside its quoted literals and removes its ending semicolon, so that
+    statements written differently share the same cache entry, but not statements with different literals.
+    """
+    statement = _LITERAL_OR_WHITESPACE.sub(lambda match: ' ' if match.group(2) else match.group(0), statement)
+    return statement.strip().rstrip(';').rstrip()
+
+
+def _words(statement):
+    """
+    Set of the words of a statement in lower case.
+    """
+    return frozenset(re.findall(r'[\w$]+', statement.lower()))
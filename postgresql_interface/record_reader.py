@@ -0,0 +1,141 @@
+import datetime
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+
+# valid outputs of RecordReader.read_rows()
+OUTPUTS = ('tuples', 'dicts', 'numpy', 'columns')
+
+# PostgreSQL type oids read into a numpy type. Integers with nulls are read as float64 and booleans with nulls as
+# objects, as pd.read_sql_query() does. Other types are read as objects
+_BOOLEAN_OID = 16
+_INTEGER_OIDS = {21: 'i2', 23: 'i4', 20: 'i8', 26: 'i8'}
+_FLOAT_OIDS = {700: 'f4', 701: 'f8'}
+_DATE_OID = 1082
+_TIMESTAMP_OID = 1114
+_TIMESTAMPTZ_OID = 1184
+
+
+class RecordReader:
+    """
+    Trait that converts the rows fetched from a psycopg2 cursor into python and numpy structures, without pandas:
+    - 'tuples': list with a tuple per row, as fetched
+    - 'dicts': list with a dictionary per row, with the names of the columns as keys
+    - 'numpy': numpy structured array with a field per column
+    - 'columns': dictionary with the name of each column as key and a numpy array with its values as value
+
+    For numpy arrays, the type of each column is taken from cursor.description: smallint, integer and bigint are read
+    as integers, or as float64 with NaN for nulls, real and double precision as floats, date as datetime64[D],
+    timestamp and timestamp with time zone, in UTC, as datetime64[us] with NaT for nulls, boolean as bool, or as
+    objects if there are nulls, and every other type as python objects.
+    """
+    @staticmethod
+    def read_rows(rows, description, output):
+        """
+        This method converts the rows of a query to output.
+
+        - Args:
+            rows: list of tuples fetched from the cursor
+            description: cursor.description of the query
+            output: 'tuples', 'dicts', 'numpy' or 'columns'
+
+        - Returns:
+            rows in the structure given by output
+
+        - Raises:
+            ValueError: if output is not valid
+        """
+        if output == 'tuples':
+            return rows
+        if output == 'dicts':
+            return RecordReader.create_dicts(rows, description)
+        if output == 'numpy':
+            return RecordReader.create_structured_array(rows, description)
+        if output == 'columns':
+            return RecordReader.create_columns(rows, description)
+        raise ValueError("No valid output has been provided to read rows.")
+
+    @staticmethod
+    def create_dicts(rows, description):
+        """
+        - Args:
+            rows: list of tuples fetched from the cursor
+            description: cursor.description of the query
+
+        - Returns:
+            List with a dictionary per row, with the names of the columns as keys
+        """
+        names = [col.name for col in description]
+        return [dict(zip(names, row)) for row in rows]
+
+    @staticmethod
+    def create_columns(rows, description):
+        """
+        - Args:
+            rows: list of tuples fetched from the cursor
+            description: cursor.description of the query
+
+        - Returns:
+            Dictionary with the name of each column as key and a numpy array with its values as value
+        """
+        values = list(zip(*rows)) if rows else [()] * len(description)
+        return {col.name: _column_array(column_values, col.type_code)
+                for col, column_values in zip(description, values)}
+
+    @staticmethod
+    def create_structured_array(rows, description):
+        """
+        - Args:
+            rows: list of tuples fetched from the cursor
+            description: cursor.description of the query
+
+        - Returns:
+            Numpy structured array with a record per row and a field per column
+
+        - Raises:
+            ValueError: if two columns have the same name
+        """
+        columns = RecordReader.create_columns(rows, description)
+        if len(columns) < len(description):
+            raise ValueError("Columns of a query read as a numpy array must have different names.")
+        array = np.empty(len(rows), dtype=[(name, values.dtype) for name, values in columns.items()])
+        for name, values in columns.items():
+            array[name] = values
+        return array
+
+
+def _column_array(values, type_code):
+    """
+    Converts the values of a column to a numpy array of the type of the column.
+
+    Args:
+        values: tuple with the values of the column, None for nulls.
+        type_code: oid of the PostgreSQL type of the column.
+
+    Returns:
+        numpy array, of objects if the values can not be converted, like 'infinity' dates.
+    """
+    has_nulls = any(value is None for value in values)
+    try:
+        if type_code == _BOOLEAN_OID and not has_nulls:
+            return np.array(values, dtype=bool)
+        if type_code in _INTEGER_OIDS:
+            if not has_nulls:
+                return np.array(values, dtype=_INTEGER_OIDS[type_code])
+            return np.array([np.nan if value is None else value for value in values], dtype='f8')
+        if type_code in _FLOAT_OIDS:
+            return np.array([np.nan if value is None else value for value in values], dtype=_FLOAT_OIDS[type_code])
+        if type_code == _DATE_OID:
+            return np.array(values, dtype='datetime64[D]')
+        if type_code == _TIMESTAMP_OID:
+            return np.array(values, dtype='datetime64[us]')
+        if type_code == _TIMESTAMPTZ_OID:
+            return np.array([value if value is None else value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                             for value in values], dtype='datetime64[us]')
+    except (TypeError, ValueError, OverflowError):
+        pass
+    # filled one by one, as values that are sequences, like arrays, would be broadcast otherwise
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
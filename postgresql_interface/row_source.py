@@ -0,0 +1,177 @@
+import collections.abc
+import itertools
+from postgresql_interface.lazy_import import lazy_import, is_loaded
+
+pd = lazy_import('pandas')
+
+# rows read at a time from an iterator of rows when no batch size is given
+STREAM_CHUNK_SIZE = 10000
+
+
+class RowSource:
+    """
+    Trait that reads the rows given to the write methods when they are not a dataframe. Valid inputs are:
+    - a dictionary with the name of each column as key and a list or numpy array with its values as value
+    - a list of dictionaries, one per row, with the names of the columns as keys. Missing keys are written as NULL
+    - a list of tuples or lists, one per row, with the values in the order of the columns given apart
+    - an iterator or generator of any of the rows above, which is consumed in chunks as it is written, so the whole
+      input never needs to be in memory
+
+    Columns are the ones given, or the keys of the first row if rows are dictionaries.
+    """
+    @staticmethod
+    def is_stream(data):
+        """
+        - Args:
+            data: rows given to a write method
+
+        - Returns:
+            True if data is an iterable of rows that has to be consumed in chunks, like a generator, as opposed to a
+            dataframe, a dictionary of columns or a list of rows
+        """
+        return not isinstance(data, (collections.abc.Mapping, collections.abc.Sized))
+
+    @staticmethod
+    def is_dataframe(data):
+        """
+        - Args:
+            data: rows given to a write method
+
+        - Returns:
+            True if data is a dataframe. pandas is not imported to know it, as no dataframe exists until it is
+        """
+        return is_loaded('pandas') and isinstance(data, pd.DataFrame)
+
+    @staticmethod
+    def count_rows(data):
+        """
+        - Args:
+            data: rows given to a write method
+
+        - Returns:
+            number of rows of data, or None if it is an iterable of rows, which is only known once it is consumed
+        """
+        if RowSource.is_dataframe(data):
+            return data.shape[0]
+        if isinstance(data, collections.abc.Mapping):
+            return len(next(iter(data.values()), ()))
+        if isinstance(data, collections.abc.Sized):
+            return len(data)
+        return None
+
+    @staticmethod
+    def create_dataframe(data, columns=None):
+        """
+        This method converts a dictionary of columns or a list of rows into a dataframe.
+
+        - Args:
+            data: dictionary of columns, or list of dictionaries, tuples or lists
+            columns: names of the columns. Needed if rows are not dictionaries. For a dictionary of columns, the
+                columns to use, in order
+
+        - Returns:
+            Dataframe with the rows of data
+
+        - Raises:
+            ValueError: if columns are needed and not given, or a row does not have as many values as columns
+        """
+        if isinstance(data, collections.abc.Mapping):
+            return pd.DataFrame(dict(data), columns=columns)
+        columns, rows = RowSource.read_rows(data, columns)
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    @staticmethod
+    def read_rows(rows, columns=None):
+        """
+        This method converts rows into tuples with the values in the order of the columns.
+
+        - Args:
+            rows: list of dictionaries, tuples or lists
+            columns: names of the columns. Needed if rows are not dictionaries
+
+        - Returns:
+            Tuple with the list of columns and a list with a tuple per row
+
+        - Raises:
+            ValueError: if columns are needed and not given, or a row does not have as many values as columns
+        """
+        rows = list(rows)
+        columns = _get_columns(rows[0] if rows else None, columns)
+        return columns, [_read_row(row, columns) for row in rows]
+
+    @staticmethod
+    def iter_chunks(rows, columns=None, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Generator that consumes an iterable of rows in chunks, converting each chunk as read_rows() does.
+
+        - Args:
+            rows: iterable of dictionaries, tuples or lists
+            columns: names of the columns. Needed if rows are not dictionaries
+            chunk_size: number of rows of each chunk, or a function called before each chunk that returns it
+
+        - Yields:
+            Tuple with the list of columns and a list with a tuple per row of the chunk
+
+        - Raises:
+            ValueError: if columns are needed and not given, or a row does not have as many values as columns
+        """
+        iterator = iter(rows)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size() if callable(chunk_size) else chunk_size))
+            if not chunk:
+                return
+            columns, chunk = RowSource.read_rows(chunk, columns)
+            yield columns, chunk
+
+    @staticmethod
+    def iter_dataframes(rows, columns=None, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Generator that consumes an iterable of rows in chunks, as iter_chunks() does, converting each chunk into a
+        dataframe.
+
+        - Args:
+            rows: iterable of dictionaries, tuples or lists
+            columns: names of the columns. Needed if rows are not dictionaries
+            chunk_size: number of rows of each chunk, or a function called before each chunk that returns it
+
+        - Yields:
+            Dataframe with the rows of each chunk
+
+        - Raises:
+            ValueError: if columns are needed and not given, or a row does not have as many values as columns
+        """
+        for columns, chunk in RowSource.iter_chunks(rows, columns, chunk_size):
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+
+
+def _get_columns(first_row, columns):
+    """
+    Returns:
+        list of the columns given, or of the keys of the first row if it is a dictionary.
+
+    Raises:
+        ValueError: if columns are not given and the first row is not a dictionary.
+    """
+    if columns is not None:
+        return list(columns)
+    if isinstance(first_row, collections.abc.Mapping):
+        return list(first_row.keys())
+    if first_row is None:
+        return []
+    raise ValueError("columns must be given when rows are not dictionaries.")
+
+
+def _read_row(row, columns):
+    """
+    Returns:
+        tuple with the values of a row in the order of the columns.
+
+    Raises:
+        ValueError: if the row does not have as many values as columns.
+    """
+    if isinstance(row, collections.abc.Mapping):
+        return tuple(row.get(col) for col in columns)
+    row = tuple(row)
+    if len(row) != len(columns):
+        raise ValueError("Row %r does not have a value for each of the columns %r." % (row, columns))
+    return row
@@ -1,5 +1,12 @@
+import re
 from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
 
+# a "'" followed somewhere after it by a ")" and a ";"
+_INJECTION_PATTERN = re.compile(r"'(?=.*\))(?=.*;)", re.DOTALL)
+# same pattern over the values of a column joined by _SEPARATOR, so that it does not look beyond a value
+_SEPARATOR = '\x00'
+_JOINED_INJECTION_PATTERN = re.compile(r"'(?=[^\x00]*\))(?=[^\x00]*;)")
+
 
 class SQLInjectionBodyguard:
     """
@@ -21,9 +28,60 @@ class SQLInjectionBodyguard:
         """
         if enabled:
             if type(string) == str:
-                my_string = string.upper().replace(" ", "")
-                if "'" in my_string:
-                    if (")" in my_string[my_string.find("'"):]) & (";" in my_string[my_string.find("'"):]):
-                        raise ErrorPossibleSQLInjectionDetected(
-                            "ERROR: A possible intent of SQL Injection has been found on field: '%s'. Insert operation "
-                            "interrupted. problematic value: '%s'" % (column, string))
+                if _INJECTION_PATTERN.search(string):
+                    raise ErrorPossibleSQLInjectionDetected(
+                        "ERROR: A possible intent of SQL Injection has been found on field: '%s'. Insert operation "
+                        "interrupted. problematic value: '%s'" % (column, string))
+
+    @staticmethod
+    def check_column_on_insert(values, column, enabled=True):
+        """
+        Methods that looks for a possible SQL Injection on all the values of a column at once, with the same rule
+        than check_string_on_insert(). Values that are not strings are not checked. All strings are joined and
+        searched in a single pass of a precompiled pattern, which is much faster than checking them one by one.
+        - Args:
+            values: sequence with the values of the column.
+            column: column name of the values. To indicate to user the problematic data.
+            enabled: if the check has to be executed, True. Otherwise, False
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected. The message has the first
+                problematic row, as a position in values.
+        """
+        if not enabled:
+            return
+
+        try:
+            joined = _SEPARATOR.join(values)
+        except TypeError:
+            values = [value if isinstance(value, str) else '' for value in values]
+            joined = _SEPARATOR.join(values)
+        if "'" not in joined:
+            return
+
+        if joined.count(_SEPARATOR) == len(values) - 1:
+            match = _JOINED_INJECTION_PATTERN.search(joined)
+            row = joined.count(_SEPARATOR, 0, match.start()) if match else None
+        else:
+            # some value contains the separator, so values are searched one by one
+            row = next((i for i, value in enumerate(values) if _INJECTION_PATTERN.search(value)), None)
+
+        if row is not None:
+            raise ErrorPossibleSQLInjectionDetected(
+                "ERROR: A possible intent of SQL Injection has been found on field: '%s', row %d. Insert operation "
+                "interrupted. problematic value: '%s'" % (column, row, values[row]))
+
+    @staticmethod
+    def check_column_names(columns, enabled=True):
+        """
+        Methods that looks for a possible SQL Injection on column names, to be called once per statement.
+        - Args:
+            columns: list of column names.
+            enabled: if the check has to be executed, True. Otherwise, False
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        if enabled:
+            for col in columns:
+                SQLInjectionBodyguard.check_string_on_insert(col, col)
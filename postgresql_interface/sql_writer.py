@@ -1,5 +1,21 @@
+import functools
 import numbers
 from postgresql_interface.sql_injection_bodyguard import SQLInjectionBodyguard
+from postgresql_interface.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# kinds of cell and the text written around their value by _wrap()
+_TEXT, _NUMBER, _NULL = 0, 1, 2
+_INSERT_PREFIX = (" '", ' ', ' NULL')
+_INSERT_SUFFIX = ("' ", ' ', '')
+_SET_PREFIX = (" '", ' NULL')
+_SET_SUFFIX = ("'", '')
+_WHERE_PREFIX = (" '", ' NULL ')
+_WHERE_SUFFIX = ("' ", '')
+# rows converted to text at a time, which bounds the size of the intermediate arrays of numpy strings
+_RENDER_CHUNK_SIZE = 65536
 
 
 class SQLWriter:
@@ -8,8 +24,14 @@ class SQLWriter:
 
     Current valid methods are:
     - INSERT INTO
+    - INSERT INTO ... ON CONFLICT
     - UPDATE
+    - UPDATE ... FROM
     - DELETE FROM
+    - DELETE FROM ... USING
+
+    Statements are built column-wise: every column is rendered once with vectorized operations and rows are put
+    together in a single pass at the end.
     """
     @staticmethod
     def create_insert_table_statement(table_name, df, truncate=False, sql_injection_check_enabled=True):
@@ -42,32 +64,22 @@ class SQLWriter:
             statement = ''
 
         statement += 'INSERT INTO %s (' % table_name
+        SQLInjectionBodyguard.check_column_names(df.columns.values.tolist(), enabled=sql_injection_check_enabled)
         for col in df.columns.values.tolist():
-            SQLInjectionBodyguard.check_string_on_insert(col, col, enabled=sql_injection_check_enabled)
             statement += ' %s,' % col
         statement = statement[:-1] + ') VALUES '
 
-        df.reset_index(drop=True, inplace=True)
-        nan_df = df.isna()
-        for index in df.index.values.tolist():
-            statement += ' ('
-            for column in df.columns.values.tolist():
-                if nan_df.loc[index, column]:
-                    statement += " NULL,"
-                else:
-                    if isinstance(df.loc[index, column], numbers.Number):
-                        statement += " %s ," % df.loc[index, column]
-                    elif isinstance(df.loc[index, column], str):
-                        SQLInjectionBodyguard.check_string_on_insert(
-                            df.loc[index, column], column, enabled=sql_injection_check_enabled)
-                        statement += " '%s' ," % df.loc[index, column]
-                    else:
-                        statement += " '%s' ," % df.loc[index, column]
-            statement = statement[:-1] + '),'
-
-        statement = statement[:-1] + ';'
+        if df.shape[0] == 0:
+            return statement[:-1] + ';'
 
-        return statement
+        parts = []
+        for i, column in enumerate(df.columns.values.tolist()):
+            texts, nulls, is_number = _render_column(df.iloc[:, i], column, sql_injection_check_enabled)
+            kinds = np.where(nulls, _NULL, np.where(is_number, _NUMBER, _TEXT))
+            parts += [',' if i > 0 else ' (', *_wrap(texts, kinds, _INSERT_PREFIX, _INSERT_SUFFIX)]
+        parts.append(')' if len(parts) > 1 else ' )')
+
+        return statement + _join_rows(df.shape[0], parts, separator=',') + ';'
 
     @staticmethod
     def create_update_table_statement(table_name, df, where_identifier, sql_injection_check_enabled=True):
@@ -114,49 +126,288 @@ class SQLWriter:
         - Raises:
             ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
         """
-        df.reset_index(drop=True, inplace=True)
+        # columns are matched case insensitively by their position, so df is neither renamed nor copied
+        positions = {col.upper(): i for i, col in enumerate(df.columns.values.tolist())}
+        where_identifier_upper = [col.upper() for col in where_identifier]
+
+        if df.shape[0] == 0:
+            return ''
+
+        to_update = [col for col in positions if col not in where_identifier_upper]
+        SQLInjectionBodyguard.check_column_names(
+            to_update + where_identifier_upper, enabled=sql_injection_check_enabled)
+
+        parts = [' UPDATE %s SET' % table_name]
+        for i, col in enumerate(to_update):
+            texts, nulls, _ = _render_column(df.iloc[:, positions[col]], col, sql_injection_check_enabled)
+            kinds = nulls.astype(np.intp)
+            parts += [',' if i > 0 else ' ', ' %s = ' % col, *_wrap(texts, kinds, _SET_PREFIX, _SET_SUFFIX)]
+
+        if where_identifier_upper.__len__() > 0:
+            parts.append(' WHERE ')
+            for j, col in enumerate(where_identifier_upper):
+                texts, nulls, _ = _render_column(df.iloc[:, positions[col]], col, sql_injection_check_enabled)
+                kinds = nulls.astype(np.intp)
+                parts += [' AND ' if j > 0 else '', ' %s = ' % col, *_wrap(texts, kinds, _WHERE_PREFIX, _WHERE_SUFFIX)]
+        parts.append('; ')
+
+        return _join_rows(df.shape[0], parts)
+
+    @staticmethod
+    def create_update_from_values_statement(table_name, df, where_identifier, column_types=None,
+                                            sql_injection_check_enabled=True):
+        """
+        This method returns a single set-based sql statement to update values in a table taking into account the
+        where_identifier. Rows of df are given as a VALUES list joined to the table.
+
+            WITH to_update = [col for col in df.columns if col not in where_identifier]
+                UPDATE table_name
+                SET to_update[0] = v.to_update[0],
+                    .
+                    .
+                    .
+                    to_update[n] = v.to_update[n]
+                FROM (VALUES (df.loc[0, column[0]], ... df.loc[0, column[n]]),
+                             .
+                             .
+                             .
+                             (df.loc[n, column[0]], ... df.loc[n, column[n]])) AS v (column[0], ... column[n])
+                WHERE table_name.where_identifier[0] = v.where_identifier[0]
+                      .
+                      .
+                      .
+                      AND table_name.where_identifier[n] = v.where_identifier[n];
+
+        Values on a VALUES list are typed as text, so column_types should be given for every column that is not a
+        string on the table. If several rows of df match the same row of the table, only one of them is applied.
+
+        - Args:
+            table_name: name of the table to update included schema
+            df: dataframe with the data to update in the table
+            where_identifier: list of columns to list on the where clause
+            column_types: dictionary with the sql type of the columns of the table, used to cast the values. Keys
+                are case insensitive. None to not cast values
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the UPDATE ... FROM (VALUES ...) sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        columns = [col.upper() for col in df.columns.values.tolist()]
+        values = '%s AS v (%s)' % (
+            _create_values_list(df, columns, sql_injection_check_enabled, prefix='(VALUES '), ', '.join(columns))
+
+        return SQLWriter._create_update_from_statement(
+            table_name, values, columns, where_identifier, column_types, sql_injection_check_enabled)
+
+    @staticmethod
+    def create_update_from_table_statement(table_name, source_table, columns, where_identifier,
+                                           sql_injection_check_enabled=True):
+        """
+        This method returns a single set-based sql statement to update values in a table from the rows of another
+        table, usually a staging table with the same column types, taking into account the where_identifier.
+
+            WITH to_update = [col for col in columns if col not in where_identifier]
+                UPDATE table_name
+                SET to_update[0] = v.to_update[0],
+                    .
+                    .
+                    .
+                    to_update[n] = v.to_update[n]
+                FROM source_table AS v
+                WHERE table_name.where_identifier[0] = v.where_identifier[0]
+                      .
+                      .
+                      .
+                      AND table_name.where_identifier[n] = v.where_identifier[n];
+
+        - Args:
+            table_name: name of the table to update included schema
+            source_table: name of the table with the new values
+            columns: list of columns of source_table
+            where_identifier: list of columns to list on the where clause
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the UPDATE ... FROM sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        columns = [col.upper() for col in columns]
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+
+        return SQLWriter._create_update_from_statement(
+            table_name, '%s AS v' % source_table, columns, where_identifier, None, sql_injection_check_enabled)
+
+    @staticmethod
+    def _create_update_from_statement(table_name, source, columns, where_identifier, column_types,
+                                      sql_injection_check_enabled):
+        """
+        Writes an UPDATE ... FROM statement given its source. See create_update_from_values_statement().
+
+        - Args:
+            table_name: name of the table to update included schema
+            source: FROM clause, which must be aliased as v
+            columns: list of upper case columns of the source
+            where_identifier: list of columns to list on the where clause
+            column_types: dictionary with the sql type of the columns of the table or None
+            sql_injection_check_enabled: allows to disable SQL Injection check
 
-        for col in df.columns:
-            df.rename(columns={col: col.upper()}, inplace=True)
+        - Returns:
+            String containing the UPDATE ... FROM sql statement
+        """
         where_identifier_upper = [col.upper() for col in where_identifier]
+        for col in where_identifier_upper:
+            if col not in columns:
+                raise KeyError(col)
+        casts = _create_casts(column_types, sql_injection_check_enabled)
 
-        nan_df = df.isna()
-        statement = ''
-        for i in df.index.values.tolist():
-            statement += ' UPDATE %s SET ' % table_name
-            for col in [col_y for col_y in df.columns.values.tolist() if col_y not in where_identifier_upper]:
-                SQLInjectionBodyguard.check_string_on_insert(col, col, enabled=sql_injection_check_enabled)
-                statement += " %s = " % col
-                if nan_df.loc[i, col]:
-                    statement += " NULL,"
-                else:
-                    SQLInjectionBodyguard.check_string_on_insert(
-                        df.loc[i, col], col, enabled=sql_injection_check_enabled)
-                    statement += " '%s'," % (df.loc[i, col])
-
-            statement = statement[:-1]
-
-            if where_identifier_upper.__len__() > 0:
-                statement += " WHERE "
-                for j in range(0, len(where_identifier_upper)):
-                    if j > 0:
-                        statement += ' AND '
-                    SQLInjectionBodyguard.check_string_on_insert(
-                        where_identifier_upper[j], where_identifier_upper[j], enabled=sql_injection_check_enabled)
-                    statement += " %s = " % where_identifier_upper[j]
-                    if nan_df.loc[i, where_identifier_upper[j]]:
-                        statement += " NULL "
-                    else:
-                        SQLInjectionBodyguard.check_string_on_insert(
-                            df.loc[i, where_identifier_upper[j]],
-                            where_identifier_upper[j],
-                            enabled=sql_injection_check_enabled
-                        )
-                        statement += " '%s' " % (df.loc[i, where_identifier_upper[j]])
-
-            statement += '; '
+        to_update = [col for col in columns if col not in where_identifier_upper]
+        return 'UPDATE %s SET %s FROM %s WHERE %s;' % (
+            table_name,
+            ', '.join(['%s = v.%s%s' % (col, col, casts.get(col, '')) for col in to_update]),
+            source,
+            _create_join_condition(table_name, where_identifier_upper, casts, sql_injection_check_enabled))
 
-        return statement
+    @staticmethod
+    def create_staging_table_statement(staging_table, table_name, columns, sql_injection_check_enabled=True,
+                                       temporary=True):
+        """
+        This method returns a sql statement to create an empty temporary table with some columns of a table, with
+        the same types but without constraints. The table is dropped at the end of the transaction.
+
+            CREATE TEMPORARY TABLE staging_table ON COMMIT DROP AS
+                SELECT columns[0], ... columns[n] FROM table_name WITH NO DATA;
+
+        With temporary=False the table is an unlogged table, visible from other connections, that must be dropped
+        explicitly:
+
+            CREATE UNLOGGED TABLE staging_table AS SELECT columns[0], ... columns[n] FROM table_name WITH NO DATA;
+
+        - Args:
+            staging_table: name of the temporary table
+            table_name: name of the table to take the columns from, included schema
+            columns: list of columns of table_name
+            sql_injection_check_enabled: allows to disable SQL Injection check
+            temporary: if False, an unlogged table is created instead of a temporary one
+
+        - Returns:
+            String containing the CREATE TEMPORARY TABLE sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        if temporary:
+            return 'CREATE TEMPORARY TABLE %s ON COMMIT DROP AS SELECT %s FROM %s WITH NO DATA;' % (
+                staging_table, ', '.join(columns), table_name)
+        return 'CREATE UNLOGGED TABLE %s AS SELECT %s FROM %s WITH NO DATA;' % (
+            staging_table, ', '.join(columns), table_name)
+
+    @staticmethod
+    def create_insert_from_table_statement(table_name, source_table, columns, truncate=False,
+                                           sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to insert into a table the rows of another one.
+
+            TRUNCATE TABLE table_name;  # only if truncate=True
+            INSERT INTO table_name (columns[0], ... columns[n]) SELECT columns[0], ... columns[n] FROM source_table;
+
+        - Args:
+            table_name: name of the table where data is going to be inserted, included schema
+            source_table: name of the table to read the rows from
+            columns: list of columns of both tables
+            truncate: if True, table_name is truncated first
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the INSERT INTO ... SELECT sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return '%sINSERT INTO %s (%s) SELECT %s FROM %s;' % (
+            'TRUNCATE TABLE %s; ' % table_name if truncate else '', table_name, ', '.join(columns),
+            ', '.join(columns), source_table)
+
+    @staticmethod
+    def create_merge_table_statement(table_name, df, conflict_columns, update_columns=None,
+                                     sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to insert new values into a table, updating the rows that already exist
+        with the same values on conflict_columns.
+
+            INSERT INTO table_name (df.column[0], df.column[1], ... df.column[n])
+                VALUES (df.loc[0, column[0]], df.loc[0, column[1]], ... df.loc[0, column[n]]),
+                       .
+                       .
+                       .
+                       (df.loc[n, column[0]], df.loc[n, column[1]], ... df.loc[n, column[n]])
+                ON CONFLICT (conflict_columns[0], ... conflict_columns[n])
+                DO UPDATE SET update_columns[0] = EXCLUDED.update_columns[0],
+                              .
+                              .
+                              .
+                              update_columns[n] = EXCLUDED.update_columns[n];
+
+        - Args:
+            table_name: name of the table where data is going to be merged, it must include the schema
+            df: dataframe of values to merge into the table
+            conflict_columns: list of columns with a unique constraint that identify a row
+            update_columns: list of columns to update on existing rows. None to update all columns of df that are not
+                on conflict_columns. When there is none, existing rows are left untouched (DO NOTHING)
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the INSERT INTO ... ON CONFLICT sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        statement = SQLWriter.create_insert_table_statement(
+            table_name, df, sql_injection_check_enabled=sql_injection_check_enabled)
+        return statement[:-1] + _create_on_conflict_clause(
+            df.columns.values.tolist(), conflict_columns, update_columns, sql_injection_check_enabled)
+
+    @staticmethod
+    def create_merge_from_table_statement(table_name, source_table, columns, conflict_columns, update_columns=None,
+                                          sql_injection_check_enabled=True):
+        """
+        This method returns a sql statement to merge all rows of source_table into a table, updating the rows that
+        already exist with the same values on conflict_columns.
+
+            INSERT INTO table_name (columns[0], ... columns[n])
+                SELECT columns[0], ... columns[n] FROM source_table
+                ON CONFLICT (conflict_columns[0], ... conflict_columns[n])
+                DO UPDATE SET update_columns[0] = EXCLUDED.update_columns[0],
+                              .
+                              .
+                              .
+                              update_columns[n] = EXCLUDED.update_columns[n];
+
+        - Args:
+            table_name: name of the table where data is going to be merged, it must include the schema
+            source_table: name of the table with the new values
+            columns: list of columns of source_table
+            conflict_columns: list of columns with a unique constraint that identify a row
+            update_columns: list of columns to update on existing rows. None to update all columns that are not on
+                conflict_columns. When there is none, existing rows are left untouched (DO NOTHING)
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the INSERT INTO ... SELECT ... ON CONFLICT sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+        return 'INSERT INTO %s (%s) SELECT %s FROM %s%s' % (
+            table_name, ', '.join(columns), ', '.join(columns), source_table,
+            _create_on_conflict_clause(columns, conflict_columns, update_columns, sql_injection_check_enabled))
 
     @staticmethod
     def create_delete_from_table_statement(table_name, df, sql_injection_check_enabled=True):
@@ -186,39 +437,380 @@ class SQLWriter:
         - Raises:
             ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
         """
-        df.reset_index(drop=True, inplace=True)
         if len(df.columns.to_list()) == 1:
             col = df.columns.to_list()[0]
-            nan_df = df.isna()
-            SQLInjectionBodyguard.check_string_on_insert(col, col, enabled=sql_injection_check_enabled)
+            SQLInjectionBodyguard.check_column_names([col], enabled=sql_injection_check_enabled)
             statement = 'DELETE FROM %s WHERE %s IN (' % (table_name, col)
-            for i in df.index.values.tolist():
-                if nan_df.loc[i, col]:
-                    statement += " NULL,"
-                else:
-                    SQLInjectionBodyguard.check_string_on_insert(
-                        df.loc[i, col], col, enabled=sql_injection_check_enabled)
-                    statement += " '%s'," % (df.loc[i, col])
-            statement = statement[:-1] + ')'
+            if df.shape[0] == 0:
+                return statement[:-1] + ')'
+            texts, nulls, _ = _render_column(df.iloc[:, 0], col, sql_injection_check_enabled)
+            kinds = nulls.astype(np.intp)
+            statement += _join_rows(
+                df.shape[0], _wrap(texts, kinds, _SET_PREFIX, _SET_SUFFIX), separator=',') + ')'
 
         else:
-            nan_df = df.isna()
             cols = df.columns.to_list()
-            statement = ''
-            for i in df.index.values.tolist():
-                statement += ' DELETE FROM %s WHERE ' % table_name
-                for j in range(0, len(cols)):
-                    if j > 0:
-                        statement += ' AND '
-                    SQLInjectionBodyguard.check_string_on_insert(
-                        cols[j], cols[j], enabled=sql_injection_check_enabled)
-                    statement += " %s = " % cols[j]
-                    if nan_df.loc[i, cols[j]]:
-                        statement += " NULL "
-                    else:
-                        SQLInjectionBodyguard.check_string_on_insert(
-                            df.loc[i, cols[j]], cols[j], enabled=sql_injection_check_enabled)
-                        statement += " '%s' " % (df.loc[i, cols[j]])
-                statement += '; '
+            if df.shape[0] == 0:
+                return ''
+            SQLInjectionBodyguard.check_column_names(cols, enabled=sql_injection_check_enabled)
+
+            parts = [' DELETE FROM %s WHERE ' % table_name]
+            for j in range(0, len(cols)):
+                texts, nulls, _ = _render_column(df.iloc[:, j], cols[j], sql_injection_check_enabled)
+                kinds = nulls.astype(np.intp)
+                parts += [' AND ' if j > 0 else '', ' %s = ' % cols[j],
+                          *_wrap(texts, kinds, _WHERE_PREFIX, _WHERE_SUFFIX)]
+            parts.append('; ')
+            statement = _join_rows(df.shape[0], parts)
 
         return statement
+
+    @staticmethod
+    def create_delete_row_values_statement(table_name, df, sql_injection_check_enabled=True):
+        """
+        This method returns a single sql statement to delete rows from a table, comparing the values of all the
+        columns of df at once with a row constructor.
+
+            DELETE FROM table_name WHERE (df.column[0], ... df.column[n])
+                IN ((df.loc[0, column[0]], ... df.loc[0, column[n]]),
+                    .
+                    .
+                    .
+                    (df.loc[n, column[0]], ... df.loc[n, column[n]]));
+
+        As in create_delete_from_table_statement(), rows with a null value never match any row of the table.
+
+        - Args:
+            table_name: name of the table to delete from included schema
+            df: dataframe with the columns of the table to be included on the where clause
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the DELETE FROM sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        columns = df.columns.values.tolist()
+        return 'DELETE FROM %s WHERE (%s) IN %s;' % (
+            table_name, ', '.join(columns), _create_values_list(df, columns, sql_injection_check_enabled, prefix='('))
+
+    @staticmethod
+    def create_delete_using_values_statement(table_name, df, column_types=None, sql_injection_check_enabled=True):
+        """
+        This method returns a single set-based sql statement to delete rows from a table. Rows of df are given as a
+        VALUES list joined to the table.
+
+            DELETE FROM table_name
+            USING (VALUES (df.loc[0, column[0]], ... df.loc[0, column[n]]),
+                          .
+                          .
+                          .
+                          (df.loc[n, column[0]], ... df.loc[n, column[n]])) AS v (column[0], ... column[n])
+            WHERE table_name.column[0] = v.column[0]
+                  .
+                  .
+                  .
+                  AND table_name.column[n] = v.column[n];
+
+        Values on a VALUES list are typed as text, so column_types should be given for every column that is not a
+        string on the table. Rows with a null value never match any row of the table.
+
+        - Args:
+            table_name: name of the table to delete from included schema
+            df: dataframe with the columns of the table to be included on the where clause
+            column_types: dictionary with the sql type of the columns of the table, used to cast the values. Keys
+                are case insensitive. None to not cast values
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the DELETE FROM ... USING sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        columns = [col.upper() for col in df.columns.values.tolist()]
+        values = '%s AS v (%s)' % (
+            _create_values_list(df, columns, sql_injection_check_enabled, prefix='(VALUES '), ', '.join(columns))
+        return 'DELETE FROM %s USING %s WHERE %s;' % (
+            table_name, values, _create_join_condition(
+                table_name, columns, _create_casts(column_types, sql_injection_check_enabled),
+                sql_injection_check_enabled))
+
+    @staticmethod
+    def create_delete_using_table_statement(table_name, source_table, columns, sql_injection_check_enabled=True):
+        """
+        This method returns a single set-based sql statement to delete the rows of a table that match the rows of
+        another table, usually a staging table with the same column types.
+
+            DELETE FROM table_name
+            USING source_table AS v
+            WHERE table_name.columns[0] = v.columns[0]
+                  .
+                  .
+                  .
+                  AND table_name.columns[n] = v.columns[n];
+
+        - Args:
+            table_name: name of the table to delete from included schema
+            source_table: name of the table with the rows to delete
+            columns: list of columns of source_table to include on the where clause
+            sql_injection_check_enabled: allows to disable SQL Injection check
+
+        - Returns:
+            String containing the DELETE FROM ... USING sql statement
+
+        - Raises:
+            ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+        """
+        columns = [col.upper() for col in columns]
+        return 'DELETE FROM %s USING %s AS v WHERE %s;' % (
+            table_name, source_table, _create_join_condition(table_name, columns, {}, sql_injection_check_enabled))
+
+
+def _render_column(series, column, sql_injection_check_enabled):
+    """
+    Renders every value of a column as it has to be written in a sql statement, i.e. as str(value). Values are
+    rendered according to the dtype of the column, so each column is processed in one go instead of cell by cell.
+
+    Args:
+        series: column of the dataframe to render.
+        column: name of the column. To indicate to user the problematic data on a possible SQL Injection.
+        sql_injection_check_enabled: allows to disable SQL Injection check.
+
+    Returns:
+        texts: numpy array of objects with the rendered values. Null values are rendered as an empty string.
+        nulls: numpy array of booleans, True where the value is null.
+        is_number: numpy array of booleans, True where the value is a number and so it can be written without quotes.
+
+    Raises:
+        ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+    """
+    n_rows = series.shape[0]
+    nulls = np.asarray(series.isna(), dtype=bool)
+    dtype = series.dtype
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+        texts = _to_str_objects(series.to_numpy())
+        is_number = np.ones(n_rows, dtype=bool)
+    elif isinstance(dtype, np.dtype) and dtype.kind == 'b':
+        texts = np.where(series.to_numpy(), 'True', 'False').astype(object)
+        is_number = np.zeros(n_rows, dtype=bool)
+    elif isinstance(dtype, np.dtype) and dtype.kind == 'M':
+        texts = _render_datetimes(series.to_numpy(), nulls)
+        is_number = np.zeros(n_rows, dtype=bool)
+    elif isinstance(dtype, pd.StringDtype):
+        texts = series.to_numpy(dtype=object, na_value='')
+        is_number = np.zeros(n_rows, dtype=bool)
+        SQLInjectionBodyguard.check_column_on_insert(texts, column, enabled=sql_injection_check_enabled)
+    else:
+        # values are taken as the scalars that df.loc would return, so they are rendered exactly alike
+        if dtype == object or isinstance(dtype, pd.CategoricalDtype):
+            values = np.asarray(series)
+        else:
+            values = series.array
+        texts = np.empty(n_rows, dtype=object)
+        is_number = np.zeros(n_rows, dtype=bool)
+        is_string = np.zeros(n_rows, dtype=bool)
+        type_kinds = {}
+        for i, (value, null) in enumerate(zip(values, nulls)):
+            if null:
+                continue
+            value_type = type(value)
+            if value_type not in type_kinds:
+                type_kinds[value_type] = (isinstance(value, str), isinstance(value, numbers.Number))
+            is_string[i], is_number[i] = type_kinds[value_type]
+            texts[i] = '%s' % (value,)
+        if is_string.any():
+            SQLInjectionBodyguard.check_column_on_insert(
+                np.where(is_string, texts, ''), column, enabled=sql_injection_check_enabled)
+
+    texts[nulls] = ''
+    return texts, nulls, is_number
+
+
+def _create_values_list(df, columns, sql_injection_check_enabled, prefix):
+    """
+    Writes the rows of df as a list of row constructors, as used by VALUES or IN, with every value quoted.
+
+    Args:
+        df: dataframe with the rows to write.
+        columns: names of the columns of df, to be checked and to indicate to user the problematic data.
+        sql_injection_check_enabled: allows to disable SQL Injection check.
+        prefix: string written before the list, e.g. "(VALUES ".
+
+    Returns:
+        String with prefix, the list of rows and a closing parenthesis.
+
+    Raises:
+        ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+    """
+    SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+
+    parts = []
+    for i, col in enumerate(columns):
+        texts, nulls, _ = _render_column(df.iloc[:, i], col, sql_injection_check_enabled)
+        kinds = nulls.astype(np.intp)
+        parts += [', ' if i > 0 else '(', *_wrap(texts, kinds, _SET_PREFIX, _SET_SUFFIX)]
+    parts.append(')')
+    return prefix + _join_rows(df.shape[0], parts, separator=',') + ')'
+
+
+def _create_casts(column_types, sql_injection_check_enabled):
+    """
+    Args:
+        column_types: dictionary with the sql type of the columns of a table or None.
+        sql_injection_check_enabled: allows to disable SQL Injection check.
+
+    Returns:
+        dictionary with the upper case name of each column as key and its cast, e.g. "::integer", as value.
+
+    Raises:
+        ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+    """
+    casts = {}
+    for col, sql_type in (column_types or {}).items():
+        SQLInjectionBodyguard.check_string_on_insert(sql_type, col, enabled=sql_injection_check_enabled)
+        casts[col.upper()] = '::%s' % sql_type
+    return casts
+
+
+def _create_join_condition(table_name, columns, casts, sql_injection_check_enabled):
+    """
+    Writes the condition that joins table_name to a source aliased as v on the given columns.
+
+    Args:
+        table_name: name of the table included schema.
+        columns: list of upper case columns to join on.
+        casts: dictionary with the cast to apply to each column of v, see _create_casts().
+        sql_injection_check_enabled: allows to disable SQL Injection check.
+
+    Returns:
+        String with the condition, TRUE if there are no columns.
+
+    Raises:
+        ErrorPossibleSQLInjectionDetected: if a possible SQL injection is detected
+    """
+    SQLInjectionBodyguard.check_column_names(columns, enabled=sql_injection_check_enabled)
+    return ' AND '.join(
+        ['%s.%s = v.%s%s' % (table_name, col, col, casts.get(col, '')) for col in columns]) or 'TRUE'
+
+
+def _create_on_conflict_clause(columns, conflict_columns, update_columns, sql_injection_check_enabled):
+    """
+    Writes the ON CONFLICT clause of a merge, ended with ';'. Columns are compared case insensitively, as PostgreSQL
+    does with unquoted names.
+
+    Args:
+        columns: list of columns being inserted.
+        conflict_columns: list of columns that identify a row.
+        update_columns: list of columns to update on conflict, or None for all columns not on conflict_columns.
+        sql_injection_check_enabled: allows to disable SQL Injection check.
+
+    Returns:
+        String with the ON CONFLICT clause.
+    """
+    conflict_upper = [col.upper() for col in conflict_columns]
+    if update_columns is None:
+        update_columns = [col for col in columns if col.upper() not in conflict_upper]
+    SQLInjectionBodyguard.check_column_names(
+        list(conflict_columns) + list(update_columns), enabled=sql_injection_check_enabled)
+
+    clause = ' ON CONFLICT (%s)' % ', '.join(conflict_columns)
+    if len(update_columns) == 0:
+        return clause + ' DO NOTHING;'
+    return clause + ' DO UPDATE SET %s;' % ', '.join(['%s = EXCLUDED.%s' % (col, col) for col in update_columns])
+
+
+@functools.lru_cache(maxsize=None)
+def _affixes(texts):
+    """
+    Returns:
+        array of objects with texts, built once, so that indexing it by kind gives back references to the same
+        strings instead of new ones.
+    """
+    return np.array(texts, dtype=object)
+
+
+def _wrap(texts, kinds, prefix, suffix):
+    """
+    Returns:
+        list with the text written before each value, given by its kind, the values and the text written after
+        them, as parts of _join_rows().
+    """
+    return [_affixes(prefix)[kinds], texts, _affixes(suffix)[kinds]]
+
+
+def _join_rows(n_rows, parts, separator=''):
+    """
+    Puts together the rows of a statement in a single join.
+
+    Args:
+        n_rows: number of rows.
+        parts: list with the pieces of a row, in order. Each one is either a string, common to all rows, or a numpy
+            array with one string per row.
+        separator: string written between rows.
+
+    Returns:
+        String with all the rows.
+    """
+    merged = []
+    for part in parts:
+        if isinstance(part, str) and merged and isinstance(merged[-1], str):
+            merged[-1] += part
+        else:
+            merged.append(part)
+
+    # rows are joined a chunk at a time, so the array of pieces is never of the size of the whole statement
+    chunks = []
+    for start in range(0, n_rows, _RENDER_CHUNK_SIZE):
+        stop = min(start + _RENDER_CHUNK_SIZE, n_rows)
+        pieces = np.empty((stop - start, len(merged) + 1), dtype=object)
+        pieces[:, 0] = separator
+        if start == 0:
+            pieces[0, 0] = ''
+        for j, part in enumerate(merged):
+            pieces[:, j + 1] = part if isinstance(part, str) else part[start:stop]
+        chunks.append(''.join(pieces.ravel().tolist()))
+    return ''.join(chunks)
+
+
+def _render_datetimes(values, nulls):
+    """
+    Renders a datetime64 array as pandas.Timestamp does, i.e. "YYYY-MM-DD HH:MM:SS" plus fractions of second when
+    there are any.
+
+    Args:
+        values: numpy array of datetime64.
+        nulls: numpy array of booleans, True where the value is NaT.
+
+    Returns:
+        numpy array of objects with the rendered values.
+    """
+    if values.size == 0:
+        return np.empty(0, dtype=object)
+    seconds = values.astype('datetime64[s]')
+    texts = np.empty(values.shape[0], dtype=object)
+    for start in range(0, values.shape[0], _RENDER_CHUNK_SIZE):
+        chunk = seconds[start:start + _RENDER_CHUNK_SIZE]
+        texts[start:start + _RENDER_CHUNK_SIZE] = np.char.replace(np.datetime_as_string(chunk, unit='s'), 'T', ' ')
+    for i in np.flatnonzero((seconds != values) & ~nulls):
+        texts[i] = str(pd.Timestamp(values[i]))
+    return texts
+
+
+def _to_str_objects(values):
+    """
+    Converts a numpy array to an array of python strings as values.astype(str) does, a chunk of rows at a time, so
+    that the intermediate array of fixed-width numpy strings is never of the size of the whole column.
+
+    Args:
+        values: numpy array of numbers.
+
+    Returns:
+        numpy array of objects with the rendered values.
+    """
+    texts = np.empty(values.shape[0], dtype=object)
+    for start in range(0, values.shape[0], _RENDER_CHUNK_SIZE):
+        texts[start:start + _RENDER_CHUNK_SIZE] = values[start:start + _RENDER_CHUNK_SIZE].astype(str)
+    return texts
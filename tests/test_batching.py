@@ -0,0 +1,61 @@
+from postgresql_interface.batching import AdaptiveBatchSizer
+import pytest
+
+
+def test_size_grows_while_batches_are_fast():
+    """
+    GIVEN an AdaptiveBatchSizer
+    WHEN batches are much faster than target_seconds
+    THEN check that the size grows, at most by max_growth each time
+    """
+    sizer = AdaptiveBatchSizer(initial_size=1000, target_seconds=1.0, max_growth=2.0)
+    sizer.record(1000, 0.01, 50000)
+    assert sizer.next_size() == 2000
+    sizer.record(2000, 0.02, 100000)
+    assert sizer.next_size() == 4000
+
+
+def test_size_shrinks_when_batches_are_slow():
+    """
+    GIVEN an AdaptiveBatchSizer
+    WHEN a batch takes longer than target_seconds
+    THEN check that the size shrinks to meet target_seconds
+    """
+    sizer = AdaptiveBatchSizer(initial_size=1000, target_seconds=1.0)
+    sizer.record(1000, 4.0, 50000)
+    assert sizer.next_size() == 250
+
+
+def test_size_limited_by_statement_bytes():
+    """
+    GIVEN an AdaptiveBatchSizer with a max_bytes
+    WHEN batches are fast but their statements are big
+    THEN check that the size is limited by max_bytes
+    """
+    sizer = AdaptiveBatchSizer(initial_size=1000, max_bytes=100000)
+    sizer.record(1000, 0.01, 200000)
+    assert sizer.next_size() == 500
+
+
+def test_size_within_bounds():
+    """
+    GIVEN an AdaptiveBatchSizer with min_size and max_size
+    WHEN measurements push the size out of them
+    THEN check that the size stays within bounds
+    """
+    sizer = AdaptiveBatchSizer(initial_size=200, min_size=100, max_size=300)
+    sizer.record(200, 100.0, 1000)
+    assert sizer.next_size() == 100
+    sizer = AdaptiveBatchSizer(initial_size=200, min_size=100, max_size=300)
+    sizer.record(200, 0.001, 1000)
+    assert sizer.next_size() == 300
+
+
+def test_wrong_sizes():
+    """
+    GIVEN incoherent sizes
+    WHEN an AdaptiveBatchSizer is created
+    THEN check that ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        AdaptiveBatchSizer(initial_size=10, min_size=100)
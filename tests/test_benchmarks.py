@@ -0,0 +1,35 @@
+from benchmarks import datasets
+from benchmarks.run import run, compare
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('name', list(datasets.GENERATORS))
+def test_generators(name):
+    """
+    GIVEN a dataset generator
+    WHEN a dataset is generated twice with the same seed
+    THEN check that it has the rows asked for and is the same both times
+    """
+    df = datasets.GENERATORS[name](50)
+
+    assert df.shape[0] == 50
+    assert df['id'].is_unique
+    pd.testing.assert_frame_equal(df, datasets.GENERATORS[name](50))
+
+
+def test_run_offline_and_compare():
+    """
+    GIVEN small datasets
+    WHEN offline benchmarks are run and compared with a faster baseline
+    THEN check that every writer is timed and the slower results are reported as regressions
+    """
+    report = run(sizes=[20], dataset_names=['numeric', 'string'], repeat=1, end_to_end=False, log=lambda line: None)
+    baseline = {'results': [dict(result, seconds=result['seconds'] / 10) for result in report['results']]}
+
+    operations = {(result['dataset'], result['operation']) for result in report['results']}
+    assert ('numeric', 'create_insert_table_statement') in operations
+    assert ('string', 'check_column_on_insert') in operations
+    assert ('numeric', 'check_column_on_insert') not in operations
+    assert len(compare(baseline, report)) == len(report['results'])
+    assert compare(report, report) == []
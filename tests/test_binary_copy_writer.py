@@ -0,0 +1,86 @@
+from postgresql_interface.binary_copy_writer import BinaryCopyWriter, BOOL, INT4, INT8, FLOAT8, TEXT, DATE, TIMESTAMP, \
+    TIMESTAMPTZ
+from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
+import pandas as pd
+import numpy as np
+import datetime as dt
+import struct
+import pytest
+
+
+def test_create_copy_from_statement():
+    """
+    GIVEN a table name and a list of columns
+    WHEN BinaryCopyWriter.create_copy_from_statement() is called
+    THEN check that the COPY FROM STDIN statement asks for binary format and that column names are checked
+    """
+    statement = BinaryCopyWriter.create_copy_from_statement('test.simple', ['id', 'name'])
+
+    assert statement == 'COPY test.simple (id, name) FROM STDIN WITH (FORMAT binary)'
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        BinaryCopyWriter.create_copy_from_statement('test.simple', ["id) VALUES ('1'); DROP TABLE test.simple; --"])
+
+
+def test_copy_buffer_content():
+    """
+    GIVEN a dataframe of integers, floats, booleans, strings and timestamps with nulls
+    WHEN it is encoded with BinaryCopyWriter.create_copy_buffer()
+    THEN check that the content is byte by byte the COPY binary format of PostgreSQL
+    """
+    df = pd.DataFrame.from_dict({'id': [1, 2],
+                                 'amount': [1.5, np.nan],
+                                 'activated': [True, False],
+                                 'name': ['Ünï', None],
+                                 'date': pd.to_datetime(['2000-01-02', None]),
+                                 'created_at': pd.to_datetime([pd.Timestamp('1999-12-31 23:59:59.000001'),
+                                                               pd.Timestamp('2000-01-01 00:00:00')])})
+    column_types = {'ID': INT4, 'AMOUNT': FLOAT8, 'ACTIVATED': BOOL, 'NAME': TEXT, 'DATE': DATE,
+                    'CREATED_AT': TIMESTAMP}
+    encoders = BinaryCopyWriter.get_column_encoders(df, column_types)
+    content = BinaryCopyWriter.create_copy_buffer(df, encoders, chunk_size=1).read()
+
+    assert content == (b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+                       + struct.pack('>h', 6)
+                       + struct.pack('>ii', 4, 1) + struct.pack('>id', 8, 1.5) + struct.pack('>i?', 1, True)
+                       + struct.pack('>i', 5) + 'Ünï'.encode('utf-8') + struct.pack('>ii', 4, 1)
+                       + struct.pack('>iq', 8, -999999)
+                       + struct.pack('>h', 6)
+                       + struct.pack('>ii', 4, 2) + struct.pack('>i', -1) + struct.pack('>i?', 1, False)
+                       + struct.pack('>i', -1) + struct.pack('>i', -1) + struct.pack('>iq', 8, 0)
+                       + struct.pack('>h', -1))
+
+
+def test_timestamp_with_time_zone_and_integral_floats():
+    """
+    GIVEN timestamps with time zone and floats with integral values
+    WHEN they are encoded for timestamp with time zone and bigint columns
+    THEN check that timestamps are written in UTC and floats as integers
+    """
+    df = pd.DataFrame.from_dict({'created_at': pd.to_datetime(['2000-01-01 01:00:00']).tz_localize('Europe/Madrid'),
+                                 'quantity': [2.0 ** 62]})
+    encoders = BinaryCopyWriter.get_column_encoders(df, {'CREATED_AT': TIMESTAMPTZ, 'QUANTITY': INT8})
+    content = BinaryCopyWriter.create_copy_buffer(df, encoders).read()
+
+    assert content[19:-2] == struct.pack('>h', 2) + struct.pack('>iq', 8, 0) + struct.pack('>iq', 8, 2 ** 62)
+
+
+@pytest.mark.parametrize("values, type_oid", [
+    ([1.5, 2.0], INT4),
+    ([2 ** 31, 1], INT4),
+    (pd.to_datetime(['2000-01-01 12:00:00']), DATE),
+    (pd.to_datetime(['2000-01-01 00:00:00.000000001']), TIMESTAMP),
+    (pd.to_datetime(['2000-01-01']), TIMESTAMPTZ),
+    (pd.to_datetime(['2000-01-01']).tz_localize('UTC'), TIMESTAMP),
+    ([dt.date(2020, 1, 1)], DATE),
+    ([1, 2], TEXT),
+    ([1, 2], None),
+])
+def test_unsupported_columns(values, type_oid):
+    """
+    GIVEN a column that can not be written exactly in binary format into a column of a type
+    WHEN BinaryCopyWriter.get_column_encoders() is called
+    THEN check that None is returned, so the dataframe is loaded in text format
+    """
+    df = pd.DataFrame.from_dict({'id': [1] * len(values), 'value': values})
+
+    assert BinaryCopyWriter.get_column_encoders(df, {'ID': INT4, 'VALUE': type_oid}) is None
@@ -0,0 +1,105 @@
+import time
+import pytest
+from postgresql_interface.postgresql_interface import postgres_sql_connector_factory
+from postgresql_interface.custom_errors import ErrorConnectionPool
+
+
+@pytest.fixture(scope='function')
+def pooled_conn(create_env_variables_gcp):
+    db_conn = postgres_sql_connector_factory(vendor='gcp', **create_env_variables_gcp)
+    db_conn.open_pool(min_size=1, max_size=2, timeout=0.5)
+
+    yield db_conn
+
+    db_conn.close()
+
+
+def test_connection_is_reused(pooled_conn):
+    """
+    GIVEN a connector with a connection pool
+    WHEN several queries are run one after the other
+    THEN check that all of them are served by the same database backend
+    """
+    first_pid = pooled_conn.query("SELECT pg_backend_pid() AS pid").loc[0, 'pid']
+    pooled_conn.execute("SELECT 1")
+    second_pid = pooled_conn.query("SELECT pg_backend_pid() AS pid").loc[0, 'pid']
+
+    assert first_pid == second_pid
+    assert pooled_conn._pool.size == 1
+
+
+def test_pool_exhausted(pooled_conn):
+    """
+    GIVEN a connector with a connection pool of max_size 2
+    WHEN the two connections are borrowed and a third one is requested
+    THEN check that ErrorConnectionPool is raised after the timeout
+    """
+    pool = pooled_conn._pool
+    conns = [pool.getconn(), pool.getconn()]
+    with pytest.raises(ErrorConnectionPool):
+        pool.getconn()
+    for conn in conns:
+        pool.putconn(conn)
+
+    assert pool.size == 2
+    assert pool.idle == 2
+
+
+def test_broken_connection_is_replaced(pooled_conn):
+    """
+    GIVEN a connector with a connection pool
+    WHEN an idle connection gets broken
+    THEN check that the health check replaces it and methods keep working
+    """
+    pool = pooled_conn._pool
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.close()
+
+    assert pooled_conn.query("SELECT 1 AS one").loc[0, 'one'] == 1
+    assert pool.size == 1
+
+
+def test_max_lifetime(pooled_conn):
+    """
+    GIVEN a connector with a connection pool with a short max_lifetime
+    WHEN a connection outlives it
+    THEN check that it is closed when given back
+    """
+    pool = pooled_conn._pool
+    pool.max_lifetime = 0.01
+    conn = pool.getconn()
+    time.sleep(0.05)
+    pool.putconn(conn)
+
+    assert conn.closed
+    assert pool.size == 0
+
+
+def test_failed_statement_is_rolled_back(pooled_conn):
+    """
+    GIVEN a connector with a connection pool
+    WHEN a statement fails
+    THEN check that the connection goes back to the pool usable
+    """
+    with pytest.raises(Exception):
+        pooled_conn.execute("SELECT * FROM table_that_does_not_exist")
+
+    assert pooled_conn.query("SELECT 1 AS one").loc[0, 'one'] == 1
+    assert pooled_conn._pool.size == 1
+
+
+def test_close(create_env_variables_gcp):
+    """
+    GIVEN a connector with a connection pool
+    WHEN it is closed
+    THEN check that connections are closed and new calls open their own connection
+    """
+    db_conn = postgres_sql_connector_factory(vendor='gcp', **create_env_variables_gcp)
+    with db_conn:
+        pool = db_conn.open_pool(min_size=2, max_size=2)
+        idle = list(pool._idle)
+
+    assert pool.closed
+    assert all(entry.conn.closed for entry in idle)
+    assert db_conn.query("SELECT 1 AS one").loc[0, 'one'] == 1
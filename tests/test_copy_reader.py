@@ -0,0 +1,75 @@
+from postgresql_interface.copy_reader import CopyReader
+from postgresql_interface import copy_reader
+from collections import namedtuple
+import pandas as pd
+import datetime as dt
+import io
+import pytest
+
+Column = namedtuple('Column', ['name', 'type_code'])
+
+
+def test_create_copy_to_statement():
+    """
+    GIVEN a query ended with a semicolon
+    WHEN CopyReader.create_copy_to_statement() is called
+    THEN check that the COPY TO STDOUT statement is correct
+    """
+    statement = CopyReader.create_copy_to_statement('SELECT * FROM test.simple; ')
+
+    assert statement == "COPY (SELECT * FROM test.simple) TO STDOUT WITH (FORMAT csv, NULL '\\N')"
+
+
+def test_read_copy_buffer():
+    """
+    GIVEN CSV data written by COPY TO STDOUT with nulls, empty strings and numbers as text
+    WHEN CopyReader.read_copy_buffer() is called
+    THEN check that columns get the types of the query and nulls are told apart from empty strings
+    """
+    description = [Column('id', 23), Column('name', 25), Column('activated', 16), Column('date', 1082)]
+    buffer = io.BytesIO(b'1,007,t,2020-01-01\n2,"",f,\\N\n3,\\N,t,2020-03-03\n')
+
+    df = CopyReader.read_copy_buffer(buffer, description)
+
+    assert df.columns.tolist() == ['id', 'name', 'activated', 'date']
+    assert df['id'].tolist() == [1, 2, 3]
+    assert df['name'].tolist()[:2] == ['007', '']
+    assert pd.isna(df.loc[2, 'name'])
+    assert df['activated'].dtype == bool
+    assert df['date'].tolist() == [dt.date(2020, 1, 1), None, dt.date(2020, 3, 3)]
+
+
+def test_read_copy_buffer_empty():
+    """
+    GIVEN no CSV data
+    WHEN CopyReader.read_copy_buffer() is called
+    THEN check that an empty dataframe with the columns of the query is returned
+    """
+    df = CopyReader.read_copy_buffer(io.BytesIO(b''), [Column('id', 23)])
+
+    assert df.shape == (0, 1)
+    assert df.columns.tolist() == ['id']
+
+
+# the format of the installed pandas reads values with and without fractional seconds. Without a format, as before
+# pandas 2.0, the installed pandas infers it from the first value, so values share it
+@pytest.mark.parametrize('without_format, data', [
+    (False, b'2020-01-01 10:00:00,2020-01-01 10:00:00.5+01\n2020-01-02 11:30:00.25,\\N\n'),
+    (True, b'2020-01-01 10:00:00,2020-01-01 10:00:00+01\n2020-01-02 11:30:00,\\N\n')])
+def test_read_copy_buffer_timestamps(without_format, data, monkeypatch):
+    """
+    GIVEN CSV data with timestamps with and without time zone
+    WHEN CopyReader.read_copy_buffer() is called, with the format for the installed pandas and without one
+    THEN check that timestamps are read as datetimes
+    """
+    if without_format:
+        monkeypatch.setattr(copy_reader, '_timestamp_format', lambda: None)
+    description = [Column('created', 1114), Column('updated', 1184)]
+
+    df = CopyReader.read_copy_buffer(io.BytesIO(data), description)
+
+    assert pd.api.types.is_datetime64_any_dtype(df['created'])
+    assert df.loc[1, 'created'].minute == 30
+    assert str(df['updated'].dt.tz) == 'UTC'
+    assert df.loc[0, 'updated'].hour == 9
+    assert pd.isna(df.loc[1, 'updated'])
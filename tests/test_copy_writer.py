@@ -0,0 +1,64 @@
+from postgresql_interface.copy_writer import CopyWriter, CopyBuffer
+from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+
+def test_create_copy_from_statement():
+    """
+    GIVEN a table name and a list of columns
+    WHEN CopyWriter.create_copy_from_statement() is called
+    THEN check that the COPY FROM STDIN statement is correct
+    """
+    statement = CopyWriter.create_copy_from_statement('test.simple', ['id', 'name'])
+
+    assert statement == 'COPY test.simple (id, name) FROM STDIN'
+
+
+def test_create_copy_from_statement_injection():
+    """
+    GIVEN a column name that tries to do an SQL Injection
+    WHEN CopyWriter.create_copy_from_statement() is called
+    THEN the SQL Injection should be detected
+    """
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        CopyWriter.create_copy_from_statement('test.simple', ["id) VALUES ('1'); DROP TABLE test.simple; --"])
+
+
+def test_copy_buffer_content():
+    """
+    GIVEN a dataframe with nulls, special characters and different types
+    WHEN it is rendered with CopyWriter.create_copy_buffer()
+    THEN check that the content follows COPY text format
+    """
+    df = pd.DataFrame.from_dict({'id': [1, 2, 3],
+                                 'amount': [1.0, np.nan, 2.5],
+                                 'name': ['Mer\tcedes', None, "O'Brien\\n"],
+                                 'activated': [True, False, True],
+                                 'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2), None]})
+
+    content = CopyWriter.create_copy_buffer(df, chunk_size=2).read()
+
+    assert content == ("1\t1\tMer\\tcedes\tTrue\t2020-01-01\n"
+                       "2\t\\N\t\\N\tFalse\t2020-02-02\n"
+                       "3\t2.5\tO'Brien\\\\n\tTrue\t\\N\n")
+
+
+def test_copy_buffer_read_by_size():
+    """
+    GIVEN a CopyBuffer built from several chunks
+    WHEN it is read by small pieces
+    THEN check that the pieces put together give back the whole content
+    """
+    chunks = ['abc', 'defgh', '', 'ij']
+    buffer = CopyBuffer(chunks)
+
+    pieces = []
+    piece = buffer.read(4)
+    while piece:
+        pieces.append(piece)
+        piece = buffer.read(4)
+
+    assert pieces == ['abcd', 'efgh', 'ij']
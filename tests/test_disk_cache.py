@@ -0,0 +1,222 @@
+from postgresql_interface.disk_cache import DiskCache
+import pandas as pd
+import numpy as np
+import datetime as dt
+import decimal
+import pytest
+import shutil
+import time
+import uuid
+
+
+@pytest.fixture(scope='function')
+def result():
+    return pd.DataFrame({
+        'id': np.arange(3, dtype='int64'), 'price': [1.5, np.nan, 3.0], 'activated': [True, False, True],
+        'created': pd.to_datetime(['2020-01-01', '2020-02-02', None]),
+        'updated': pd.to_datetime(['2020-01-01 10:00', '2020-02-02 11:00', '2020-03-03 12:00']).tz_localize(
+            'Europe/Madrid'),
+        'name': pd.Series(['Mercedes', None, 'Suzuki'], dtype='str'), 'quantity': pd.array([1, None, 3], dtype='Int64'),
+        'date': [dt.date(2020, 1, 1), None, dt.date(2020, 3, 3)]})
+
+
+def _is_mapped(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+
+def test_round_trip(tmp_path, result):
+    """
+    GIVEN a result stored on disk as .npy files
+    WHEN it is read, by another object on the same directory, and changed by the caller
+    THEN check that it is equal to the one stored, numbers are memory-mapped, and the files are not changed
+    """
+    DiskCache(tmp_path, file_format='npy').put('SELECT * FROM test.simple;', result)
+    cache = DiskCache(tmp_path, file_format='npy')
+
+    df = cache.get('SELECT *\n  FROM test.simple')
+    pd.testing.assert_frame_equal(df, result)
+    # pandas before 2.0 copies the columns into blocks when the dataframe is built
+    if int(pd.__version__.split('.')[0]) >= 2:
+        assert _is_mapped(df['id'].to_numpy())
+        assert _is_mapped(df['created'].to_numpy())
+
+    df.loc[0, 'id'] = 99
+    assert cache.get('SELECT * FROM test.simple')['id'].tolist() == [0, 1, 2]
+    assert cache.get('SELECT * FROM test.simple', method='copy') is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_versions(tmp_path, result):
+    """
+    GIVEN a result stored with a version of the cache and one of the statement
+    WHEN it is looked up with other versions
+    THEN check that it is only found with the versions it has been stored with
+    """
+    DiskCache(tmp_path, version=1).put('SELECT 1', result, version='2020-01-01')
+
+    assert DiskCache(tmp_path, version=1).get('SELECT 1', version='2020-01-01') is not None
+    assert DiskCache(tmp_path, version=1).get('SELECT 1', version='2020-01-02') is None
+    assert DiskCache(tmp_path, version=2).get('SELECT 1', version='2020-01-01') is None
+
+
+def test_ttl(tmp_path, result):
+    """
+    GIVEN a result stored with a short ttl
+    WHEN it is looked up after the ttl
+    THEN check that it is a miss and it is removed
+    """
+    cache = DiskCache(tmp_path, ttl=0.01)
+    cache.put('SELECT 1', result)
+    time.sleep(0.05)
+
+    assert cache.get('SELECT 1') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_eviction(tmp_path, result):
+    """
+    GIVEN a cache with room for two results
+    WHEN three are stored, after using the first one
+    THEN check that the one used least recently is removed
+    """
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put('SELECT 1', result)
+    cache.max_bytes = cache.stats()['bytes'] * 2.5
+    cache.put('SELECT 2', result)
+    time.sleep(0.05)
+    cache.get('SELECT 1')
+    cache.put('SELECT 3', result)
+
+    assert cache.get('SELECT 1') is not None
+    assert cache.get('SELECT 2') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_feather(tmp_path, result):
+    """
+    GIVEN a result stored on disk as a Feather file
+    WHEN it is read
+    THEN check that it is equal to the one stored
+    """
+    pytest.importorskip('pyarrow')
+    cache = DiskCache(tmp_path, file_format='feather')
+    cache.put('SELECT 1', result[['id', 'price', 'activated', 'created', 'name']])
+
+    pd.testing.assert_frame_equal(cache.get('SELECT 1'), result[['id', 'price', 'activated', 'created', 'name']],
+                                  check_dtype=False)
+
+
+def test_not_valid_format(tmp_path):
+    """
+    GIVEN a format that is not supported
+    WHEN a cache is created
+    THEN check that it raises ValueError
+    """
+    with pytest.raises(ValueError):
+        DiskCache(tmp_path, file_format='csv')
+
+
+def test_removed_while_read(tmp_path, result, monkeypatch):
+    """
+    GIVEN a stored result that another process removes right after it is read
+    WHEN it is looked up
+    THEN check that it is a hit instead of an error
+    """
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put('SELECT 1', result)
+
+    def utime(path):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr('os.utime', utime)
+
+    assert cache.get('SELECT 1') is not None
+    assert cache.stats()['hits'] == 1
+
+
+def test_feather_without_pyarrow(tmp_path, result, monkeypatch):
+    """
+    GIVEN a result stored as a Feather file by a process with pyarrow
+    WHEN it is looked up by a process without pyarrow
+    THEN check that it is a miss
+    """
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put('SELECT 1', result)
+    metadata = next(tmp_path.glob('*/metadata.json'))
+    metadata.write_text(metadata.read_text().replace('"format": "npy"', '"format": "feather"'))
+
+    def lazy_import(name):
+        raise ModuleNotFoundError("No module named %r" % name, name=name)
+    monkeypatch.setattr('postgresql_interface.disk_cache.lazy_import', lazy_import)
+
+    assert cache.get('SELECT 1') is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_values_not_pickled(tmp_path):
+    """
+    GIVEN a result with object columns of several kinds of values, and one with values of mixed types
+    WHEN they are stored as .npy files and read
+    THEN check that values are read back equal without pickle, and the mixed one is not stored
+    """
+    result = pd.DataFrame({
+        'amount': [decimal.Decimal('1.10'), None, decimal.Decimal('-3')], 'key': [uuid.uuid4(), None, uuid.uuid4()],
+        'document': [{'a': [1, 2]}, [1, 'b'], None], 'payload': [b'\x00\xff', b'', None],
+        'at': [dt.time(10, 30), dt.time(0), None], 'flag': [True, None, False]})
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put('SELECT 1', result)
+
+    pd.testing.assert_frame_equal(cache.get('SELECT 1'), result)
+    for file_name in tmp_path.glob('*/*.npy'):
+        np.load(file_name, allow_pickle=False)
+    with pytest.warns(UserWarning, match='not stored'):
+        cache.put('SELECT 2', pd.DataFrame({'mixed': [1, 'a']}))
+    assert cache.get('SELECT 2') is None
+
+
+def test_pickled_file_not_loaded(tmp_path):
+    """
+    GIVEN a stored result whose file has been replaced by one with pickled objects
+    WHEN it is looked up
+    THEN check that the file is not unpickled and it is a miss
+    """
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put('SELECT 1', pd.DataFrame({'name': ['a', 'b']}))
+    np.save(next(tmp_path.glob('*/0.npy')), np.array([object(), object()], dtype=object), allow_pickle=True)
+
+    assert cache.get('SELECT 1') is None
+
+
+
+def test_literals_kept(tmp_path, result):
+    """
+    GIVEN a stored result of a statement with a string literal
+    WHEN a statement whose literal differs only in its blanks is looked up
+    THEN check that it is a miss
+    """
+    cache = DiskCache(tmp_path, file_format='npy')
+    cache.put("SELECT * FROM test.simple WHERE name = 'Ford  Focus'", result)
+
+    assert cache.get("SELECT * FROM test.simple WHERE name = 'Ford Focus'") is None
+    assert cache.get("SELECT * FROM test.simple  WHERE name = 'Ford  Focus'") is not None
+
+
+def test_directory_removed_while_stored(tmp_path, result, monkeypatch):
+    """
+    GIVEN a cache whose directory is removed by another process while a result is stored
+    WHEN the result is stored
+    THEN check that a warning is given instead of an error, and nothing is stored
+    """
+    cache = DiskCache(tmp_path / 'cache', file_format='npy', max_bytes=1024)
+
+    def makedirs(path, *args, **kwargs):
+        shutil.rmtree(tmp_path / 'cache')
+        raise FileNotFoundError(path)
+    monkeypatch.setattr('os.makedirs', makedirs)
+
+    with pytest.warns(UserWarning, match='not stored'):
+        cache.put('SELECT 1', result)
+    assert cache.stats()['entries'] == 0
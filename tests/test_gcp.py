@@ -3,6 +3,8 @@ import numpy as np
 import datetime as dt
 import pytest
 from postgresql_interface.postgresql_interface import postgres_sql_connector_factory
+from postgresql_interface.instrumentation import Observer, TimingCollector
+from postgresql_interface.custom_errors import ErrorParallelInsert
 
 
 @pytest.fixture(scope='function')
@@ -186,3 +188,499 @@ def test_truncate_true(gcp_conn):
     # first assert is to make sure that actually there is something before truncating the table
     assert n_rows > 0
     assert to_insert.equals(simple)
+
+
+def test_insert_copy(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN an insert is done with method='copy' after a truncate
+    THEN check that values, including nulls and special characters, are correctly loaded
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': [1, 2, 3],
+                                        'name': ["O'Brien\tand\\co", np.nan, 'Ford\n'],
+                                        'activated': [True, False, True],
+                                        'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2), dt.date(2020, 3, 3)]})
+    gcp_conn.insert_table('test.simple', to_insert.copy(), truncate=True, method='copy')
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple.shape[0] == 3
+    assert simple.loc[0, 'name'] == "O'Brien\tand\\co"
+    assert simple['name'].isna().tolist() == [False, True, False]
+    assert simple.loc[2, 'name'] == 'Ford\n'
+    assert simple['activated'].tolist() == [True, False, True]
+
+
+def test_insert_parameterized(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN an insert is done with method='parameterized' after a truncate
+    THEN check that values, including nulls and strings that look like an SQL Injection, are loaded as they are
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': np.array([1, 2], dtype=np.int64),
+                                        'name': ["x'); DROP TABLE test.simple; --", np.nan],
+                                        'activated': np.array([True, False]),
+                                        'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2)]})
+    gcp_conn.insert_table('test.simple', to_insert, truncate=True, method='parameterized')
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == [1, 2]
+    assert simple.loc[0, 'name'] == "x'); DROP TABLE test.simple; --"
+    assert pd.isna(simple.loc[1, 'name'])
+    assert simple['activated'].tolist() == [True, False]
+
+
+@pytest.mark.parametrize("method", ['statement', 'copy', 'binary', 'parameterized'])
+def test_write_rows(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database
+    WHEN rows that are not a dataframe are inserted, updated and deleted: a list of dictionaries, a dictionary of
+    numpy arrays, tuples with columns and generators
+    THEN check that the rows read back are the ones written
+    :param gcp_conn: fixture above
+    :return:
+    """
+    gcp_conn.insert_table('test.simple', [{'id': 5, 'activated': True, 'date': dt.date(2020, 5, 5)}], method=method)
+    gcp_conn.insert_table('test.simple', {'id': np.array([6, 7]), 'activated': np.array([True, False]),
+                                          'date': [dt.date(2020, 6, 6), dt.date(2020, 7, 7)]}, method=method)
+    gcp_conn.insert_table('test.simple', ((i, 'Car %d' % i, False, dt.date(2020, 8, i)) for i in range(8, 13)),
+                          method=method, batch_size=2, columns=['id', 'name', 'activated', 'date'])
+    gcp_conn.update_table('test.simple', ({'id': i, 'name': 'Updated'} for i in (5, 8)), ['id'])
+    gcp_conn.delete_from_table('test.simple', [(i,) for i in range(9, 13)], columns=['id'])
+    simple = gcp_conn.query("SELECT * FROM test.simple WHERE id > 4 ORDER BY id")
+
+    assert simple['id'].tolist() == [5, 6, 7, 8]
+    assert simple['name'].tolist()[0] == simple['name'].tolist()[3] == 'Updated'
+    assert pd.isna(simple.loc[1, 'name']) and pd.isna(simple.loc[2, 'name'])
+    assert simple['activated'].tolist() == [True, True, False, False]
+    assert simple['date'].tolist() == [dt.date(2020, 5, 5), dt.date(2020, 6, 6), dt.date(2020, 7, 7),
+                                       dt.date(2020, 8, 8)]
+
+
+def test_insert_binary(gcp_conn, capsys):
+    """
+    GIVEN a table with numbers, timestamps, dates and strings in a gcp database
+    WHEN a dataframe is inserted with method='binary'
+    THEN check that it is loaded in binary format and that the values read back are the ones inserted
+    :param gcp_conn: fixture above
+    :return:
+    """
+    gcp_conn.execute("CREATE TABLE test.binary (id SMALLINT, quantity BIGINT, price REAL, ratio DOUBLE PRECISION, "
+                     "activated BOOLEAN, created_at TIMESTAMP, updated_at TIMESTAMPTZ, day DATE, name TEXT)")
+    to_insert = pd.DataFrame.from_dict({
+        'id': np.array([1, 2, 3], dtype=np.int64),
+        'quantity': [2.0 ** 53, np.nan, -1.0],
+        'price': np.array([1.5, np.inf, -0.25], dtype=np.float32),
+        'ratio': [0.1, np.nan, 1e300],
+        'activated': [True, False, True],
+        'created_at': pd.to_datetime([pd.Timestamp('1999-12-31 23:59:59.999999'), None,
+                                      pd.Timestamp('2262-04-11 00:00:00')]),
+        'updated_at': pd.to_datetime(['2020-06-01 12:00:00', '1970-01-01 00:00:00', None]).tz_localize('UTC'),
+        'day': pd.to_datetime(['2020-01-01', '1900-02-28', None]),
+        'name': ["O'Brien\tand\\co", None, 'Ünïcødé']})
+    gcp_conn.insert_table('test.binary', to_insert, method='binary', print_sql=True)
+    binary = gcp_conn.query("SELECT * FROM test.binary ORDER BY id")
+    gcp_conn.execute("DROP TABLE test.binary")
+
+    assert 'FORMAT binary' in capsys.readouterr().out
+    assert binary['id'].tolist() == [1, 2, 3]
+    assert binary['quantity'].tolist()[::2] == [2 ** 53, -1] and pd.isna(binary.loc[1, 'quantity'])
+    assert binary['price'].tolist() == [1.5, np.inf, -0.25]
+    assert binary.loc[0, 'ratio'] == 0.1 and pd.isna(binary.loc[1, 'ratio']) and binary.loc[2, 'ratio'] == 1e300
+    assert binary['activated'].tolist() == [True, False, True]
+    assert binary['created_at'].tolist()[::2] == to_insert['created_at'].tolist()[::2]
+    assert binary['updated_at'].tolist()[:2] == to_insert['updated_at'].tolist()[:2]
+    assert binary['day'].tolist()[:2] == [dt.date(2020, 1, 1), dt.date(1900, 2, 28)]
+    assert binary['name'].tolist()[::2] == ["O'Brien\tand\\co", 'Ünïcødé'] and pd.isna(binary.loc[1, 'name'])
+    assert binary.isna().sum().tolist() == [0, 1, 0, 1, 0, 1, 1, 1, 1]
+
+
+def test_insert_binary_fallback(gcp_conn, capsys):
+    """
+    GIVEN a dataframe with a column of dates as python objects, which is not written in binary format
+    WHEN it is inserted with method='binary'
+    THEN check that it is loaded in text format instead
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': [5], 'name': ['Ford'], 'activated': [True],
+                                        'date': [dt.date(2020, 1, 1)]})
+    gcp_conn.insert_table('test.simple', to_insert, method='binary', print_sql=True)
+
+    assert 'FORMAT binary' not in capsys.readouterr().out
+    assert gcp_conn.query("SELECT name FROM test.simple WHERE id = 5").loc[0, 'name'] == 'Ford'
+
+
+@pytest.mark.parametrize("method", ['statement', 'copy', 'binary', 'parameterized'])
+def test_insert_in_batches(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database
+    WHEN an insert is done in batches after a truncate
+    THEN check that all rows are inserted and progress is reported after each batch
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': list(range(5)),
+                                        'name': ['a', 'b', np.nan, 'd', 'e'],
+                                        'activated': [True, False, True, False, True],
+                                        'date': [dt.date(2020, 1, i + 1) for i in range(5)]})
+    progress = []
+    gcp_conn.insert_table('test.simple', to_insert, truncate=True, method=method, batch_size=2,
+                          progress_callback=lambda *args: progress.append(args))
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == list(range(5))
+    assert progress == [(1, 2, 5), (2, 4, 5), (3, 5, 5)]
+
+
+def test_insert_in_batches_auto(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN an insert is done with batch_size='auto'
+    THEN check that all rows are inserted
+    :param gcp_conn: fixture above
+    :return:
+    """
+    n_rows = 5000
+    to_insert = pd.DataFrame.from_dict({'id': list(range(n_rows)),
+                                        'name': ['name %s' % i for i in range(n_rows)],
+                                        'activated': [True] * n_rows,
+                                        'date': [dt.date(2020, 1, 1)] * n_rows})
+    progress = []
+    gcp_conn.insert_table('test.simple', to_insert, truncate=True, batch_size='auto',
+                          progress_callback=lambda *args: progress.append(args))
+
+    assert gcp_conn.query("SELECT COUNT(*) AS count FROM test.simple").loc[0, 'count'] == n_rows
+    assert progress[-1][1:] == (n_rows, n_rows)
+    assert len(progress) > 1
+
+
+@pytest.mark.parametrize("commit_per_batch, expected_rows", [(False, 4), (True, 6)])
+def test_insert_in_batches_failure(gcp_conn, commit_per_batch, expected_rows):
+    """
+    GIVEN a table in a gcp database with 4 rows
+    WHEN an insert in batches fails on the second batch
+    THEN check that nothing is inserted in a single transaction, and the first batch is kept with commit_per_batch
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': [5, 6, 7, 8],
+                                        'name': ['a', 'b', 'c', 'd'],
+                                        'activated': [True, False, None, False],
+                                        'date': [dt.date(2020, 1, 1)] * 4})
+    with pytest.raises(Exception):
+        gcp_conn.insert_table('test.simple', to_insert, batch_size=2, commit_per_batch=commit_per_batch)
+
+    assert gcp_conn.query("SELECT COUNT(*) AS count FROM test.simple").loc[0, 'count'] == expected_rows
+
+
+@pytest.mark.parametrize("method", ['statement', 'copy', 'binary', 'parameterized'])
+def test_insert_parallel(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database
+    WHEN a dataframe is inserted in parallel chunks over several connections
+    THEN check that all rows are inserted
+    :param gcp_conn: fixture above
+    :return:
+    """
+    n_rows = 1000
+    to_insert = pd.DataFrame.from_dict({'id': range(5, n_rows + 5),
+                                        'name': ['a'] * n_rows,
+                                        'activated': [True] * n_rows,
+                                        'date': [dt.date(2020, 1, 1)] * n_rows})
+    gcp_conn.insert_table('test.simple', to_insert, truncate=True, method=method, parallel=4)
+
+    assert gcp_conn.query("SELECT COUNT(*) AS count FROM test.simple").loc[0, 'count'] == n_rows
+
+
+def test_write_with_workers(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN rows are inserted, updated and deleted with statements built by worker processes
+    THEN check that the table is changed as with a single statement
+    :param gcp_conn: fixture above
+    :return:
+    """
+    n_rows = 100
+    to_insert = pd.DataFrame.from_dict({'id': range(5, n_rows + 5),
+                                        'name': ['a'] * n_rows,
+                                        'activated': [True] * n_rows,
+                                        'date': [dt.date(2020, 1, 1)] * n_rows})
+    gcp_conn.insert_table('test.simple', to_insert, truncate=True, batch_size=30, workers=2)
+    gcp_conn.update_table('test.simple', pd.DataFrame({'id': [5, 6], 'name': ['b', 'c']}), ['id'], workers=2)
+    gcp_conn.delete_from_table('test.simple', to_insert[['id']].iloc[50:], workers=2)
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == list(range(5, 55))
+    assert simple['name'].tolist()[:3] == ['b', 'c', 'a']
+
+
+@pytest.mark.parametrize("all_or_nothing, expected_rows", [(False, 6), (True, 4)])
+def test_insert_parallel_failure(gcp_conn, all_or_nothing, expected_rows):
+    """
+    GIVEN a table in a gcp database with 4 rows
+    WHEN a parallel insert fails on one of its chunks
+    THEN check that the chunk is reported, the other chunk is kept, and nothing is kept with all_or_nothing
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_insert = pd.DataFrame.from_dict({'id': [5, 6, 7, 8],
+                                        'name': ['a', 'b', 'c', 'd'],
+                                        'activated': [True, False, 'x', False],
+                                        'date': [dt.date(2020, 1, 1)] * 4})
+    with pytest.raises(ErrorParallelInsert) as error:
+        gcp_conn.insert_table('test.simple', to_insert, method='copy', parallel=2, all_or_nothing=all_or_nothing)
+
+    assert [chunk_error[:3] for chunk_error in error.value.errors] == [(1, 2, 4)]
+    assert gcp_conn.query("SELECT COUNT(*) AS count FROM test.simple").loc[0, 'count'] == expected_rows
+    assert gcp_conn.query("SELECT COUNT(*) AS count FROM pg_tables WHERE schemaname = 'test' "
+                          "AND tablename LIKE 'pgi_staging%%'").loc[0, 'count'] == 0
+
+
+@pytest.mark.parametrize("method", ['values', 'staging', 'prepared'])
+def test_update_set_based(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database
+    WHEN it is updated with a set-based or prepared method
+    THEN check that matching rows are updated, including nulls, and the others are left untouched
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_update = pd.DataFrame.from_dict({'id': [1, 2, 3, 99],
+                                        'name': ['Ford', 'Vauxhall', np.nan, 'SEAT'],
+                                        'activated': [False, True, True, False],
+                                        'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2),
+                                                 dt.date(2020, 3, 3), dt.date(2020, 4, 4)]})
+    gcp_conn.update_table('test.simple', to_update, ['Id', 'Date'], method=method)
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['name'].tolist()[:2] == ['Ford', 'Vauxhall']
+    assert pd.isna(simple.loc[2, 'name'])
+    assert simple['name'].tolist()[3] == 'BMW'
+    assert simple['activated'].tolist() == [False, True, True, True]
+
+
+@pytest.mark.parametrize("method", ['in', 'values', 'staging', 'prepared'])
+def test_delete_set_based(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database
+    WHEN some rows are deleted using several columns with a set-based or prepared method
+    THEN check that only matching rows are deleted, and rows with nulls do not match
+    :param gcp_conn: fixture above
+    :return:
+    """
+    to_delete = pd.DataFrame.from_dict({'id': [1, 2, 3, 4],
+                                        'name': ['Mercedes', np.nan, 'Suzuki', 'Toyota']})
+    gcp_conn.delete_from_table('test.simple', to_delete, method=method)
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == [2, 4]
+
+
+@pytest.mark.parametrize("method, batch_size", [('statement', None), ('statement', 2), ('staging', None)])
+def test_merge_table(gcp_conn, method, batch_size):
+    """
+    GIVEN a table in a gcp database with a primary key
+    WHEN a dataframe with existing and new rows is merged into it
+    THEN check that existing rows are updated, new ones are inserted and the others are left untouched
+    :param gcp_conn: fixture above
+    :return:
+    """
+    gcp_conn.execute("ALTER TABLE test.simple ADD PRIMARY KEY (id)")
+    to_merge = pd.DataFrame.from_dict({'id': [1, 2, 5],
+                                       'name': ['Ford', np.nan, 'SEAT'],
+                                       'activated': [False, True, True],
+                                       'date': [dt.date(2021, 1, 1), dt.date(2021, 2, 2), dt.date(2021, 5, 5)]})
+    gcp_conn.merge_table('test.simple', to_merge, ['id'], update_columns=['name', 'activated'], method=method,
+                         batch_size=batch_size)
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == [1, 2, 3, 4, 5]
+    assert simple['name'].tolist()[0] == 'Ford'
+    assert pd.isna(simple.loc[1, 'name'])
+    assert simple['name'].tolist()[2:] == ['Suzuki', 'BMW', 'SEAT']
+    assert simple['activated'].tolist() == [False, True, False, True, True]
+    assert simple['date'].tolist()[:2] == [dt.date(2020, 1, 1), dt.date(2020, 2, 2)]
+    assert simple['date'].tolist()[4] == dt.date(2021, 5, 5)
+
+
+def test_query_iter(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN it is read in chunks with query_iter()
+    THEN check that chunks have at most chunk_size rows and together they are the whole table
+    :param gcp_conn: fixture above
+    :return:
+    """
+    chunks = list(gcp_conn.query_iter("SELECT * FROM test.simple ORDER BY id", chunk_size=3))
+
+    assert [chunk.shape[0] for chunk in chunks] == [3, 1]
+    assert pd.concat(chunks, ignore_index=True).equals(gcp_conn.query("SELECT * FROM test.simple ORDER BY id"))
+
+
+def test_query_iter_tuples_and_early_stop(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN it is read as tuples with query_iter() and the generator is closed before the end
+    THEN check that raw rows are yielded and the connector keeps working
+    :param gcp_conn: fixture above
+    :return:
+    """
+    chunks = gcp_conn.query_iter("SELECT id FROM test.simple ORDER BY id", chunk_size=2, output='tuples')
+    assert next(chunks) == [(1,), (2,)]
+    chunks.close()
+
+    assert list(gcp_conn.query_iter("SELECT id FROM test.simple WHERE id > 10"))[0].columns.tolist() == ['id']
+    with pytest.raises(Exception):
+        list(gcp_conn.query_iter("SELECT * FROM test.table_that_does_not_exist"))
+
+
+def test_query_copy(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN it is read with method='copy'
+    THEN check that the result is the same than with the default method
+    :param gcp_conn: fixture above
+    :return:
+    """
+    statement = "SELECT * FROM test.simple ORDER BY id;"
+
+    assert gcp_conn.query(statement, method='copy').equals(gcp_conn.query(statement))
+
+
+def test_query_outputs(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN it is queried with the outputs that do not build a dataframe
+    THEN check that the rows are returned as tuples, dicts, a numpy structured array and numpy columns
+    :param gcp_conn: fixture above
+    :return:
+    """
+    statement = "SELECT id, name, date FROM test.simple ORDER BY id"
+    tuples = gcp_conn.query(statement, output='tuples')
+    dicts = gcp_conn.query(statement, output='dicts')
+    array = gcp_conn.query(statement, output='numpy')
+    columns = gcp_conn.query(statement, output='columns')
+
+    assert tuples[1] == (2, None, dt.date(2020, 2, 2))
+    assert dicts[0] == {'id': 1, 'name': 'Mercedes', 'date': dt.date(2020, 1, 1)}
+    assert array.dtype.names == ('id', 'name', 'date') and array['id'].dtype == np.int32
+    assert array['date'][3] == np.datetime64('2020-04-04')
+    assert columns['name'].tolist() == ['Mercedes', None, 'Suzuki', 'BMW']
+    assert [len(chunk) for chunk in gcp_conn.query_iter(statement, 3, output='dicts')] == [3, 1]
+
+
+@pytest.mark.parametrize("method", ['read_sql', 'copy'])
+def test_query_parallel(gcp_conn, method):
+    """
+    GIVEN a table in a gcp database with 4 rows
+    WHEN it is read in parallel partitions, with bounds found or given
+    THEN check that every row is read once, in the order of the partitions
+    :param gcp_conn: fixture above
+    :return:
+    """
+    df = gcp_conn.query_parallel('test.simple', 'id', 3, method=method)
+    narrow = gcp_conn.query_parallel('SELECT id, name FROM test.simple', 'id', 2, lower_bound=2, upper_bound=3)
+    parts = list(gcp_conn.query_parallel('test.simple', 'date', 2, method=method, stream=True))
+
+    assert df['id'].tolist() == [1, 2, 3, 4]
+    assert df.loc[[0, 2, 3], 'name'].tolist() == ['Mercedes', 'Suzuki', 'BMW']
+    assert sorted(narrow['id'].tolist()) == [1, 2, 3, 4]
+    assert sum(len(part) for part in parts) == 4
+
+
+def test_query_cache(gcp_conn):
+    """
+    GIVEN a connector with the cache enabled
+    WHEN a query is repeated, and then the table is written
+    THEN check that the second query is served from the cache and the write invalidates it
+    :param gcp_conn: fixture above
+    :return:
+    """
+    cache = gcp_conn.enable_cache()
+    statement = "SELECT * FROM test.simple ORDER BY id"
+    first = gcp_conn.query(statement)
+    second = gcp_conn.query(statement)
+    gcp_conn.delete_from_table('test.simple', pd.DataFrame({'id': [1]}))
+    third = gcp_conn.query(statement)
+    gcp_conn.disable_cache()
+
+    assert first.equals(second)
+    assert third['id'].tolist() == [2, 3, 4]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_session(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN several methods are called inside a session
+    THEN check that they share a single connection and their changes are committed together on exit
+    :param gcp_conn: fixture above
+    :return:
+    """
+    with gcp_conn.session() as session:
+        pids = [session.query("SELECT pg_backend_pid() AS pid").loc[0, 'pid']]
+        session.delete_from_table('test.simple', pd.DataFrame({'id': [1, 2]}))
+        session.insert_table('test.simple', pd.DataFrame({'id': [5], 'name': ['SEAT'], 'activated': [True],
+                                                          'date': [dt.date(2020, 5, 5)]}), method='copy')
+        session.update_table('test.simple', pd.DataFrame({'id': [3], 'name': ['Ford']}), ['id'])
+        pids.append(session.query("SELECT pg_backend_pid() AS pid").loc[0, 'pid'])
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert pids[0] == pids[1]
+    assert simple['id'].tolist() == [3, 4, 5]
+    assert simple['name'].tolist() == ['Ford', 'BMW', 'SEAT']
+
+
+def test_transaction_rollback(gcp_conn):
+    """
+    GIVEN a table in a gcp database
+    WHEN an error is raised inside a transaction after some changes
+    THEN check that none of them is kept
+    :param gcp_conn: fixture above
+    :return:
+    """
+    with pytest.raises(Exception):
+        with gcp_conn.transaction():
+            gcp_conn.delete_from_table('test.simple', pd.DataFrame({'id': [1, 2]}))
+            gcp_conn.execute("SELECT * FROM test.table_that_does_not_exist")
+    simple = gcp_conn.query("SELECT * FROM test.simple ORDER BY id")
+
+    assert simple['id'].tolist() == [1, 2, 3, 4]
+
+
+def test_instrumentation(gcp_conn):
+    """
+    GIVEN a gcp database connector with a TimingCollector as observer
+    WHEN data is inserted and read
+    THEN check that the phases, rows, bytes and table name of the calls are measured
+    :param gcp_conn: fixture above
+    :return:
+    """
+    traces = []
+
+    class Recorder(Observer):
+        def after(self, trace):
+            traces.append(trace)
+    collector = gcp_conn.add_observer(TimingCollector())
+    recorder = gcp_conn.add_observer(Recorder())
+    try:
+        gcp_conn.insert_table('test.simple', pd.DataFrame({'id': [5], 'name': ['SEAT'], 'activated': [True],
+                                                           'date': [dt.date(2020, 5, 5)]}))
+        gcp_conn.query("SELECT * FROM test.simple", method='copy')
+    finally:
+        gcp_conn.remove_observer(collector)
+        gcp_conn.remove_observer(recorder)
+
+    assert [trace.method for trace in traces] == ['insert_table', 'query']
+    assert traces[0].table_name == 'test.simple'
+    assert traces[0].rows == 1
+    assert traces[0].statement_bytes > 0
+    assert {'connect', 'build', 'execute', 'close'} <= set(traces[0].phases)
+    assert {'connect', 'execute', 'fetch', 'close'} <= set(traces[1].phases)
+    assert traces[1].rows == 5
+    assert collector.summary()['query']['calls'] == 1
@@ -0,0 +1,130 @@
+import concurrent.futures
+from postgresql_interface import instrumentation
+from postgresql_interface.instrumentation import TimingCollector, Observer, Trace
+import pandas as pd
+import pytest
+
+
+class Dummy:
+    _observers = ()
+
+    @instrumentation.traced
+    def write(self, table_name, df):
+        with instrumentation.phase(instrumentation.EXECUTE):
+            instrumentation.record(10)
+        return None
+
+    @instrumentation.traced
+    def read(self, statement):
+        with instrumentation.phase(instrumentation.FETCH):
+            pass
+        if statement == 'fail':
+            raise ValueError(statement)
+        return pd.DataFrame({'a': [1, 2, 3]})
+
+
+def test_traced_calls_observers():
+    """
+    GIVEN an object with a TimingCollector as observer
+    WHEN its traced methods are called, one of them failing
+    THEN check that traces have the table name, rows, bytes, phases and error of each call
+    """
+    dummy = Dummy()
+    collector = TimingCollector()
+    traces = []
+
+    class Recorder(Observer):
+        def after(self, trace):
+            traces.append(trace)
+    dummy._observers = (collector, Recorder())
+
+    dummy.write('test.simple', pd.DataFrame({'id': [1, 2]}))
+    dummy.read('SELECT 1')
+    with pytest.raises(ValueError):
+        dummy.read('fail')
+
+    assert [trace.method for trace in traces] == ['write', 'read', 'read']
+    assert traces[0].table_name == 'test.simple'
+    assert traces[0].rows == 2
+    assert traces[0].statement_bytes == 10
+    assert 'execute' in traces[0].phases
+    assert traces[1].rows == 3
+    assert 'fetch' in traces[1].phases
+    assert isinstance(traces[2].error, ValueError)
+    assert collector.summary()['read']['calls'] == 2
+    assert collector.summary()['read']['errors'] == 1
+
+
+def test_not_traced_without_observers():
+    """
+    GIVEN an object without observers
+    WHEN its traced methods are called
+    THEN check that they work and phases are not measured
+    """
+    assert Dummy().read('SELECT 1').shape[0] == 3
+    assert instrumentation.phase(instrumentation.FETCH) is instrumentation._NULL_PHASE
+
+
+def test_failing_observer_warns():
+    """
+    GIVEN an object with an observer that raises
+    WHEN a traced method is called
+    THEN check that the call succeeds and a warning is given
+    """
+    class Failing(Observer):
+        def after(self, trace):
+            raise RuntimeError('boom')
+    dummy = Dummy()
+    dummy._observers = (Failing(),)
+
+    with pytest.warns(UserWarning):
+        assert dummy.read('SELECT 1').shape[0] == 3
+
+
+def test_percentiles():
+    """
+    GIVEN a TimingCollector with known durations
+    WHEN its percentiles are computed
+    THEN check their values, and that methods not called have None values
+    """
+    collector = TimingCollector(max_samples=100)
+    for i in range(1, 101):
+        trace = Trace('query')
+        trace.seconds = float(i)
+        trace.phases['fetch'] = i / 10
+        collector.after(trace)
+
+    assert collector.percentiles('query', q=(50, 100)) == {50: 50.5, 100: 100.0}
+    assert collector.percentiles('query', 'fetch', q=(100,)) == {100: 10.0}
+    assert collector.percentiles('insert_table') == {50: None, 90: None, 99: None}
+    collector.reset()
+    assert collector.summary() == {}
+
+
+def test_propagate_to_threads():
+    """
+    GIVEN a traced method that runs work on worker threads, and one written with a list of rows
+    WHEN they are called
+    THEN check that the phases and bytes of the workers are added to the trace of the call, and the rows are counted
+    """
+    class Parallel(Dummy):
+        @instrumentation.traced
+        def write(self, table_name, df):
+            work = instrumentation.propagate(super().write)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(work, [table_name] * 2, [df] * 2))
+
+    traces = []
+
+    class Recorder(Observer):
+        def after(self, trace):
+            traces.append(trace)
+    dummy = Parallel()
+    dummy._observers = (Recorder(),)
+
+    dummy.write('test.simple', [(1,), (2,), (3,)])
+
+    assert [trace.method for trace in traces] == ['write']
+    assert traces[0].rows == 3
+    assert traces[0].statement_bytes == 20
+    assert 'execute' in traces[0].phases
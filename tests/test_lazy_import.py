@@ -0,0 +1,84 @@
+from postgresql_interface.lazy_import import lazy_import, is_loaded
+import postgresql_interface
+import subprocess
+import json
+import sys
+import os
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(postgresql_interface.__file__)))
+
+
+def run_python(code):
+    """
+    Runs code on a new python process, where nothing has been imported yet, and returns what it prints as JSON.
+    """
+    return json.loads(subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                                     check=True).stdout)
+
+
+def test_import_does_not_load_heavy_modules():
+    """
+    GIVEN a new python process
+    WHEN the package is imported, and execute(), query() with output='tuples' and insert_table() of a list of rows
+    with method='parameterized' are called on a memory connector
+    THEN check that pandas, numpy and psycopg2 are not loaded by the import, and that pandas and numpy are not loaded
+    by those methods either
+    """
+    loaded = run_python("""
+import json
+from postgresql_interface.lazy_import import is_loaded
+from postgresql_interface import postgres_sql_connector_factory
+
+def loaded():
+    return [name for name in ('pandas', 'numpy', 'psycopg2') if is_loaded(name)]
+
+after_import = loaded()
+db_conn = postgres_sql_connector_factory(vendor='memory')
+db_conn.execute('CREATE SCHEMA test')
+db_conn.query('SELECT 1', output='tuples')
+db_conn.insert_table('test.simple', [{'id': 1, 'name': 'Mercedes'}], method='parameterized')
+print(json.dumps([after_import, loaded()]))
+""")
+
+    assert loaded == [[], ['psycopg2']]
+
+
+def test_lazy_import():
+    """
+    GIVEN a new python process
+    WHEN a module is imported lazily with a submodule
+    THEN check that they are imported the first time the module is used, and that from then on the name bound to it
+    refers to the module itself
+    """
+    loaded = run_python("""
+import json
+from postgresql_interface.lazy_import import lazy_import, is_loaded
+
+email = lazy_import('email', submodules=('parser',))
+before = [is_loaded('email'), is_loaded('email.parser'), type(email).__name__]
+email.parser.Parser
+import sys
+print(json.dumps([before, is_loaded('email.parser'), email is sys.modules['email']]))
+""")
+
+    assert loaded == [[False, False, '_LazyModule'], True, True]
+    assert lazy_import('json') is json and is_loaded('json')
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import('not_a_module')
+
+
+def test_package_names():
+    """
+    GIVEN the package
+    WHEN its names are used
+    THEN check that they are the ones of the modules where they are defined, and other names are not found
+    """
+    from postgresql_interface.postgresql_interface import postgres_sql_connector_factory
+    from postgresql_interface.custom_errors import ErrorParallelInsert
+
+    assert postgresql_interface.postgres_sql_connector_factory is postgres_sql_connector_factory
+    assert postgresql_interface.ErrorParallelInsert is ErrorParallelInsert
+    assert 'TimingCollector' in dir(postgresql_interface)
+    with pytest.raises(AttributeError):
+        postgresql_interface.not_a_name
@@ -0,0 +1,286 @@
+from postgresql_interface.postgresql_interface import postgres_sql_connector_factory, PostgresMemory
+from postgresql_interface.memory_connection import MemoryDatabase
+import pandas as pd
+import datetime as dt
+import pytest
+import re
+
+
+@pytest.fixture(scope='function')
+def memory_conn():
+    return postgres_sql_connector_factory(vendor='memory')
+
+
+@pytest.fixture(scope='function')
+def simple():
+    return pd.DataFrame({'id': [1, 2, 3], 'name': ['Mercedes', None, 'Suzuki'], 'activated': [True, False, True],
+                         'date': [dt.date(2020, 1, 1), None, dt.date(2020, 3, 3)]})
+
+
+@pytest.mark.parametrize('method, kinds', [('statement', ['execute']), ('copy', ['copy_from']),
+                                           ('parameterized', ['execute'])])
+def test_insert_recorded(memory_conn, simple, method, kinds):
+    """
+    GIVEN a memory connector
+    WHEN a dataframe is inserted
+    THEN check that the statements sent are recorded with their size, and the transaction committed
+    """
+    memory_conn.insert_table('test.simple', simple, method=method)
+    statements = memory_conn.database.statements
+
+    assert [statement.kind for statement in statements] == kinds
+    assert 'test.simple' in statements[0].statement
+    assert statements[0].statement_bytes + statements[0].data_bytes > 100
+    assert statements[0].seconds >= 0
+    assert memory_conn.database.commits == 1
+
+
+@pytest.mark.parametrize('method', ['statement', 'values', 'staging', 'prepared'])
+def test_update_recorded(memory_conn, simple, method):
+    """
+    GIVEN a memory connector
+    WHEN a table is updated with each method
+    THEN check that an UPDATE of the table is recorded
+    """
+    memory_conn.update_table('test.simple', simple, ['id'], method=method)
+
+    assert any(re.search(r'\bUPDATE test\.simple\b', statement.statement)
+               for statement in memory_conn.database.statements)
+
+
+@pytest.mark.parametrize('method', ['read_sql', 'copy'])
+def test_query_replay(memory_conn, simple, method):
+    """
+    GIVEN a memory connector with a result given for a query
+    WHEN the query is run, written differently
+    THEN check that the result is returned
+    """
+    memory_conn.database.add_result('SELECT * FROM test.simple', simple)
+    df = memory_conn.query('select *\n  from test.simple;', method=method)
+
+    assert df['id'].tolist() == [1, 2, 3]
+    assert df['name'].tolist()[0::2] == ['Mercedes', 'Suzuki']
+    assert pd.isna(df.loc[1, 'name'])
+    assert df['activated'].tolist() == [True, False, True]
+    assert df['date'].tolist() == [dt.date(2020, 1, 1), None, dt.date(2020, 3, 3)]
+
+
+def test_query_without_result(memory_conn, simple):
+    """
+    GIVEN a memory connector with results given by regular expression
+    WHEN queries with and without a result are run
+    THEN check that the matching one is returned and the other ones return no rows
+    """
+    memory_conn.database.add_result(re.compile(r'FROM test\.\w+'), simple)
+
+    assert memory_conn.query('SELECT * FROM test.other').shape == (3, 4)
+    assert memory_conn.query('SELECT 1').empty
+    assert [len(rows) for rows in memory_conn.query_iter('SELECT * FROM test.simple', 2, 'tuples')] == [2, 1]
+
+
+def test_shared_database(simple):
+    """
+    GIVEN two memory connectors sharing a database, one of them with a pool
+    WHEN both write
+    THEN check that the statements of both are recorded, and the summary counts them
+    """
+    database = MemoryDatabase()
+    pooled, plain = PostgresMemory(database), PostgresMemory(database)
+    pooled.open_pool(health_check=False)
+    pooled.delete_from_table('test.simple', simple[['id']])
+    plain.execute('TRUNCATE test.simple')
+    pooled.close()
+
+    summary = database.summary()
+    assert summary['statements'] == 2
+    assert summary['kinds']['execute'] == 2
+    assert summary['commits'] == 2
+    database.reset()
+    assert database.summary()['statements'] == 0
+
+
+@pytest.mark.parametrize('all_or_nothing', [False, True])
+def test_insert_parallel_recorded(memory_conn, all_or_nothing):
+    """
+    GIVEN a memory connector
+    WHEN a dataframe is inserted in parallel chunks
+    THEN check that each chunk is copied over its own connection, through a staging table with all_or_nothing
+    """
+    to_insert = pd.DataFrame({'id': range(10), 'name': ['a'] * 10})
+    progress = []
+    memory_conn.insert_table('test.simple', to_insert, method='copy', parallel=3, batch_size=4,
+                             all_or_nothing=all_or_nothing, progress_callback=lambda *args: progress.append(args))
+    statements = memory_conn.database.statements
+    copies = [statement for statement in statements if statement.kind == 'copy_from']
+
+    assert sorted(statement.rows for statement in copies) == [2, 4, 4]
+    assert sorted(progress)[-1] == (3, 10, 10)
+    if all_or_nothing:
+        assert statements[0].statement.startswith('CREATE UNLOGGED TABLE test.pgi_staging_')
+        assert all('test.pgi_staging_' in statement.statement for statement in copies)
+        assert statements[-2].statement.startswith('INSERT INTO test.simple (id, name) SELECT id, name FROM')
+        assert statements[-1].statement.startswith('DROP TABLE IF EXISTS test.pgi_staging_')
+    else:
+        assert all(statement.statement.startswith('COPY test.simple') for statement in copies)
+
+
+def test_insert_parallel_not_valid(memory_conn, simple):
+    """
+    GIVEN a memory connector
+    WHEN a parallel insert is asked with a wrong number of connections, automatic batches or inside a session
+    THEN check that ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        memory_conn.insert_table('test.simple', simple, parallel=0)
+    with pytest.raises(ValueError):
+        memory_conn.insert_table('test.simple', simple, parallel=2, batch_size='auto')
+    with pytest.raises(ValueError):
+        with memory_conn.session():
+            memory_conn.insert_table('test.simple', simple, parallel=2)
+
+
+def test_query_parallel(memory_conn):
+    """
+    GIVEN a memory connector with the bounds of a column and the result of each partition given
+    WHEN a table is read in parallel partitions
+    THEN check that each partition is queried and the results are concatenated in order
+    """
+    memory_conn.database.add_result('SELECT MIN(id), MAX(id)', pd.DataFrame({'min': [1], 'max': [30]}))
+    for lower, upper in [(1, 11), (11, 21), (21, 31)]:
+        memory_conn.database.add_result(re.compile(r'id >= %d\b|id < %d OR' % (lower, upper)),
+                                        pd.DataFrame({'id': range(lower, upper)}))
+    df = memory_conn.query_parallel('test.simple', 'id', 3)
+
+    assert df['id'].tolist() == list(range(1, 31))
+    assert sorted(len(part) for part in memory_conn.query_parallel('test.simple', 'id', 3, stream=True)) == [10] * 3
+
+
+
+def test_query_parallel_failure(memory_conn, monkeypatch):
+    """
+    GIVEN a memory connector where the query of one partition fails
+    WHEN a table is read in parallel partitions
+    THEN check that the error of the partition is raised once the other partitions are cancelled or finished
+    """
+    def query(statement, method='read_sql', use_cache=True):
+        raise ValueError('partition failed')
+    monkeypatch.setattr(memory_conn, 'query', query)
+
+    with pytest.raises(ValueError, match='partition failed'):
+        memory_conn.query_parallel('test.simple', 'id', 3, lower_bound=1, upper_bound=30)
+
+def test_insert_with_workers(memory_conn):
+    """
+    GIVEN a memory connector
+    WHEN a dataframe is inserted with statements built by worker processes
+    THEN check that a statement per shard is executed in order, in a single transaction
+    """
+    to_insert = pd.DataFrame({'id': range(10), 'name': ['a'] * 10})
+    memory_conn.insert_table('test.simple', to_insert, truncate=True, batch_size=4, workers=2)
+    statements = [statement.statement for statement in memory_conn.database.statements]
+
+    assert len(statements) == 3
+    assert statements[0].startswith('TRUNCATE TABLE test.simple; INSERT INTO test.simple')
+    assert "( 9 , 'a' )" in statements[2]
+    assert memory_conn.database.commits == 1
+    with pytest.raises(ValueError):
+        memory_conn.insert_table('test.simple', to_insert, method='copy', workers=2)
+
+
+@pytest.mark.parametrize('output', ['tuples', 'dicts', 'numpy', 'columns'])
+def test_query_output_without_pandas(memory_conn, simple, output, monkeypatch):
+    """
+    GIVEN a memory connector with a result given for a query
+    WHEN the query is run with an output other than 'dataframe'
+    THEN check that the rows are returned in that structure and that no dataframe is built
+    """
+    memory_conn.database.add_result('SELECT * FROM test.simple', simple)
+    monkeypatch.setattr(pd, 'read_sql_query', None)
+    monkeypatch.setattr(pd, 'DataFrame', None)
+    rows = memory_conn.query('SELECT * FROM test.simple', output=output)
+
+    if output == 'tuples':
+        assert rows[1] == (2, None, False, None)
+    elif output == 'dicts':
+        assert rows[0] == {'id': 1, 'name': 'Mercedes', 'activated': True, 'date': dt.date(2020, 1, 1)}
+    else:
+        assert rows['id'].tolist() == [1, 2, 3]
+        assert rows['name'].tolist() == ['Mercedes', None, 'Suzuki']
+        assert rows['date'].tolist() == [dt.date(2020, 1, 1), None, dt.date(2020, 3, 3)]
+
+
+def test_insert_rows_without_pandas(memory_conn, monkeypatch):
+    """
+    GIVEN a memory connector
+    WHEN a list of dictionaries is inserted with method='parameterized'
+    THEN check that the rows are sent as they are, with NULL for the keys missing, and no dataframe is built
+    """
+    monkeypatch.setattr(pd.DataFrame, '__init__', None)
+    monkeypatch.setattr(pd.DataFrame, 'from_records', None)
+    memory_conn.insert_table('test.simple', [{'id': 1, 'name': 'Mercedes'}, {'id': 2}], method='parameterized')
+
+    assert memory_conn.database.statements[0].statement == \
+        "INSERT INTO test.simple (id, name) VALUES (1,'Mercedes'),(2,NULL)"
+
+
+def test_write_generator_of_rows(memory_conn):
+    """
+    GIVEN a memory connector and generators of tuples
+    WHEN they are inserted with a batch size and deleted
+    THEN check that they are written a batch at a time as they are consumed, and that the progress has no total
+    """
+    progress = []
+    memory_conn.insert_table('test.simple', ((i, str(i)) for i in range(25)), columns=['id', 'name'],
+                             batch_size=10, progress_callback=lambda *args: progress.append(args))
+    memory_conn.delete_from_table('test.simple', ((i,) for i in range(3)), columns=['id'], method='in')
+    statements = memory_conn.database.statements
+
+    assert len(statements) == 4 and memory_conn.database.commits == 2
+    assert "( 20 , '20' )" in statements[2].statement and "( 19 , '19' )" not in statements[2].statement
+    assert progress == [(1, 10, None), (2, 20, None), (3, 25, None)]
+    assert statements[3].statement == "DELETE FROM test.simple WHERE (id) IN (( '0'),( '1'),( '2'));"
+    with pytest.raises(ValueError):
+        memory_conn.insert_table('test.simple', iter([(1, 'Mercedes')]), columns=['id', 'name'], parallel=2)
+
+
+def test_query_persist(simple, tmp_path):
+    """
+    GIVEN memory connectors with a disk cache on the same directory
+    WHEN a query is persisted by one of them and run by another one, with the same and a new version
+    THEN check that the stored result is returned without running the query, unless the version changes
+    """
+    database = MemoryDatabase()
+    database.add_result('SELECT * FROM test.simple', simple)
+    first, second = PostgresMemory(database), PostgresMemory(database)
+    first.enable_disk_cache(tmp_path, file_format='npy')
+    cache = second.enable_disk_cache(tmp_path, file_format='npy')
+
+    first.query('SELECT * FROM test.simple', persist='2020-01-01')
+    statements = len(database.statements)
+    df = second.query('SELECT * FROM test.simple', persist='2020-01-01')
+
+    assert df['id'].tolist() == [1, 2, 3]
+    assert len(database.statements) == statements
+    second.query('SELECT * FROM test.simple', persist='2020-01-02')
+    assert len(database.statements) > statements
+    assert cache.stats()['hits'] == 1
+    with pytest.raises(ValueError):
+        PostgresMemory(database).query('SELECT * FROM test.simple', persist=True)
+
+
+@pytest.mark.parametrize('rows', [[], {}])
+@pytest.mark.parametrize('write', [
+    lambda conn, rows: conn.insert_table('test.simple', rows),
+    lambda conn, rows: conn.update_table('test.simple', rows, ['id']),
+    lambda conn, rows: conn.delete_from_table('test.simple', rows),
+    lambda conn, rows: conn.merge_table('test.simple', rows, ['id'])])
+def test_write_empty_rows(memory_conn, rows, write):
+    """
+    GIVEN an empty list of rows and an empty dictionary of columns, without columns
+    WHEN they are written with each method
+    THEN check that a warning is given and nothing is sent
+    """
+    with pytest.warns(UserWarning, match='No rows provided'):
+        write(memory_conn, rows)
+
+    assert memory_conn.database.statements == []
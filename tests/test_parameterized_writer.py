@@ -0,0 +1,70 @@
+from postgresql_interface.parameterized_writer import ParameterizedWriter
+from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+
+def test_create_insert_statement():
+    """
+    GIVEN a table name and a list of columns
+    WHEN ParameterizedWriter.create_insert_statement() is called
+    THEN check that the INSERT INTO statement for execute_values is correct
+    """
+    statement = ParameterizedWriter.create_insert_statement('test.simple', ['id', 'name'])
+
+    assert statement == 'INSERT INTO test.simple (id, name) VALUES %s'
+
+
+def test_create_prepare_update_statement():
+    """
+    GIVEN a list of columns and the columns of the where clause
+    WHEN ParameterizedWriter.create_prepare_update_statement() is called
+    THEN check that parameters are numbered in the order of the columns
+    """
+    statement = ParameterizedWriter.create_prepare_update_statement(
+        'pgi_update', 'test.simple', ['id', 'name', 'date'], ['Id', 'DATE'])
+
+    assert statement == 'PREPARE pgi_update AS UPDATE test.simple SET name = $2 WHERE ID = $1 AND DATE = $3'
+
+
+def test_create_prepare_delete_statement():
+    """
+    GIVEN a list of columns
+    WHEN ParameterizedWriter.create_prepare_delete_statement() and create_execute_statement() are called
+    THEN check that the PREPARE and EXECUTE statements are correct
+    """
+    statement = ParameterizedWriter.create_prepare_delete_statement('pgi_delete', 'test.simple', ['id', 'name'])
+
+    assert statement == 'PREPARE pgi_delete AS DELETE FROM test.simple WHERE id = $1 AND name = $2'
+    assert ParameterizedWriter.create_execute_statement('pgi_delete', 2) == 'EXECUTE pgi_delete (%s, %s)'
+
+
+def test_column_name_injection():
+    """
+    GIVEN a column name that tries to do an SQL Injection
+    WHEN ParameterizedWriter.create_insert_statement() is called
+    THEN the SQL Injection should be detected
+    """
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        ParameterizedWriter.create_insert_statement('test.simple', ["id) VALUES ('1'); DROP TABLE test.simple; --"])
+
+
+def test_create_parameters():
+    """
+    GIVEN a dataframe with numpy types and nulls
+    WHEN ParameterizedWriter.create_parameters() is called
+    THEN check that rows are tuples of python objects with None for nulls
+    """
+    df = pd.DataFrame.from_dict({'id': [1, 2],
+                                 'amount': [1.5, np.nan],
+                                 'name': ['Ford', None],
+                                 'count': np.array([np.int64(3), None], dtype=object),
+                                 'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2)]})
+
+    parameters = ParameterizedWriter.create_parameters(df)
+
+    assert parameters == [(1, 1.5, 'Ford', 3, dt.date(2020, 1, 1)), (2, None, None, None, dt.date(2020, 2, 2))]
+    assert type(parameters[0][0]) is int
+    assert type(parameters[0][3]) is int
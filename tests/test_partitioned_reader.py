@@ -0,0 +1,49 @@
+from postgresql_interface.partitioned_reader import PartitionedReader
+import datetime as dt
+import pytest
+
+
+@pytest.mark.parametrize('lower, upper, num_partitions, expected', [
+    (1, 100, 4, [26, 51, 76]),
+    (1, 3, 10, [2, 3]),
+    (5, 5, 4, []),
+    (0.0, 1.0, 4, [0.25, 0.5, 0.75]),
+    (dt.date(2020, 1, 1), dt.date(2020, 1, 3), 4, [dt.date(2020, 1, 2), dt.date(2020, 1, 3)]),
+    (dt.datetime(2020, 1, 1), dt.datetime(2020, 1, 2), 2, [dt.datetime(2020, 1, 1, 12)]),
+])
+def test_create_partition_bounds(lower, upper, num_partitions, expected):
+    """
+    GIVEN the bounds of a partition column
+    WHEN PartitionedReader.create_partition_bounds() is called
+    THEN check that the range is split in ranges of the same width, without empty ones
+    """
+    assert PartitionedReader.create_partition_bounds(lower, upper, num_partitions) == expected
+
+
+def test_create_partition_bounds_not_valid():
+    """
+    GIVEN text bounds
+    WHEN PartitionedReader.create_partition_bounds() is called
+    THEN check that ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        PartitionedReader.create_partition_bounds('a', 'z', 2)
+
+
+def test_create_partition_statements():
+    """
+    GIVEN a table name and the separations of three partitions
+    WHEN PartitionedReader.create_source_statement() and create_partition_statements() are called
+    THEN check that partitions cover every row, nulls included
+    """
+    source = PartitionedReader.create_source_statement('test.simple')
+    statements = PartitionedReader.create_partition_statements(
+        source, 'date', [dt.date(2020, 1, 1), dt.date(2020, 2, 1)])
+
+    assert PartitionedReader.create_source_statement('SELECT id FROM test.simple;') == 'SELECT id FROM test.simple'
+    assert statements == [
+        "SELECT * FROM (SELECT * FROM test.simple) AS pgi_query WHERE date < '2020-01-01'::date OR date IS NULL",
+        "SELECT * FROM (SELECT * FROM test.simple) AS pgi_query "
+        "WHERE date >= '2020-01-01'::date AND date < '2020-02-01'::date",
+        "SELECT * FROM (SELECT * FROM test.simple) AS pgi_query WHERE date >= '2020-02-01'::date"]
+    assert PartitionedReader.create_partition_statements(source, 'date', []) == [source]
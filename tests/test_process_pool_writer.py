@@ -0,0 +1,59 @@
+from postgresql_interface.process_pool_writer import ProcessPoolWriter
+from postgresql_interface.sql_writer import SQLWriter
+from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='function')
+def to_write():
+    return pd.DataFrame.from_dict({'id': range(10),
+                                   'name': ['Ford', None, 'BMW', 'SEAT', 'Kia'] * 2,
+                                   'amount': [1.5, None] * 5})
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_update_and_delete_statements(to_write, workers):
+    """
+    GIVEN a dataframe
+    WHEN the UPDATE and DELETE statements are built in shards
+    THEN check that, once joined, they are the same than the statements built at once
+    """
+    update = ProcessPoolWriter.iter_statements(
+        SQLWriter.create_update_table_statement, 'test.simple', to_write, workers, shard_size=3,
+        where_identifier=['id'])
+    delete = ProcessPoolWriter.iter_statements(
+        SQLWriter.create_delete_from_table_statement, 'test.simple', to_write[['id', 'name']], workers)
+
+    assert ProcessPoolWriter.join_statements(update) == SQLWriter.create_update_table_statement(
+        'test.simple', to_write.copy(), ['id'])
+    assert ProcessPoolWriter.join_statements(delete) == SQLWriter.create_delete_from_table_statement(
+        'test.simple', to_write[['id', 'name']].copy())
+
+
+def test_insert_statements(to_write):
+    """
+    GIVEN a dataframe
+    WHEN the INSERT statements are built in shards, truncating the table first
+    THEN check that shards come in order and only the first one truncates the table
+    """
+    shards = list(ProcessPoolWriter.iter_statements(
+        SQLWriter.create_insert_table_statement, 'test.simple', to_write, 2, shard_size=4,
+        first_shard_kwargs={'truncate': True}, truncate=False))
+
+    assert [rows for rows, _ in shards] == [4, 4, 2]
+    assert [statement.startswith('TRUNCATE') for _, statement in shards] == [True, False, False]
+    assert shards[1][1] == SQLWriter.create_insert_table_statement('test.simple', to_write.iloc[4:8].copy())
+
+
+def test_error_on_worker(to_write):
+    """
+    GIVEN a dataframe with a possible SQL injection on its last rows
+    WHEN its statements are built in shards
+    THEN check that the error raised by the worker is raised
+    """
+    to_write.loc[9, 'name'] = "a'); DROP TABLE test.simple;"
+
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        list(ProcessPoolWriter.iter_statements(
+            SQLWriter.create_insert_table_statement, 'test.simple', to_write, 2, shard_size=2))
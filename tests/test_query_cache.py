@@ -0,0 +1,85 @@
+from postgresql_interface.query_cache import QueryCache
+import pandas as pd
+import time
+
+
+def test_hit_returns_copy():
+    """
+    GIVEN a cached result
+    WHEN the same statement, written differently, is looked up and the result changed by the caller
+    THEN check that it is a hit and the cached result is not changed
+    """
+    cache = QueryCache()
+    cache.put('SELECT * FROM test.simple;', pd.DataFrame({'id': [1, 2]}), cache.generation)
+
+    df = cache.get('SELECT *\n  FROM test.simple')
+    df.loc[0, 'id'] = 99
+
+    assert cache.get('SELECT * FROM test.simple')['id'].tolist() == [1, 2]
+    assert cache.get('SELECT * FROM test.simple', method='copy') is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+
+def test_ttl():
+    """
+    GIVEN a cached result with a short ttl
+    WHEN it is looked up after the ttl
+    THEN check that it is a miss
+    """
+    cache = QueryCache(ttl=0.01)
+    cache.put('SELECT 1', pd.DataFrame({'a': [1]}), cache.generation)
+    time.sleep(0.05)
+
+    assert cache.get('SELECT 1') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_eviction():
+    """
+    GIVEN a cache with room for two results
+    WHEN a third one is stored
+    THEN check that the least recently used one is evicted
+    """
+    cache = QueryCache(max_entries=2)
+    for statement in ['SELECT 1', 'SELECT 2']:
+        cache.put(statement, pd.DataFrame({'a': [1]}), cache.generation)
+    cache.get('SELECT 1')
+    cache.put('SELECT 3', pd.DataFrame({'a': [1]}), cache.generation)
+
+    assert cache.get('SELECT 2') is None
+    assert cache.get('SELECT 1') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_invalidation():
+    """
+    GIVEN cached results of several tables
+    WHEN a statement that writes one of them is executed
+    THEN check that only the results that reference it are invalidated, and results read before are not stored
+    """
+    cache = QueryCache()
+    generation = cache.generation
+    cache.put('SELECT * FROM test.simple s JOIN test.other o ON s.id = o.id', pd.DataFrame(), generation)
+    cache.put('SELECT * FROM test.other', pd.DataFrame(), generation)
+
+    cache.invalidate_statement('UPDATE test.simple SET name = NULL')
+    cache.put('SELECT * FROM test.simple', pd.DataFrame(), generation)
+
+    assert cache.get('SELECT * FROM test.simple s JOIN test.other o ON s.id = o.id') is None
+    assert cache.get('SELECT * FROM test.simple') is None
+    assert cache.get('SELECT * FROM test.other') is not None
+
+
+def test_literals_kept():
+    """
+    GIVEN a cached result of a statement with a string literal
+    WHEN statements whose literals differ only in their blanks are looked up
+    THEN check that they are misses, while blanks outside the literals are still collapsed
+    """
+    cache = QueryCache()
+    cache.put("SELECT * FROM test.simple WHERE name = 'Ford  Focus'", pd.DataFrame({'id': [1]}), cache.generation)
+
+    assert cache.get("SELECT *\n  FROM test.simple WHERE name = 'Ford  Focus';") is not None
+    assert cache.get("SELECT * FROM test.simple WHERE name = 'Ford Focus'") is None
+    assert cache.get("SELECT * FROM test.simple WHERE name = $$Ford  Focus$$") is None
@@ -0,0 +1,67 @@
+from postgresql_interface.record_reader import RecordReader
+from postgresql_interface.memory_connection import Column
+import numpy as np
+import datetime as dt
+import decimal
+import pytest
+
+
+@pytest.fixture(scope='function')
+def result():
+    description = [Column(name, type_code, None, None, None, None, None) for name, type_code in
+                   [('id', 23), ('quantity', 20), ('price', 701), ('activated', 16), ('day', 1082),
+                    ('created_at', 1184), ('amount', 1700)]]
+    rows = [(1, 10, 1.5, True, dt.date(2020, 1, 1),
+             dt.datetime(2020, 1, 1, 1, tzinfo=dt.timezone(dt.timedelta(hours=1))), decimal.Decimal('1.10')),
+            (2, None, None, None, None, None, None)]
+    return rows, description
+
+
+def test_read_rows_tuples_and_dicts(result):
+    """
+    GIVEN the rows and the description of a query
+    WHEN they are read as tuples and as dicts
+    THEN check that tuples are the rows as fetched, and dicts have the names of the columns as keys
+    """
+    rows, description = result
+
+    assert RecordReader.read_rows(rows, description, 'tuples') is rows
+    assert RecordReader.read_rows(rows, description, 'dicts')[1] == {
+        'id': 2, 'quantity': None, 'price': None, 'activated': None, 'day': None, 'created_at': None, 'amount': None}
+
+
+def test_read_rows_columns(result):
+    """
+    GIVEN the rows and the description of a query, with nulls
+    WHEN they are read as columns
+    THEN check that each column is a numpy array of the type of the column of the query
+    """
+    columns = RecordReader.read_rows(*result, output='columns')
+
+    assert columns['id'].dtype == np.int32 and columns['id'].tolist() == [1, 2]
+    assert columns['quantity'].dtype == np.float64 and np.isnan(columns['quantity'][1])
+    assert columns['price'].dtype == np.float64 and np.isnan(columns['price'][1])
+    assert columns['activated'].dtype == object and columns['activated'].tolist() == [True, None]
+    assert columns['day'].tolist() == [dt.date(2020, 1, 1), None]
+    assert columns['created_at'].dtype == np.dtype('datetime64[us]')
+    assert columns['created_at'][0] == np.datetime64('2020-01-01T00:00:00') and np.isnat(columns['created_at'][1])
+    assert columns['amount'].tolist() == [decimal.Decimal('1.10'), None]
+
+
+def test_read_rows_numpy(result):
+    """
+    GIVEN the rows and the description of a query
+    WHEN they are read as a numpy structured array
+    THEN check that it has a record per row and a field per column, and that repeated names are not valid
+    """
+    rows, description = result
+    array = RecordReader.read_rows(rows, description, 'numpy')
+
+    assert array.shape == (2,)
+    assert array.dtype.names == ('id', 'quantity', 'price', 'activated', 'day', 'created_at', 'amount')
+    assert array['id'].tolist() == [1, 2]
+    assert RecordReader.read_rows([], description, 'numpy').shape == (0,)
+    with pytest.raises(ValueError):
+        RecordReader.read_rows([(1, 2)], description[:1] * 2, 'numpy')
+    with pytest.raises(ValueError):
+        RecordReader.read_rows(rows, description, 'records')
@@ -0,0 +1,54 @@
+from postgresql_interface.row_source import RowSource
+import pandas as pd
+import numpy as np
+import pytest
+
+
+def test_create_dataframe():
+    """
+    GIVEN rows as a list of dictionaries, a list of tuples with columns and a dictionary of numpy arrays
+    WHEN they are converted into dataframes
+    THEN check that the three give the same dataframe, with NULL for the keys missing on a dictionary
+    """
+    dicts = RowSource.create_dataframe([{'id': 1, 'name': 'Mercedes'}, {'id': 2}])
+    tuples = RowSource.create_dataframe([(1, 'Mercedes'), (2, None)], columns=['id', 'name'])
+    columns = RowSource.create_dataframe({'id': np.array([1, 2]), 'name': np.array(['Mercedes', None])})
+
+    assert dicts.columns.tolist() == tuples.columns.tolist() == columns.columns.tolist() == ['id', 'name']
+    assert dicts['id'].tolist() == tuples['id'].tolist() == columns['id'].tolist() == [1, 2]
+    for df in (dicts, tuples, columns):
+        assert df.loc[0, 'name'] == 'Mercedes' and pd.isna(df.loc[1, 'name'])
+
+
+def test_iter_chunks():
+    """
+    GIVEN a generator of dictionaries
+    WHEN it is read in chunks
+    THEN check that rows are read a chunk at a time, with the columns of the first row, and the generator is not
+    consumed beyond the chunk being read
+    """
+    read = []
+
+    def rows():
+        for i in range(5):
+            read.append(i)
+            yield {'id': i, 'name': str(i)} if i != 3 else {'name': '3', 'id': 3}
+
+    chunks = RowSource.iter_chunks(rows(), chunk_size=2)
+    columns, first = next(chunks)
+
+    assert columns == ['id', 'name'] and first == [(0, '0'), (1, '1')]
+    assert read == [0, 1]
+    assert list(chunks) == [(['id', 'name'], [(2, '2'), (3, '3')]), (['id', 'name'], [(4, '4')])]
+    assert RowSource.is_stream(rows()) and not RowSource.is_stream([]) and not RowSource.is_stream({})
+
+
+@pytest.mark.parametrize('rows, columns', [([(1, 'Mercedes')], None), ([(1, 'Mercedes')], ['id']), ([[1]], [])])
+def test_read_rows_not_valid(rows, columns):
+    """
+    GIVEN rows that are not dictionaries, without columns or with a different number of values than columns
+    WHEN they are read
+    THEN check that ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        RowSource.read_rows(rows, columns)
@@ -39,4 +39,35 @@ def test_no_error_raise(value, col):
     THEN the SQL Injection should be detected
     """
     SQLInjectionBodyguard.check_string_on_insert(value, col)
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_column_raise_error():
+    """
+    GIVEN a column whose values include some that try to do an SQL Injection
+    WHEN it is passed through SQLInjectionBodyguard.check_column_on_insert()
+    THEN the SQL Injection should be detected and the first offending row reported
+    """
+    values = ["O'Brien", 100, None, "',''); DROP DATABASE; ", "x'); DROP TABLE test.simple; --"]
+    with pytest.raises(ErrorPossibleSQLInjectionDetected) as e:
+        SQLInjectionBodyguard.check_column_on_insert(values, 'my_col')
+    assert str(e.value) == ("ERROR: A possible intent of SQL Injection has been found on field: 'my_col', row 3. "
+                            "Insert operation interrupted. problematic value: '',''); DROP DATABASE; '")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["asde,);'", "O'Brien", "a); b;"],
+        ["O'Brien\x00", "); x;"],
+        [],
+    ],
+)
+def test_column_no_error_raise(values):
+    """
+    GIVEN a column whose values do not try to do an SQL Injection, even if some would when joined
+    WHEN it is passed through SQLInjectionBodyguard.check_column_on_insert()
+    THEN no error should be raised
+    """
+    SQLInjectionBodyguard.check_column_on_insert(values, 'my_col')
+    assert True
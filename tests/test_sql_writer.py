@@ -0,0 +1,218 @@
+from postgresql_interface.sql_writer import SQLWriter
+from postgresql_interface.custom_errors import ErrorPossibleSQLInjectionDetected
+import pandas as pd
+import numpy as np
+import datetime as dt
+import pytest
+
+
+@pytest.fixture(scope='function')
+def to_write():
+    return pd.DataFrame.from_dict({'id': [1, 2],
+                                   'amount': [1.5, np.nan],
+                                   'name': ['Ford', None],
+                                   'activated': [True, False],
+                                   'date': [dt.date(2020, 1, 1), dt.date(2020, 2, 2)]})
+
+
+def test_create_insert_table_statement(to_write):
+    """
+    GIVEN a dataframe with numbers, strings, booleans, dates and nulls
+    WHEN SQLWriter.create_insert_table_statement() is called
+    THEN check that the INSERT INTO statement is correct
+    """
+    statement = SQLWriter.create_insert_table_statement('test.simple', to_write, truncate=True)
+
+    assert statement == ("TRUNCATE TABLE test.simple; INSERT INTO test.simple ( id, amount, name, activated, date) "
+                         "VALUES  ( 1 , 1.5 , 'Ford' , 'True' , '2020-01-01' ), "
+                         "( 2 , NULL, NULL, 'False' , '2020-02-02' );")
+
+
+def test_create_insert_table_statement_datetime():
+    """
+    GIVEN a dataframe with a datetime column with and without fractions of second
+    WHEN SQLWriter.create_insert_table_statement() is called
+    THEN check that datetimes are written as pandas.Timestamp does
+    """
+    df = pd.DataFrame({'ts': [dt.datetime(2020, 1, 1, 10), dt.datetime(2020, 1, 1, 10, 0, 0, 500000), None]})
+
+    statement = SQLWriter.create_insert_table_statement('test.simple', df)
+
+    assert statement == ("INSERT INTO test.simple ( ts) VALUES  ( '2020-01-01 10:00:00' ), "
+                         "( '2020-01-01 10:00:00.500000' ), ( NULL);")
+
+
+def test_create_update_table_statement(to_write):
+    """
+    GIVEN a dataframe with numbers, strings, booleans, dates and nulls
+    WHEN SQLWriter.create_update_table_statement() is called
+    THEN check that one UPDATE statement is written per row
+    """
+    statement = SQLWriter.create_update_table_statement('test.simple', to_write, ['id', 'date'])
+
+    assert statement == (" UPDATE test.simple SET  AMOUNT =  '1.5', NAME =  'Ford', ACTIVATED =  'True' "
+                         "WHERE  ID =  '1'  AND  DATE =  '2020-01-01' ; "
+                         " UPDATE test.simple SET  AMOUNT =  NULL, NAME =  NULL, ACTIVATED =  'False' "
+                         "WHERE  ID =  '2'  AND  DATE =  '2020-02-02' ; ")
+
+
+def test_create_delete_from_table_statement_one_col(to_write):
+    """
+    GIVEN a dataframe with one column
+    WHEN SQLWriter.create_delete_from_table_statement() is called
+    THEN check that a single DELETE FROM ... IN statement is written
+    """
+    statement = SQLWriter.create_delete_from_table_statement('test.simple', to_write[['id']].copy())
+
+    assert statement == "DELETE FROM test.simple WHERE id IN ( '1', '2')"
+
+
+def test_create_delete_from_table_statement_several_cols(to_write):
+    """
+    GIVEN a dataframe with several columns
+    WHEN SQLWriter.create_delete_from_table_statement() is called
+    THEN check that one DELETE FROM statement is written per row
+    """
+    statement = SQLWriter.create_delete_from_table_statement('test.simple', to_write[['id', 'name']].copy())
+
+    assert statement == (" DELETE FROM test.simple WHERE  id =  '1'  AND  name =  'Ford' ; "
+                         " DELETE FROM test.simple WHERE  id =  '2'  AND  name =  NULL ; ")
+
+
+def test_sql_injection_detected(to_write):
+    """
+    GIVEN a dataframe with a value that tries to do an SQL Injection
+    WHEN any statement is written
+    THEN the SQL Injection should be detected
+    """
+    to_write.loc[1, 'name'] = "x'); DROP TABLE test.simple; --"
+
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        SQLWriter.create_insert_table_statement('test.simple', to_write.copy())
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        SQLWriter.create_update_table_statement('test.simple', to_write.copy(), ['id'])
+    with pytest.raises(ErrorPossibleSQLInjectionDetected):
+        SQLWriter.create_delete_from_table_statement('test.simple', to_write[['name']].copy())
+
+
+def test_create_update_from_values_statement(to_write):
+    """
+    GIVEN a dataframe and the types of the columns of the table
+    WHEN SQLWriter.create_update_from_values_statement() is called
+    THEN check that a single UPDATE ... FROM (VALUES ...) statement with casts is written
+    """
+    statement = SQLWriter.create_update_from_values_statement(
+        'test.simple', to_write[['id', 'name']], ['Id'], column_types={'id': 'integer', 'NAME': 'text'})
+
+    assert statement == ("UPDATE test.simple SET NAME = v.NAME::text "
+                         "FROM (VALUES ( '1',  'Ford'),( '2',  NULL)) AS v (ID, NAME) "
+                         "WHERE test.simple.ID = v.ID::integer;")
+
+
+def test_create_update_from_table_statement():
+    """
+    GIVEN a staging table
+    WHEN SQLWriter.create_update_from_table_statement() is called
+    THEN check that a single UPDATE ... FROM statement is written
+    """
+    statement = SQLWriter.create_update_from_table_statement(
+        'test.simple', 'staging', ['id', 'date', 'name'], ['id', 'date'])
+
+    assert statement == ("UPDATE test.simple SET NAME = v.NAME FROM staging AS v "
+                         "WHERE test.simple.ID = v.ID AND test.simple.DATE = v.DATE;")
+
+
+def test_create_delete_row_values_statement(to_write):
+    """
+    GIVEN a dataframe with several columns
+    WHEN SQLWriter.create_delete_row_values_statement() is called
+    THEN check that a single DELETE FROM ... WHERE (...) IN (...) statement is written
+    """
+    statement = SQLWriter.create_delete_row_values_statement('test.simple', to_write[['id', 'name']])
+
+    assert statement == "DELETE FROM test.simple WHERE (id, name) IN (( '1',  'Ford'),( '2',  NULL));"
+
+
+def test_create_delete_using_values_statement(to_write):
+    """
+    GIVEN a dataframe with several columns and the types of the columns of the table
+    WHEN SQLWriter.create_delete_using_values_statement() is called
+    THEN check that a single DELETE FROM ... USING (VALUES ...) statement with casts is written
+    """
+    statement = SQLWriter.create_delete_using_values_statement(
+        'test.simple', to_write[['id', 'date']], column_types={'id': 'integer', 'date': 'date'})
+
+    assert statement == ("DELETE FROM test.simple USING (VALUES ( '1',  '2020-01-01'),( '2',  '2020-02-02')) "
+                         "AS v (ID, DATE) WHERE test.simple.ID = v.ID::integer AND test.simple.DATE = v.DATE::date;")
+
+
+def test_create_merge_table_statement(to_write):
+    """
+    GIVEN a dataframe and the columns that identify a row
+    WHEN SQLWriter.create_merge_table_statement() is called
+    THEN check that an INSERT INTO ... ON CONFLICT DO UPDATE statement is written
+    """
+    statement = SQLWriter.create_merge_table_statement('test.simple', to_write[['id', 'name']], ['Id'])
+
+    assert statement == ("INSERT INTO test.simple ( id, name) VALUES  ( 1 , 'Ford' ), ( 2 , NULL) "
+                         "ON CONFLICT (Id) DO UPDATE SET name = EXCLUDED.name;")
+
+
+def test_create_merge_table_statement_do_nothing(to_write):
+    """
+    GIVEN a dataframe and no columns to update
+    WHEN SQLWriter.create_merge_table_statement() is called
+    THEN check that an INSERT INTO ... ON CONFLICT DO NOTHING statement is written
+    """
+    statement = SQLWriter.create_merge_table_statement('test.simple', to_write[['id']], ['id'], update_columns=[])
+
+    assert statement == "INSERT INTO test.simple ( id) VALUES  ( 1 ), ( 2 ) ON CONFLICT (id) DO NOTHING;"
+
+
+def test_create_merge_from_table_statement():
+    """
+    GIVEN a staging table
+    WHEN SQLWriter.create_merge_from_table_statement() is called
+    THEN check that a single INSERT INTO ... SELECT ... ON CONFLICT statement is written
+    """
+    statement = SQLWriter.create_merge_from_table_statement(
+        'test.simple', 'staging', ['ID', 'NAME', 'DATE'], ['id'], update_columns=['NAME'])
+
+    assert statement == ("INSERT INTO test.simple (ID, NAME, DATE) SELECT ID, NAME, DATE FROM staging "
+                         "ON CONFLICT (id) DO UPDATE SET NAME = EXCLUDED.NAME;")
+
+
+def test_create_insert_from_table_statement():
+    """
+    GIVEN an unlogged staging table
+    WHEN SQLWriter.create_staging_table_statement() and create_insert_from_table_statement() are called
+    THEN check that the staging table is not temporary and its rows are inserted after truncating the table
+    """
+    create = SQLWriter.create_staging_table_statement('test.staging', 'test.simple', ['id', 'name'], temporary=False)
+    statement = SQLWriter.create_insert_from_table_statement('test.simple', 'test.staging', ['id', 'name'],
+                                                             truncate=True)
+
+    assert create == "CREATE UNLOGGED TABLE test.staging AS SELECT id, name FROM test.simple WITH NO DATA;"
+    assert statement == ("TRUNCATE TABLE test.simple; "
+                         "INSERT INTO test.simple (id, name) SELECT id, name FROM test.staging;")
+
+
+def test_writers_do_not_change_dataframe(to_write):
+    """
+    GIVEN a dataframe with an index that does not start on 0
+    WHEN the INSERT, UPDATE and DELETE statements of SQLWriter are written from it
+    THEN check that the statements are the same than for the dataframe with a default index, and that neither the
+        index nor the columns of the dataframe are changed
+    """
+    df = to_write.set_axis([10, 20])
+    expected = to_write.copy()
+
+    assert (SQLWriter.create_insert_table_statement('test.simple', df)
+            == SQLWriter.create_insert_table_statement('test.simple', expected.copy()))
+    assert (SQLWriter.create_update_table_statement('test.simple', df, ['id', 'date'])
+            == SQLWriter.create_update_table_statement('test.simple', expected.copy(), ['id', 'date']))
+    assert (SQLWriter.create_delete_from_table_statement('test.simple', df[['id', 'name']])
+            == SQLWriter.create_delete_from_table_statement('test.simple', expected[['id', 'name']]))
+    assert df.index.tolist() == [10, 20]
+    assert df.columns.tolist() == ['id', 'amount', 'name', 'activated', 'date']
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected)